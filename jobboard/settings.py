@@ -132,6 +132,111 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Email Configuration - DEVELOPMENT
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+# All mail goes through the connection pool in jobs.mail_pool, which
+# delivers with MAIL_POOL_BACKEND
+EMAIL_BACKEND = 'jobs.mail_pool.PooledEmailBackend'
+MAIL_POOL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_FROM_EMAIL = 'noreply@jobboard.com'
-SITE_URL = 'http://127.0.0.1:8000'
\ No newline at end of file
+SITE_URL = 'http://127.0.0.1:8000'
+
+# Job search
+# Dotted path to a jobs.search backend class. Leave as None to pick one from
+# the database vendor: MySQL FULLTEXT in production, SQLite FTS5 in development.
+JOB_SEARCH_BACKEND = None
+
+# Pagination - fixed page sizes for the cursor-paginated listings
+JOBS_PER_PAGE = 20
+COMPANIES_PER_PAGE = 24
+APPLICATIONS_PER_PAGE = 20
+
+# Search facets - how many locations the job_list sidebar offers
+FACET_LOCATION_LIMIT = 50
+
+# Caching
+# The job_list result cache and its generation counter live here. Use a shared
+# backend (Memcached/Redis) when running several processes, otherwise a Job
+# write in one process does not invalidate pages cached by the others.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+JOB_LIST_CACHE_TIMEOUT = 300
+# Rendered alert email job cards, dropped early when the job changes
+JOB_CARD_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+# Alert match previews; short, as new jobs and applications don't invalidate them
+ALERT_PREVIEW_CACHE_TIMEOUT = 60
+
+# Search box typeahead - shortest prefix answered, suggestions kept per prefix,
+# and how often each process reloads its in-memory index to see other
+# processes' writes
+AUTOCOMPLETE_MIN_PREFIX = 2
+AUTOCOMPLETE_MAX_RESULTS = 10
+AUTOCOMPLETE_REFRESH_SECONDS = 300
+
+# Typo-tolerant search - minimum trigram similarity for a "did you mean" match
+FUZZY_SIMILARITY_THRESHOLD = 0.25
+
+# Geo search - local gazetteer used to geocode job and company locations,
+# size of the spatial grid cells, and the largest radius a search may use
+GEO_GAZETTEER_PATH = BASE_DIR / 'jobs' / 'data' / 'gazetteer.csv'
+GEO_GRID_DEGREES = 0.5
+GEO_MAX_RADIUS_KM = 500
+
+# Salary parsing - assumed when a salary string names no currency or period.
+# The currency is also the one job_list salary filters start in.
+SALARY_DEFAULT_CURRENCY = 'KES'
+SALARY_DEFAULT_PERIOD = 'year'
+
+# Search result totals - above this many matches job_list shows "10,000+"
+# instead of counting every row
+SEARCH_EXACT_COUNT_LIMIT = 10000
+
+# Job alerts - alerts loaded and evaluated together per batch by send_job_alerts,
+# the shortest and longest run_alerts.py sleeps between runs (in seconds), and
+# the most alert emails sent a second across all shards (0 for no limit)
+ALERT_BATCH_SIZE = 500
+ALERT_SCHEDULER_MIN_SLEEP = 60
+ALERT_SCHEDULER_MAX_SLEEP = 600
+ALERT_MAX_SEND_RATE = 0
+
+# Mail delivery pool - persistent connections kept open per process,
+# messages sent per connection checkout, and the most messages a second
+# sent to any one recipient domain (0 for no limit)
+MAIL_POOL_CONNECTIONS = 4
+MAIL_POOL_BATCH_SIZE = 50
+MAIL_DOMAIN_RATE = 0
+
+# Email outbox - delivery attempts before a message is dead-lettered, the
+# retry backoff (doubling from the base, in seconds, up to the max), how long
+# a worker may hold claimed messages, and how long sent rows are kept
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_RETRY_BASE_SECONDS = 30
+OUTBOX_RETRY_MAX_SECONDS = 3600
+OUTBOX_CLAIM_SECONDS = 300
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_KEEP_SENT_DAYS = 7
+
+# Instant alerts - new jobs handled per micro-batch by process_instant_alerts,
+# and how often (in seconds) it polls the queue when idle
+INSTANT_ALERT_BATCH_SIZE = 200
+INSTANT_ALERT_POLL_SECONDS = 1
+
+# Resume parsing - largest upload accepted, and how much of a document is
+# read (pages of a PDF or DOCX, characters of any format)
+RESUME_MAX_FILE_BYTES = 10 * 1024 * 1024
+RESUME_MAX_PAGES = 10
+RESUME_MAX_CHARS = 50000
+
+# Logging - background work of the jobs app (alert worker processes, the
+# typeahead index loader) reports to the console
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'jobs': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
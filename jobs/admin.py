@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Job, Application, Company, UserProfile, JobAlert
+from .models import Job, Application, Company, UserProfile, JobAlert, OutboxMessage, AlertRun, JobQueueEntry
 
 # Register your models here.
 admin.site.register(Job)
@@ -7,3 +7,6 @@ admin.site.register(Application)
 admin.site.register(Company)
 admin.site.register(UserProfile)
 admin.site.register(JobAlert)
+admin.site.register(OutboxMessage)
+admin.site.register(JobQueueEntry)
+admin.site.register(AlertRun)
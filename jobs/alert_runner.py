@@ -0,0 +1,253 @@
+"""
+One run of the job alerts, shared by send_job_alerts and its workers.
+
+Alerts can be split into shards by user id (user_id % shards == shard), so
+all of a user's alerts are handled by the same process and no two
+processes or hosts ever email the same user at once. Each shard uses its
+own database connection and its own pool of SMTP connections
+(jobs.mail_pool), which sends a chunk's emails concurrently.
+
+Only due alerts are read: JobAlert.next_due is kept from frequency and
+last_sent, and a run walks the (is_active, next_due) index up to now.
+Every alert a run evaluates moves on to its next slot, including those
+with nothing to send; only an alert whose email failed stays due.
+run_alerts.py sleeps until seconds_until_due() instead of polling.
+Instant alerts are left to the process_instant_alerts consumer.
+
+Alerts are read a chunk of users at a time, and all of a user's due
+alerts go out as one digest, listing each job once. A user's matches are
+marked as sent as soon as their digest is out, not at the end of the
+chunk, so a run that dies part way never emails anyone twice.
+
+Daily and weekly alerts fall due at their own stable slot in the window
+(jobs.alert_slots), so they are spread over the day instead of all
+firing at one tick. ALERT_MAX_SEND_RATE additionally paces delivery.
+
+Every run reports its counters and the wall and CPU time and SQL queries
+of each phase (load, match, render, send, update), which send_job_alerts
+records as an AlertRun.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+import django
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import Min
+from django.db.models.functions import Mod
+from django.utils import timezone
+
+from . import mail_pool, percolator
+from .emails import build_digest_email
+from .job_cards import CardRenderer
+from .models import JobAlert
+
+STAT_FIELDS = (
+    'due', 'candidates', 'rendered', 'cards', 'sent', 'failed', 'jobs', 'queries', 'send_seconds',
+)
+PHASES = ('load', 'match', 'render', 'send', 'throttle', 'update')
+LOG_LEVELS = {'success': logging.INFO, 'error': logging.ERROR}
+
+logger = logging.getLogger(__name__)
+
+
+class SendPacer:
+    """Holds a run to ``rate`` emails a second on average"""
+    
+    def __init__(self, rate):
+        self.rate = rate
+        self._start = time.monotonic()
+        self._sent = 0
+    
+    def wait(self, count):
+        """Sleep until ``count`` more emails fit within the rate"""
+        if not self.rate:
+            return
+        delay = self._start + self._sent / self.rate - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._sent += count
+
+
+class PhaseClock:
+    """Wall time, CPU time and SQL queries spent in each phase of a run"""
+    
+    def __init__(self):
+        self.queries = 0
+        self.phases = {name: {'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'queries': 0} for name in PHASES}
+    
+    def count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+    
+    @contextmanager
+    def phase(self, name):
+        wall, cpu, queries = time.perf_counter(), time.process_time(), self.queries
+        try:
+            yield
+        finally:
+            totals = self.phases[name]
+            totals['wall_seconds'] += time.perf_counter() - wall
+            totals['cpu_seconds'] += time.process_time() - cpu
+            totals['queries'] += self.queries - queries
+    
+    def timed(self, name, iterable):
+        """Iterate, charging the time spent fetching each item to the phase"""
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                item = next(iterator, None)
+            if item is None:
+                return
+            yield item
+
+
+def seconds_until_due(max_sleep=None):
+    """How long the scheduler can sleep before another alert falls due.
+    
+    Capped at ALERT_SCHEDULER_MAX_SLEEP: new alerts are due at once, and an
+    alert whose email failed stays due, so both are picked up by the next
+    wake-up at the latest.
+    """
+    max_sleep = max_sleep if max_sleep is not None else settings.ALERT_SCHEDULER_MAX_SLEEP
+    now = timezone.now()
+    upcoming = JobAlert.objects.filter(is_active=True, next_due__gt=now).exclude(frequency='instant').aggregate(next_due=Min('next_due'))['next_due']
+    if upcoming is None:
+        return max_sleep
+    # Alerts falling due close together are collected into one run
+    return max(settings.ALERT_SCHEDULER_MIN_SLEEP, min(max_sleep, (upcoming - now).total_seconds()))
+
+
+def log_message(level, message):
+    """Default ``log`` of a run, used by worker processes"""
+    logger.log(LOG_LEVELS.get(level, logging.INFO), message)
+
+
+def run_alerts(shard=0, shards=1, batch_size=None, log=log_message):
+    """Send the due alerts of one shard and return its stats"""
+    batch_size = batch_size or settings.ALERT_BATCH_SIZE
+    stats = dict.fromkeys(STAT_FIELDS, 0)
+    stats['shard'] = f'{shard}/{shards}'
+    clock = PhaseClock()
+    with connection.execute_wrapper(clock.count_query):
+        _run(stats, clock, shard, shards, batch_size, log)
+    stats['queries'] = clock.queries
+    stats['phases'] = clock.phases
+    return stats
+
+
+def _run(stats, clock, shard, shards, batch_size, log):
+    due_alerts = (
+        JobAlert.objects
+        .filter(is_active=True, next_due__lte=timezone.now())
+        .exclude(frequency='instant')
+    )
+    if shards > 1:
+        due_alerts = due_alerts.alias(shard=Mod('user_id', shards)).filter(shard=shard)
+    # Users in the order their first alert fell due; each gets one digest of all their due alerts
+    users = (
+        due_alerts
+        .values('user_id')
+        .annotate(first_due=Min('next_due'))
+        .order_by('first_due', 'user_id')
+        .values_list('user_id', flat=True)
+    )
+    
+    engine = mail_pool.get_engine()
+    # Every shard takes its share of the rate
+    rate = settings.ALERT_MAX_SEND_RATE / shards
+    pacer = SendPacer(rate)
+    if rate:
+        # About a second's worth of emails per chunk, so sends are smooth
+        batch_size = min(batch_size, max(1, int(rate)))
+    # Each job's card is rendered once for the whole run
+    cards = CardRenderer()
+    chunks = percolator.chunked(users.iterator(chunk_size=batch_size), batch_size)
+    for user_ids in clock.timed('load', chunks):
+        with clock.phase('load'):
+            due = list(due_alerts.filter(user_id__in=user_ids).select_related('user').order_by('next_due', 'id'))
+        stats['due'] += len(due)
+        alerts_by_user = {}
+        for alert in due:
+            alerts_by_user.setdefault(alert.user_id, []).append(alert)
+        # Matches were recorded as jobs were posted, see jobs.percolator
+        with clock.phase('match'):
+            pending = percolator.pending_jobs(due)
+        stats['candidates'] += sum(len(jobs) for jobs in pending.values())
+        
+        with clock.phase('render'):
+            emails = {}
+            for user_id, alerts in alerts_by_user.items():
+                alert_jobs = [(alert, pending[alert.id]) for alert in alerts if pending[alert.id]]
+                if alert_jobs:
+                    emails[user_id] = build_digest_email(alerts[0].user, alert_jobs, cards)
+        stats['rendered'] += len(emails)
+        with clock.phase('throttle'):
+            pacer.wait(len(emails))
+        user_ids_by_message = {id(message): user_id for user_id, message in emails.items()}
+        for message, error in clock.timed('send', engine.deliver(emails.values())):
+            alerts = alerts_by_user.pop(user_ids_by_message[id(message)])
+            user = alerts[0].user
+            if error is not None:
+                stats['failed'] += 1
+                log('error', f'Failed to send alerts to {user.username}: {str(error)}')
+                # Keep the marks where they were so the jobs are retried next run
+                continue
+            jobs = {job.id for alert in alerts for job in pending[alert.id]}
+            stats['sent'] += 1
+            stats['jobs'] += len(jobs)
+            with clock.phase('update'):
+                record_evaluated(alerts, pending)
+            log('success', f'Sent alerts to {user.username} with {len(jobs)} jobs')
+        
+        # Users with nothing to send just move past the jobs evaluated
+        with clock.phase('update'):
+            record_evaluated([alert for alerts in alerts_by_user.values() for alert in alerts], pending)
+    stats['cards'] = cards.rendered
+    stats['send_seconds'] = clock.phases['send']['wall_seconds']
+
+
+def record_evaluated(alerts, pending):
+    """Mark the pending jobs of the alerts as sent, move their marks past
+    the matches read for them and schedule each alert's next slot, whether
+    or not it had anything to send"""
+    sent = {alert.id: pending[alert.id] for alert in alerts if pending[alert.id]}
+    now = timezone.now()
+    with transaction.atomic():
+        JobAlert.record_sent([alert for alert in alerts if alert.id in sent], now)
+        JobAlert.record_checked([alert for alert in alerts if alert.id not in sent], now)
+        percolator.mark_notified(sent)
+        percolator.advance(alerts, pending)
+
+
+def init_worker():
+    # Needed when the pool spawns fresh interpreters instead of forking
+    django.setup()
+    # A forked worker must open its own SMTP connections
+    mail_pool.reset_engine()
+
+
+def run_shard(shard, shards, batch_size):
+    """Process pool entry point: one shard over the worker's own connections"""
+    try:
+        return run_alerts(shard, shards, batch_size)
+    finally:
+        connections.close_all()
+
+
+def combine(results):
+    """Totals of the per-shard stats"""
+    totals = {field: sum(result[field] for result in results) for field in STAT_FIELDS}
+    totals['phases'] = {
+        name: {
+            measure: sum(result['phases'][name][measure] for result in results)
+            for measure in ('wall_seconds', 'cpu_seconds', 'queries')
+        }
+        for name in PHASES
+    }
+    # Shards send side by side, so throughput adds up across them
+    totals['emails_per_second'] = round(sum(
+        result['sent'] / result['send_seconds'] for result in results if result['send_seconds']
+    ), 1)
+    return totals
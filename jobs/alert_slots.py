@@ -0,0 +1,52 @@
+"""
+When daily and weekly alerts fall due.
+
+Each alert goes out at a stable slot in its day or week, an offset from
+midnight UTC (Monday for weekly alerts) derived from the user id. Users are
+spread evenly over the window, each keeps their slot from one send to the
+next, and all of a user's alerts fall due together to be sent as one
+digest. A preferred hour narrows the slot to that hour of the day.
+
+Nothing here touches the models, so data migrations can schedule alerts
+exactly as JobAlert does.
+"""
+from datetime import timedelta, timezone
+
+# How long after last_sent an alert falls due again
+FREQUENCY_INTERVALS = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(days=7),
+    'instant': timedelta(0),
+}
+
+
+def send_slot(user_id, frequency, preferred_hour=None):
+    """Offset of the user's slot from the start of the window, or None for
+    frequencies without slots"""
+    window = FREQUENCY_INTERVALS.get(frequency)
+    if not window:
+        return None
+    spread = (user_id * 2654435761) % 2 ** 32
+    if preferred_hour is None:
+        return timedelta(days=spread % window.days, seconds=spread % 86400)
+    return timedelta(days=spread % window.days, hours=preferred_hour, seconds=spread % 3600)
+
+
+def next_slot(since, user_id, frequency, preferred_hour=None):
+    """The first slot at least half a window after ``since``, so a late send
+    doesn't skip a window"""
+    interval = FREQUENCY_INTERVALS.get(frequency)
+    if interval is None:
+        return None
+    slot = send_slot(user_id, frequency, preferred_hour)
+    if slot is None:
+        return since + interval
+    earliest = since + interval / 2
+    # Counted from midnight UTC whatever TIME_ZONE says, as the alert form tells users
+    start = earliest.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval.days == 7:
+        start -= timedelta(days=start.weekday())
+    next_due = start + slot
+    while next_due < earliest:
+        next_due += interval
+    return next_due
@@ -0,0 +1,173 @@
+"""
+In-memory prefix index for the job search box.
+
+Every distinct title, company_name and location is stored once per word
+start ("senior python developer", "python developer", "developer") in a
+sorted array, so a prefix lookup is two bisections. Suggestions are
+ranked by how many jobs carry the value. Top results per prefix are
+memoized and only the prefixes of a changed value are dropped, which
+keeps short, busy prefixes such as "de" cheap on large corpora.
+
+The index is built with one grouped query per field and updated in place
+from Job signals. Building never happens inside a request: the first
+lookup starts a background thread that loads the index and swaps it in,
+and lookups answer from the current index (empty until the first load
+finishes). After AUTOCOMPLETE_REFRESH_SECONDS it is rebuilt the same way,
+to pick up writes made by other processes; a write that lands while a
+load is running is picked up by the next one.
+"""
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+
+from .models import Job
+from .search import tokenize
+
+FIELDS = ('title', 'company_name', 'location')
+SEPARATOR = '\x00'
+MAX_MEMOIZED_PREFIXES = 50000
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(text):
+    return ' '.join(tokenize(text))
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []        # sorted "<word-start suffix>\x00<kind>\x00<value>"
+        self._weights = {}     # (kind, value) -> number of jobs
+        self._top = {}         # memoized prefix -> results
+        self._loading = False
+        self.loaded_at = None
+
+    def _entry_keys(self, kind, value):
+        words = normalize(value).split(' ')
+        return [
+            f"{' '.join(words[start:])}{SEPARATOR}{kind}{SEPARATOR}{value}"
+            for start in range(len(words))
+        ]
+
+    def _forget_prefixes(self, kind, value):
+        for key in self._entry_keys(kind, value):
+            text = key.split(SEPARATOR, 1)[0]
+            for end in range(1, len(text) + 1):
+                self._top.pop(text[:end], None)
+
+    def _adjust(self, kind, value, delta):
+        if not value or not normalize(value):
+            return
+        entry = (kind, value)
+        weight = self._weights.get(entry, 0) + delta
+        if weight > 0:
+            if entry not in self._weights:
+                for key in self._entry_keys(kind, value):
+                    insort(self._keys, key)
+            self._weights[entry] = weight
+        elif entry in self._weights:
+            del self._weights[entry]
+            for key in self._entry_keys(kind, value):
+                position = bisect_left(self._keys, key)
+                if position < len(self._keys) and self._keys[position] == key:
+                    del self._keys[position]
+        else:
+            return
+        self._forget_prefixes(kind, value)
+
+    def load(self):
+        weights = {}
+        for field in FIELDS:
+            rows = Job.objects.values_list(field).annotate(n=Count('id')).order_by()
+            for value, count in rows:
+                if value and normalize(value):
+                    weights[(field, value)] = count
+        keys = []
+        for kind, value in weights:
+            keys.extend(self._entry_keys(kind, value))
+        keys.sort()
+        with self._lock:
+            self._weights = weights
+            self._keys = keys
+            self._top = {}
+            self.loaded_at = time.monotonic()
+
+    def _background_load(self):
+        try:
+            self.load()
+        except Exception:
+            # loaded_at is unchanged, so the next lookup tries again
+            logger.exception('Could not load the autocomplete index')
+        finally:
+            self._loading = False
+            connection.close()
+
+    def _ensure_fresh(self):
+        """Start one background load when the index is cold or stale"""
+        if self.loaded_at is not None and time.monotonic() - self.loaded_at <= settings.AUTOCOMPLETE_REFRESH_SECONDS:
+            return
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+        threading.Thread(target=self._background_load, name='autocomplete-load', daemon=True).start()
+
+    def job_saved(self, job, created):
+        if self.loaded_at is None:
+            return  # picked up by the first load
+        loaded = getattr(job, '_loaded_values', {})
+        with self._lock:
+            for field in FIELDS:
+                new_value = getattr(job, field)
+                if created:
+                    self._adjust(field, new_value, 1)
+                elif field in loaded and loaded[field] != new_value:
+                    self._adjust(field, loaded[field], -1)
+                    self._adjust(field, new_value, 1)
+
+    def job_deleted(self, job):
+        if self.loaded_at is None:
+            return
+        loaded = getattr(job, '_loaded_values', {})
+        with self._lock:
+            for field in FIELDS:
+                self._adjust(field, loaded.get(field, getattr(job, field)), -1)
+
+    def suggest(self, prefix, limit=10):
+        self._ensure_fresh()
+        prefix = normalize(prefix)
+        if len(prefix) < settings.AUTOCOMPLETE_MIN_PREFIX:
+            # Single letters match a large slice of the index and are rarely useful
+            return []
+        with self._lock:
+            top = self._top.get(prefix)
+            if top is None:
+                start = bisect_left(self._keys, prefix)
+                end = bisect_left(self._keys, prefix + '\uffff', start)
+                # One entry per value even when several of its words match
+                entries = set()
+                for key in self._keys[start:end]:
+                    _, kind, value = key.split(SEPARATOR, 2)
+                    entries.add((kind, value))
+                top = heapq.nlargest(
+                    settings.AUTOCOMPLETE_MAX_RESULTS, entries,
+                    key=lambda entry: (self._weights[entry], entry[1]),
+                )
+                top = [
+                    {'text': value, 'kind': kind, 'count': self._weights[(kind, value)]}
+                    for kind, value in top
+                ]
+                if len(self._top) >= MAX_MEMOIZED_PREFIXES:
+                    self._top.clear()
+                self._top[prefix] = top
+        return top[:limit]
+
+
+index = PrefixIndex()
@@ -0,0 +1,215 @@
+"""
+Synthetic job board corpus and measurement helpers for benchmark_search.
+
+The corpus is generated from a seeded random.Random, so the same size and
+seed always give the same users, companies and jobs, and results from
+different branches can be compared like for like.
+
+The benchmark runs against its own in-process cache, so clearing it
+between requests never touches a cache shared with production.
+"""
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import override_settings
+
+from . import facets, fuzzy, result_cache
+from .geo import gazetteer, geo_fields
+from .models import Company, Job
+from .salary import parse_salary
+from .search import get_search_backend
+
+SENIORITY = ['Junior', 'Senior', 'Lead', 'Principal', 'Graduate', 'Assistant', '']
+ROLES = [
+    'Python Developer', 'Django Developer', 'Data Analyst', 'Data Scientist',
+    'Software Engineer', 'Frontend Developer', 'DevOps Engineer', 'Accountant',
+    'Sales Representative', 'Customer Support Agent', 'Nurse', 'Teacher',
+    'Project Manager', 'Product Designer', 'Marketing Officer', 'Driver',
+    'Mobile Developer', 'Network Administrator', 'HR Officer', 'Chef',
+]
+SKILLS = [
+    'python', 'django', 'sql', 'excel', 'react', 'aws', 'linux', 'java',
+    'communication', 'leadership', 'accounting', 'kotlin', 'docker', 'sales',
+    'teaching', 'nursing', 'logistics', 'design', 'marketing', 'support',
+]
+COMPANY_WORDS = [
+    'Savannah', 'Acacia', 'Baobab', 'Rift', 'Kilima', 'Pwani', 'Lakeside',
+    'Summit', 'Jua', 'Mawingu', 'Nile', 'Equator', 'Highland', 'Coral',
+]
+COMPANY_SUFFIXES = ['Labs', 'Holdings', 'Technologies', 'Bank', 'Hospital', 'Academy', 'Logistics', 'Foods']
+SALARY_FORMATS = [
+    'KES {low:,} - {high:,} per month',
+    '${low_k}k - ${high_k}k',
+    '{low:,} monthly',
+    'USD {hourly}/hr',
+    'Negotiable',
+    '',
+]
+# Fixed so the corpus does not drift with the day the benchmark is run
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark',
+    }
+}
+
+
+def private_cache():
+    """Swap the configured caches for a private one while the block runs"""
+    return override_settings(CACHES=BENCHMARK_CACHES)
+
+
+def generate_corpus(jobs, companies, seed=0, batch_size=5000):
+    """Create the users, companies and jobs of a corpus and build the
+    search, facet and trigram indexes over them"""
+    rng = random.Random(seed)
+    places = sorted({name.title() for name in gazetteer()})
+    # A few locations the gazetteer doesn't know, as in real postings
+    places += ['Remote', 'Anywhere in East Africa', 'Head Office']
+
+    poster = User.objects.create_user('benchmark', 'benchmark@example.com', None)
+
+    company_rows = []
+    for number in range(companies):
+        name = f'{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)} {number}'
+        location = rng.choice(places)
+        latitude, longitude, geo_cell = geo_fields(location)
+        company_rows.append(Company(
+            name=name,
+            description=f'{name} is a synthetic benchmark company.',
+            location=location,
+            industry=rng.choice(Company.INDUSTRY_CHOICES)[0],
+            created_by=poster,
+            created_at=EPOCH,
+            latitude=latitude,
+            longitude=longitude,
+            geo_cell=geo_cell,
+        ))
+    Company.objects.bulk_create(company_rows, batch_size=batch_size)
+    company_rows = list(Company.objects.order_by('id'))
+
+    job_types = [value for value, _ in Job.JOB_TYPE_CHOICES]
+    batch = []
+    for number in range(jobs):
+        company = rng.choice(company_rows)
+        title = f'{rng.choice(SENIORITY)} {rng.choice(ROLES)}'.strip()
+        location = company.location if rng.random() < 0.7 else rng.choice(places)
+        low = rng.randrange(30, 400) * 1000
+        salary = rng.choice(SALARY_FORMATS).format(
+            low=low, high=low * 3 // 2, low_k=low // 1000, high_k=low * 3 // 2000, hourly=rng.randrange(10, 90),
+        )
+        skills = ', '.join(rng.sample(SKILLS, 4))
+        latitude, longitude, geo_cell = geo_fields(location)
+        salary_min, salary_max, salary_currency, salary_period = parse_salary(salary)
+        batch.append(Job(
+            title=title,
+            company=company,
+            company_name=company.name,
+            location=location,
+            description=f'{company.name} is hiring a {title} in {location}. Skills: {skills}.',
+            salary=salary,
+            job_type=rng.choice(job_types),
+            date_posted=EPOCH - timedelta(minutes=rng.randrange(0, 365 * 24 * 60)),
+            posted_by=poster,
+            latitude=latitude,
+            longitude=longitude,
+            geo_cell=geo_cell,
+            salary_min=salary_min,
+            salary_max=salary_max,
+            salary_currency=salary_currency,
+            salary_period=salary_period,
+        ))
+        if len(batch) >= batch_size:
+            Job.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Job.objects.bulk_create(batch)
+
+    # bulk_create skips the signals that keep these up to date
+    get_search_backend().rebuild()
+    facets.rebuild()
+    fuzzy.rebuild()
+    result_cache.bump_generation()
+
+
+def percentile(samples, percent):
+    """Nearest-rank percentile of a list of numbers"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies_ms):
+    return {
+        'runs': len(latencies_ms),
+        'p50_ms': round(percentile(latencies_ms, 50), 2),
+        'p95_ms': round(percentile(latencies_ms, 95), 2),
+        'p99_ms': round(percentile(latencies_ms, 99), 2),
+        'mean_ms': round(sum(latencies_ms) / len(latencies_ms), 2),
+    }
+
+
+class RowCounter:
+    """Rows read by the database while the block runs, where the backend
+    exposes it: MySQL's Handler_read_* session counters or PostgreSQL's
+    per-transaction table statistics. SQLite has no such counter, so it
+    reports the number of virtual machine steps instead (``vm_steps``).
+    """
+    SQLITE_STEP = 1000
+
+    def __init__(self):
+        self.rows = None
+        self.vm_steps = None
+
+    def _mysql_reads(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW SESSION STATUS LIKE 'Handler_read%'")
+            return sum(int(value) for _, value in cursor.fetchall())
+
+    def _postgresql_reads(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT COALESCE(SUM(seq_tup_read + COALESCE(idx_tup_fetch, 0)), 0) '
+                'FROM pg_stat_xact_user_tables'
+            )
+            return int(cursor.fetchone()[0])
+
+    def _count_step(self):
+        self._steps += self.SQLITE_STEP
+        return 0
+
+    def __enter__(self):
+        connection.ensure_connection()
+        if connection.vendor == 'mysql':
+            self._start = self._mysql_reads()
+        elif connection.vendor == 'postgresql':
+            self._start = self._postgresql_reads()
+        elif connection.vendor == 'sqlite':
+            self._steps = 0
+            connection.connection.set_progress_handler(self._count_step, self.SQLITE_STEP)
+        return self
+
+    def __exit__(self, *exc_info):
+        if connection.vendor == 'mysql':
+            self.rows = self._mysql_reads() - self._start
+        elif connection.vendor == 'postgresql':
+            self.rows = self._postgresql_reads() - self._start
+        elif connection.vendor == 'sqlite':
+            connection.connection.set_progress_handler(None, 0)
+            self.vm_steps = self._steps
+
+
+class Timer:
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed_ms = (time.perf_counter() - self._start) * 1000
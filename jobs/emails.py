@@ -4,8 +4,12 @@ from django.utils.html import strip_tags
 from django.conf import settings
 from django.urls import reverse
 
+from . import outbox
+from .job_cards import CardRenderer
+
 def send_new_application_email(application):
-    """Send email to employer when someone applies to their job"""
+    """Queue an email to the employer when someone applies to their job.
+    Call it inside the transaction that saves the application."""
     employer = application.job.posted_by
     job = application.job
     
@@ -32,14 +36,12 @@ def send_new_application_email(application):
     )
     email.attach_alternative(html_message, "text/html")
     
-    # Attach resume if needed
-    if application.resume:
-        email.attach_file(application.resume.path)
-    
-    email.send()
+    # The resume is attached by process_outbox, not read during the request
+    attachments = [application.resume.path] if application.resume else []
+    outbox.enqueue(email, attachments)
 
 def send_application_status_email(application, old_status):
-    """Send email to applicant when their application status changes"""
+    """Queue an email to the applicant when their application status changes"""
     if application.status == old_status:
         return  # No change
     
@@ -69,29 +71,48 @@ def send_application_status_email(application, old_status):
         to=[application.email],
     )
     email.attach_alternative(html_message, "text/html")
-    email.send()
+    outbox.enqueue(email)
 
-def send_job_alert_email(alert, matching_jobs):
-    """Send email with new job matches for a job alert"""
-    if not matching_jobs:
-        return
-    
-    user = alert.user
-    
-    subject = f"New Jobs Matching Your Alert: {alert.name}"
+def build_job_alert_email(alert, matching_jobs, cards=None):
+    """The alert email, ready to hand to the delivery engine"""
+    return build_digest_email(alert.user, [(alert, matching_jobs)], cards)
+
+def build_digest_email(user, alert_jobs, cards=None):
+    """One email for all of a user's due alerts, given as (alert, jobs)
+    pairs. A job matched by several alerts is listed once, under the first.
+    Pass one CardRenderer for a whole run so each job is rendered once."""
+    cards = cards or CardRenderer()
+    seen = set()
+    sections = []
+    for alert, jobs in alert_jobs:
+        jobs = [job for job in jobs if job.id not in seen]
+        if not jobs:
+            continue
+        seen.update(job.id for job in jobs)
+        shown = jobs[:5]  # Limit to 5 jobs per alert
+        sections.append({
+            'alert_name': alert.name,
+            'jobs_count': len(jobs),
+            'html_cards': cards.html_cards(shown),
+            'text_cards': cards.text_cards(shown),
+            'unsubscribe_url': settings.SITE_URL + reverse('toggle_job_alert', args=[alert.id]),
+        })
+    
+    if len(sections) == 1:
+        subject = f"New Jobs Matching Your Alert: {sections[0]['alert_name']}"
+    else:
+        subject = f"{len(seen)} New Jobs Matching Your Alerts"
     
     context = {
         'user_name': user.get_full_name() or user.username,
-        'alert_name': alert.name,
-        'jobs_count': len(matching_jobs),
-        'jobs': matching_jobs[:5],  # Limit to 5 jobs in email
+        'jobs_count': len(seen),
+        'sections': sections,
         'alert_management_url': settings.SITE_URL + reverse('job_alerts'),
         'browse_jobs_url': settings.SITE_URL + reverse('job_list'),
-        'unsubscribe_url': settings.SITE_URL + reverse('toggle_job_alert', args=[alert.id]),
     }
     
     html_message = render_to_string('emails/job_alert_matches.html', context)
-    plain_message = strip_tags(html_message)
+    plain_message = render_to_string('emails/job_alert_matches.txt', context)
     
     email = EmailMultiAlternatives(
         subject=subject,
@@ -100,9 +121,4 @@ def send_job_alert_email(alert, matching_jobs):
         to=[user.email],
     )
     email.attach_alternative(html_message, "text/html")
-    email.send()
-    
-    # Update last_sent timestamp
-    from django.utils import timezone
-    alert.last_sent = timezone.now()
-    alert.save()
\ No newline at end of file
+    return email
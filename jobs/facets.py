@@ -0,0 +1,116 @@
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F
+
+from .models import Job, JobFacet
+
+FACET_FIELDS = ('job_type', 'location')
+
+
+def _adjust(facet, value, delta):
+    if value is None:
+        return
+    counts = JobFacet.objects.filter(facet=facet, value=value)
+    if delta > 0:
+        if counts.update(count=F('count') + delta):
+            return
+        try:
+            with transaction.atomic():
+                JobFacet.objects.create(facet=facet, value=value, count=delta)
+        except IntegrityError:
+            # Another request created the row first
+            counts.update(count=F('count') + delta)
+    else:
+        counts.filter(count__gt=0).update(count=F('count') + delta)
+        counts.filter(count__lte=0).delete()
+
+
+def job_saved(job, created):
+    """Move the job's facet counts from its stored values to its new ones"""
+    if created:
+        for facet in FACET_FIELDS:
+            _adjust(facet, getattr(job, facet), 1)
+        return
+
+    loaded = getattr(job, '_loaded_values', {})
+    for facet in FACET_FIELDS:
+        if facet not in loaded:
+            continue
+        old_value, new_value = loaded[facet], getattr(job, facet)
+        if old_value != new_value:
+            _adjust(facet, old_value, -1)
+            _adjust(facet, new_value, 1)
+
+
+def job_deleted(job):
+    loaded = getattr(job, '_loaded_values', {})
+    for facet in FACET_FIELDS:
+        _adjust(facet, loaded.get(facet, getattr(job, facet)), -1)
+
+
+def rebuild():
+    """Recount every facet from the jobs table"""
+    with transaction.atomic():
+        JobFacet.objects.all().delete()
+        facets = []
+        for facet in FACET_FIELDS:
+            for row in Job.objects.values(facet).annotate(n=Count('id')).order_by():
+                facets.append(JobFacet(facet=facet, value=row[facet], count=row['n']))
+        JobFacet.objects.bulk_create(facets)
+
+
+def global_counts():
+    """Counts over all jobs, read from the facet store"""
+    counts = {facet: {} for facet in FACET_FIELDS}
+    for facet, value, count in JobFacet.objects.values_list('facet', 'value', 'count'):
+        counts[facet][value] = count
+    return counts
+
+
+def result_counts(queryset, facet, limit):
+    """Counts of one facet within a filtered result set.
+
+    One grouped query over at most ``limit`` matching rows, so a broad
+    search costs no more than the capped total of SearchExecutor. Returns
+    the counts and whether the cap was hit, in which case they are lower
+    bounds.
+    """
+    sample = queryset.order_by().values_list(facet, flat=True)[:limit + 1]
+    sql, params = sample.query.sql_with_params()
+    column = connection.ops.quote_name(facet)
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT {column}, COUNT(*) FROM ({sql}) matches GROUP BY {column}', params)
+        counts = dict(cursor.fetchall())
+    return counts, sum(counts.values()) > limit
+
+
+def sidebar(facet_queryset, selected_location='', location_limit=50, count_limit=10000):
+    """Options and counts for the job_list filter sidebar.
+
+    The options always come from the facet store so every filter stays
+    selectable. facet_queryset(facet) returns the results filtered by
+    everything except that facet's own filter, or None when nothing else
+    is active and the stored global counts apply. So picking a job type
+    still shows how many jobs each other job type has.
+    """
+    store = global_counts()
+    counts = {}
+    capped = False
+    for facet in FACET_FIELDS:
+        queryset = facet_queryset(facet)
+        if queryset is None:
+            counts[facet] = store[facet]
+        else:
+            counts[facet], facet_capped = result_counts(queryset, facet, count_limit)
+            capped = capped or facet_capped
+
+    job_types = [
+        (value, label, counts['job_type'].get(value, 0))
+        for value, label in Job.JOB_TYPE_CHOICES
+    ]
+
+    locations = sorted(store['location'], key=lambda value: (-counts['location'].get(value, 0), value))
+    locations = locations[:location_limit]
+    if selected_location and selected_location not in locations:
+        locations.append(selected_location)
+    locations = [(value, counts['location'].get(value, 0)) for value in locations]
+    return job_types, locations, capped
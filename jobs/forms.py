@@ -1,4 +1,6 @@
 from django import forms
+from django.conf import settings
+from .geo import geocode
 from .models import Job, Application, UserProfile, JobAlert, Company
 
 class JobForm(forms.ModelForm):
@@ -10,7 +12,7 @@ class JobForm(forms.ModelForm):
             'title': forms.TextInput(attrs={'class': 'form-control'}),
             'company_name': forms.TextInput(attrs={'class': 'form-control'}),  # Use company_name instead
             'location': forms.TextInput(attrs={'class': 'form-control'}),
-            'salary': forms.NumberInput(attrs={'class': 'form-control'}),
+            'salary': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g. KES 80,000 - 120,000 per month'}),
             'job_type': forms.Select(attrs={'class': 'form-control'}),
         }
 
@@ -37,7 +39,7 @@ class UserProfileForm(forms.ModelForm):
 class JobAlertForm(forms.ModelForm):
     class Meta:
         model = JobAlert
-        fields = ['name', 'keywords', 'location', 'job_type', 'frequency']
+        fields = ['name', 'keywords', 'location', 'radius_km', 'job_type', 'frequency', 'preferred_hour']
         widgets = {
             'name': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -52,8 +54,14 @@ class JobAlertForm(forms.ModelForm):
                 'class': 'form-control',
                 'placeholder': 'e.g., Nairobi, Remote, Kenya'
             }),
+            'radius_km': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'placeholder': 'e.g., 25',
+                'min': 1,
+            }),
             'job_type': forms.Select(attrs={'class': 'form-control'}),
             'frequency': forms.Select(attrs={'class': 'form-control'}),
+            'preferred_hour': forms.Select(attrs={'class': 'form-control'}),
         }
         help_texts = {
             'keywords': 'Enter relevant keywords separated by commas',
@@ -69,6 +77,19 @@ class JobAlertForm(forms.ModelForm):
                 raise forms.ValidationError("Please enter at least one keyword")
         return keywords
 
+    def clean_radius_km(self):
+        radius_km = self.cleaned_data.get('radius_km')
+        if radius_km and radius_km > settings.GEO_MAX_RADIUS_KM:
+            raise forms.ValidationError(f"Radius can be at most {settings.GEO_MAX_RADIUS_KM} km")
+        return radius_km
+
+    def clean(self):
+        cleaned_data = super().clean()
+        location = cleaned_data.get('location')
+        if cleaned_data.get('radius_km') and location and geocode(location) is None:
+            self.add_error('location', "We don't know where this place is, so it can't be used with a radius")
+        return cleaned_data
+
 class CompanyForm(forms.ModelForm):
     class Meta:
         model = Company
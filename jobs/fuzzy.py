@@ -0,0 +1,215 @@
+"""
+Typo-tolerant matching with a trigram index.
+
+Words from Job.title, Job.company_name, Job.location and Company.name are
+stored as SearchTerm rows, each with its set of trigrams in SearchTrigram.
+A misspelt word is looked up by its own trigrams (an index range scan on
+the gram column, never a scan of jobs or companies) and scored with the
+same similarity as PostgreSQL's pg_trgm:
+
+    shared / (grams(a) + grams(b) - shared)
+"""
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Company, Job, SearchTerm, SearchTrigram
+from .search import tokenize
+
+JOB_FIELDS = ('title', 'company_name', 'location')
+COMPANY_FIELDS = ('company',)
+MAX_TERM_LENGTH = 100
+
+
+def trigrams(text):
+    """pg_trgm style trigrams: each word padded with two leading spaces
+    and one trailing space"""
+    grams = set()
+    for word in tokenize(text):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _words(text):
+    return {word for word in tokenize(text) if 2 <= len(word) <= MAX_TERM_LENGTH}
+
+
+def _add_terms(field, words, company=None):
+    for word in words:
+        term, created = SearchTerm.objects.get_or_create(
+            field=field, term=word, defaults={'gram_count': len(trigrams(word))},
+        )
+        if created:
+            SearchTrigram.objects.bulk_create(
+                [SearchTrigram(term=term, gram=gram) for gram in trigrams(word)]
+            )
+        SearchTerm.objects.filter(pk=term.pk).update(doc_count=F('doc_count') + 1)
+        if company is not None:
+            term.companies.add(company)
+
+
+def _remove_terms(field, words, company=None):
+    if not words:
+        return
+    terms = SearchTerm.objects.filter(field=field, term__in=words)
+    if company is not None:
+        for term in terms:
+            term.companies.remove(company)
+    terms.filter(doc_count__gt=0).update(doc_count=F('doc_count') - 1)
+    # Trigrams go with the term through the cascade
+    terms.filter(doc_count=0).delete()
+
+
+def _sync(field, old_text, new_text, company=None):
+    old_words, new_words = _words(old_text), _words(new_text)
+    _remove_terms(field, old_words - new_words, company)
+    _add_terms(field, new_words - old_words, company)
+
+
+def job_saved(job, created):
+    loaded = {} if created else getattr(job, '_loaded_values', None)
+    if loaded is None:
+        return
+    with transaction.atomic():
+        for field in JOB_FIELDS:
+            if created or field in loaded:
+                _sync(field, loaded.get(field), getattr(job, field))
+
+
+def job_deleted(job):
+    loaded = getattr(job, '_loaded_values', {})
+    with transaction.atomic():
+        for field in JOB_FIELDS:
+            _sync(field, loaded.get(field, getattr(job, field)), '')
+
+
+def company_saved(company, created):
+    loaded = {} if created else getattr(company, '_loaded_values', None)
+    if loaded is None or (not created and 'name' not in loaded):
+        return
+    with transaction.atomic():
+        _sync('company', loaded.get('name'), company.name, company)
+
+
+def company_deleted(company):
+    # The company's rows in the companies M2M are already gone at this point
+    loaded = getattr(company, '_loaded_values', {})
+    _remove_terms('company', _words(loaded.get('name', company.name)))
+
+
+def rebuild():
+    """Re-index every job and company word from scratch"""
+    with transaction.atomic():
+        SearchTerm.objects.all().delete()
+        for field in JOB_FIELDS:
+            counts = {}
+            for value in Job.objects.values_list(field, flat=True).iterator():
+                for word in _words(value):
+                    counts[word] = counts.get(word, 0) + 1
+            _bulk_create(field, counts)
+
+        companies_by_word = {}
+        for company in Company.objects.only('id', 'name').iterator():
+            for word in _words(company.name):
+                companies_by_word.setdefault(word, []).append(company.pk)
+        terms = _bulk_create('company', {word: len(ids) for word, ids in companies_by_word.items()})
+        through = SearchTerm.companies.through
+        through.objects.bulk_create([
+            through(searchterm_id=terms[word], company_id=company_id)
+            for word, ids in companies_by_word.items()
+            for company_id in ids
+        ], batch_size=1000)
+
+
+def _bulk_create(field, counts):
+    SearchTerm.objects.bulk_create([
+        SearchTerm(field=field, term=word, gram_count=len(trigrams(word)), doc_count=count)
+        for word, count in counts.items()
+    ], batch_size=1000)
+    terms = dict(SearchTerm.objects.filter(field=field).values_list('term', 'id'))
+    SearchTrigram.objects.bulk_create([
+        SearchTrigram(term_id=terms[word], gram=gram)
+        for word in counts
+        for gram in trigrams(word)
+    ], batch_size=1000)
+    return terms
+
+
+def similar_terms(word, fields, threshold=None, limit=5):
+    """Indexed words similar to ``word``, best first, as (term, similarity, doc_count)"""
+    if threshold is None:
+        threshold = settings.FUZZY_SIMILARITY_THRESHOLD
+    grams = trigrams(word)
+    if not grams:
+        return []
+    # A term can only reach the threshold if it shares at least this many grams
+    min_shared = max(1, math.ceil(threshold * len(grams)))
+    rows = (
+        SearchTrigram.objects
+        .filter(gram__in=grams, term__field__in=fields)
+        .values('term', 'term__term', 'term__gram_count', 'term__doc_count')
+        .annotate(shared=Count('id'))
+        .filter(shared__gte=min_shared)
+        .order_by()
+    )
+    best = {}
+    for row in rows:
+        shared = row['shared']
+        score = shared / (len(grams) + row['term__gram_count'] - shared)
+        term = row['term__term']
+        if score >= threshold and term != word:
+            doc_count = best.get(term, (0, 0))[1] + row['term__doc_count']
+            best[term] = (score, doc_count)
+    ranked = sorted(best.items(), key=lambda item: (-item[1][0], -item[1][1], item[0]))
+    return [(term, score, doc_count) for term, (score, doc_count) in ranked[:limit]]
+
+
+def did_you_mean(query, fields):
+    """The query with unknown words replaced by their closest indexed word,
+    or '' when there is nothing to correct"""
+    words = tokenize(query)
+    if not words:
+        return ''
+    known = set(
+        SearchTerm.objects.filter(field__in=fields, term__in=words).values_list('term', flat=True)
+    )
+    corrected = []
+    changed = False
+    for word in words:
+        if word not in known and len(word) >= 3:
+            matches = similar_terms(word, fields, limit=1)
+            if matches:
+                corrected.append(matches[0][0])
+                changed = True
+                continue
+        corrected.append(word)
+    return ' '.join(corrected) if changed else ''
+
+
+def search_companies(queryset, query):
+    """Companies whose name has a word starting with each query word.
+
+    A word that matches nothing is replaced by its closest indexed company
+    word. Returns the filtered queryset and the corrected query, or '' if
+    no correction was needed.
+    """
+    corrected = []
+    changed = False
+    for word in tokenize(query):
+        term_ids = list(
+            SearchTerm.objects.filter(field='company', term__startswith=word).values_list('id', flat=True)
+        )
+        if not term_ids:
+            matches = similar_terms(word, COMPANY_FIELDS, limit=1)
+            if matches:
+                word = matches[0][0]
+                changed = True
+                term_ids = list(
+                    SearchTerm.objects.filter(field='company', term=word).values_list('id', flat=True)
+                )
+        corrected.append(word)
+        queryset = queryset.filter(search_terms__in=term_ids)
+    return queryset.distinct(), (' '.join(corrected) if changed else '')
@@ -0,0 +1,118 @@
+"""
+Geocoding and radius search for job and company locations.
+
+Free-text locations are resolved against a local gazetteer CSV
+(settings.GEO_GAZETTEER_PATH) and stored as latitude/longitude plus a
+grid cell number. The grid splits the globe into GEO_GRID_DEGREES
+squares, so a radius query first narrows to the handful of cells that
+overlap the circle (an indexed IN lookup on geo_cell) and only then
+computes exact great-circle distances for the rows in those cells.
+"""
+import csv
+import math
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ACos, Cos, Least, Radians, Sin
+
+from .search import tokenize
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+@lru_cache(maxsize=None)
+def gazetteer():
+    """Normalized place name or alias -> (latitude, longitude)"""
+    places = {}
+    with open(settings.GEO_GAZETTEER_PATH, newline='', encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            point = (float(row['latitude']), float(row['longitude']))
+            names = [row['name']] + [alias for alias in row['aliases'].split('|') if alias]
+            for name in names:
+                places.setdefault(' '.join(tokenize(name)), point)
+    return places
+
+
+def geocode(location):
+    """(latitude, longitude) of the longest known place name in ``location``,
+    or None. "Westlands, Nairobi" resolves to Westlands."""
+    words = tokenize(location)
+    places = gazetteer()
+    for size in range(min(len(words), 4), 0, -1):
+        for start in range(len(words) - size + 1):
+            point = places.get(' '.join(words[start:start + size]))
+            if point:
+                return point
+    return None
+
+
+def _grid_columns():
+    return math.ceil(360 / settings.GEO_GRID_DEGREES)
+
+
+def grid_cell(latitude, longitude):
+    size = settings.GEO_GRID_DEGREES
+    row = math.floor((latitude + 90) / size)
+    column = math.floor((longitude + 180) / size) % _grid_columns()
+    return row * _grid_columns() + column
+
+
+def geo_fields(location):
+    """Values for the latitude, longitude and geo_cell columns"""
+    point = geocode(location)
+    if point is None:
+        return None, None, None
+    return point[0], point[1], grid_cell(*point)
+
+
+def cells_within(latitude, longitude, radius_km):
+    """Grid cells overlapping the bounding box of a circle"""
+    size = settings.GEO_GRID_DEGREES
+    columns = _grid_columns()
+    lat_delta = radius_km / KM_PER_DEGREE
+    south = max(-90.0, latitude - lat_delta)
+    north = min(90.0 - 1e-9, latitude + lat_delta)
+    # Longitude degrees shrink towards the poles; near them take every column
+    widest_lat = min(89.0, max(abs(south), abs(north)))
+    lng_delta = radius_km / (KM_PER_DEGREE * math.cos(math.radians(widest_lat)))
+
+    first_row = math.floor((south + 90) / size)
+    last_row = math.floor((north + 90) / size)
+    if lng_delta >= 180:
+        column_range = range(columns)
+    else:
+        first_column = math.floor((longitude - lng_delta + 180) / size)
+        last_column = math.floor((longitude + lng_delta + 180) / size)
+        column_range = {column % columns for column in range(first_column, last_column + 1)}
+    return [row * columns + column for row in range(first_row, last_row + 1) for column in column_range]
+
+
+def distance_expression(latitude, longitude):
+    """Great-circle distance in km from a point to each row, as a DB expression"""
+    lat = Value(math.radians(latitude), output_field=FloatField())
+    lng = Value(math.radians(longitude), output_field=FloatField())
+    cosine = (
+        Sin(lat) * Sin(Radians(F('latitude')))
+        + Cos(lat) * Cos(Radians(F('latitude'))) * Cos(Radians(F('longitude')) - lng)
+    )
+    # Rounding can push the cosine a hair above 1 for identical points
+    return EARTH_RADIUS_KM * ACos(Least(cosine, Value(1.0)))
+
+
+def within_radius(queryset, latitude, longitude, radius_km):
+    """Rows of a Job or Company queryset within ``radius_km`` of a point,
+    annotated with ``distance_km``"""
+    return queryset.filter(
+        geo_cell__in=cells_within(latitude, longitude, radius_km),
+    ).annotate(
+        distance_km=distance_expression(latitude, longitude),
+    ).filter(distance_km__lte=radius_km)
+
+
+def distance_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points, in Python"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    cosine = math.sin(lat1) * math.sin(lat2) + math.cos(lat1) * math.cos(lat2) * math.cos(lng2 - lng1)
+    return EARTH_RADIUS_KM * math.acos(min(cosine, 1.0))
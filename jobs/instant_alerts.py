@@ -0,0 +1,120 @@
+"""
+Real-time delivery of "instant" job alerts.
+
+Creating a job records its alert matches (jobs.percolator) and pushes the
+job onto JobQueueEntry, in the same transaction. process_instant_alerts
+polls that table and takes the queued jobs in micro-batches. For each
+batch it looks up the instant alerts those jobs matched, by job id, and
+emails them. No alert is scanned that didn't match a queued job.
+
+Entries are leased with SELECT ... FOR UPDATE SKIP LOCKED like the email
+outbox, so several consumers can share the queue. A batch whose email
+failed is retried with the outbox's backoff. After OUTBOX_MAX_ATTEMPTS the
+entry is kept with status "failed" for someone to look at, and its
+matches stay pending for the alert's next email.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import mail_pool, outbox, percolator
+from .emails import build_digest_email
+from .job_cards import CardRenderer
+from .models import AlertMatch, JobAlert, JobQueueEntry
+
+
+def enqueue(job):
+    return JobQueueEntry.objects.create(job=job)
+
+
+def claim(batch_size):
+    now = timezone.now()
+    with transaction.atomic():
+        entries = list(
+            JobQueueEntry.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending', available_at__lte=now)
+            .order_by('available_at', 'id')[:batch_size]
+        )
+        JobQueueEntry.objects.filter(id__in=[entry.id for entry in entries]).update(
+            available_at=now + timedelta(seconds=settings.OUTBOX_CLAIM_SECONDS),
+        )
+    return entries
+
+
+def matched_alerts(job_ids):
+    """Active instant alerts with unsent matches among the given jobs"""
+    alert_ids = AlertMatch.objects.filter(
+        job_id__in=job_ids, notified_at__isnull=True,
+    ).values('alert_id')
+    return list(
+        JobAlert.objects
+        .filter(id__in=alert_ids, is_active=True, frequency='instant')
+        .select_related('user')
+    )
+
+
+def process(batch_size=None, log=None):
+    """Notify the instant alerts matched by one batch of queued jobs"""
+    entries = claim(batch_size or settings.INSTANT_ALERT_BATCH_SIZE)
+    stats = {'jobs': len(entries), 'emails': 0, 'sent': 0, 'failed': 0}
+    if not entries:
+        return stats
+
+    alerts = matched_alerts([entry.job_id for entry in entries])
+    # Every pending match of the alert goes out, so one that failed earlier is retried too
+    pending = percolator.pending_jobs(alerts)
+    alerts_by_user = {}
+    for alert in alerts:
+        if pending[alert.id]:
+            alerts_by_user.setdefault(alert.user_id, []).append(alert)
+    # A user whose alerts matched the same jobs gets one email
+    cards = CardRenderer()
+    emails = {
+        user_id: build_digest_email(user_alerts[0].user, [(alert, pending[alert.id]) for alert in user_alerts], cards)
+        for user_id, user_alerts in alerts_by_user.items()
+    }
+    report = mail_pool.get_engine().send(emails.values())
+    failures = {id(message): error for message, error in report.failed}
+
+    sent = {}
+    failed_jobs = {}
+    for user_id, user_alerts in alerts_by_user.items():
+        user = user_alerts[0].user
+        jobs = {job.id for alert in user_alerts for job in pending[alert.id]}
+        error = failures.get(id(emails[user_id]))
+        if error is not None:
+            failed_jobs.update(dict.fromkeys(jobs, f'{type(error).__name__}: {error}'))
+            if log:
+                log('error', f'Failed to send instant alerts to {user.username}: {error}')
+            continue
+        for alert in user_alerts:
+            sent[alert.id] = pending[alert.id]
+        if log:
+            log('success', f'Sent instant alerts to {user.username} with {len(jobs)} jobs')
+    stats.update(emails=len(emails), sent=len(emails) - len(report.failed), failed=len(report.failed))
+
+    now = timezone.now()
+    JobAlert.record_sent([alert for alert in alerts if alert.id in sent], now)
+    percolator.mark_notified(sent)
+
+    retry = [entry for entry in entries if entry.job_id in failed_jobs]
+    JobQueueEntry.objects.filter(id__in=[entry.id for entry in entries if entry not in retry]).delete()
+    for entry in retry:
+        attempts = entry.attempts + 1
+        update = {'attempts': attempts, 'last_error': failed_jobs[entry.job_id]}
+        if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            update['status'] = 'failed'
+        else:
+            update['available_at'] = now + outbox.retry_delay(attempts)
+        JobQueueEntry.objects.filter(id=entry.id).update(**update)
+    return stats
+
+
+def retry_failed():
+    """Give failed entries a fresh set of attempts"""
+    return JobQueueEntry.objects.filter(status='failed').update(
+        status='pending', attempts=0, available_at=timezone.now(),
+    )
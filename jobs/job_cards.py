@@ -0,0 +1,71 @@
+"""
+Pre-rendered job cards for alert digests.
+
+A popular job appears in thousands of digests, so each job's HTML and
+plain-text card is rendered once and kept in the cache under the job's id
+until the job is saved or deleted (see signals). A digest is the small
+per-recipient header and footer around those fragments. The text part
+comes from its own template instead of strip_tags over the whole HTML.
+
+CardRenderer also remembers the cards it has handed out, so a run reads
+each job from the cache at most once. Like the result cache, this needs a
+shared cache backend to see edits made by other processes.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.safestring import mark_safe
+
+# Bumped when the card templates change, so cards rendered from the old ones aren't reused
+KEY_PREFIX = 'jobcard:v2'
+
+
+def card_key(job_id):
+    return f'{KEY_PREFIX}:{job_id}'
+
+
+def render_card(job):
+    """(html, text) card of a job; the same for every recipient"""
+    context = {
+        'job': job,
+        'job_url': settings.SITE_URL + reverse('job_detail', args=[job.id]),
+        'apply_url': settings.SITE_URL + reverse('apply_job', args=[job.id]),
+    }
+    return (
+        render_to_string('emails/job_card.html', context).strip(),
+        render_to_string('emails/job_card.txt', context).strip(),
+    )
+
+
+class CardRenderer:
+    def __init__(self):
+        self._cards = {}
+        self.rendered = 0
+
+    def cards(self, jobs):
+        """(html, text) cards of the jobs, in order"""
+        missing = list({job.id: job for job in jobs if job.id not in self._cards}.values())
+        if missing:
+            cached = cache.get_many([card_key(job.id) for job in missing])
+            fresh = {}
+            for job in missing:
+                card = cached.get(card_key(job.id))
+                if card is None:
+                    card = fresh[card_key(job.id)] = render_card(job)
+                    self.rendered += 1
+                self._cards[job.id] = card
+            if fresh:
+                cache.set_many(fresh, settings.JOB_CARD_CACHE_TIMEOUT)
+        return [self._cards[job.id] for job in jobs]
+
+    def html_cards(self, jobs):
+        # Rendered by our own autoescaping template
+        return [mark_safe(html) for html, _ in self.cards(jobs)]
+
+    def text_cards(self, jobs):
+        return [text for _, text in self.cards(jobs)]
+
+
+def job_changed(job):
+    cache.delete(card_key(job.pk))
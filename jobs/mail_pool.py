@@ -0,0 +1,238 @@
+"""
+Pooled delivery of outbound mail.
+
+DeliveryEngine keeps up to MAIL_POOL_CONNECTIONS connections of the real
+backend (MAIL_POOL_BACKEND, normally SMTP) open for the life of the
+process. Messages are grouped by recipient domain and cut into batches of
+MAIL_POOL_BATCH_SIZE. The batches are sent concurrently, each over one
+pooled connection. Each domain is held to MAIL_DOMAIN_RATE messages a
+second, so a burst of alerts doesn't get the relay throttled by one big
+provider. A pooled connection the server has dropped is reopened and the
+message retried, but only when the failure came before DATA; after that
+the server may have accepted the message, so it is reported as failed
+rather than risk sending it twice.
+
+Setting EMAIL_BACKEND to PooledEmailBackend routes every EmailMessage.send()
+in the project through the shared engine. Bulk senders call
+get_engine().send() directly to get a result for each message, or
+get_engine().deliver() to get each result as soon as the message is out.
+"""
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+
+def recipient_domain(message):
+    recipients = message.recipients()
+    return recipients[0].rsplit('@', 1)[-1].lower() if recipients else ''
+
+
+class DomainThrottle:
+    """Spaces out sends so each domain gets at most ``rate`` messages a second"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._next = {}
+
+    def acquire(self, domain):
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next.get(domain, now))
+            self._next[domain] = start + 1 / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+
+def watch_data(smtp):
+    """Start tracking, for the next message sent over smtp, whether the
+    DATA command has been issued yet"""
+    if not hasattr(smtp, 'data_started'):
+        send_data = smtp.data
+
+        def data(msg):
+            smtp.data_started = True
+            return send_data(msg)
+
+        smtp.data = data
+    smtp.data_started = False
+
+
+def close_quietly(connection):
+    """Close a connection whose server has gone away. QUIT can fail on the
+    dead socket; the backend forgets the connection either way."""
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+class DeliveryReport:
+    def __init__(self, sent, failed, seconds):
+        self.sent = sent
+        self.failed = failed        # [(message, exception)]
+        self.seconds = seconds
+
+    @property
+    def per_second(self):
+        return round(self.sent / self.seconds, 1) if self.seconds else 0.0
+
+    def as_dict(self):
+        return {
+            'sent': self.sent,
+            'failed': len(self.failed),
+            'seconds': round(self.seconds, 3),
+            'emails_per_second': self.per_second,
+        }
+
+
+def delivery_backend():
+    """The backend that really delivers: MAIL_POOL_BACKEND behind the pool,
+    or EMAIL_BACKEND itself when something else is configured (such as the
+    locmem backend during tests)"""
+    if settings.EMAIL_BACKEND == f'{__name__}.PooledEmailBackend':
+        return settings.MAIL_POOL_BACKEND
+    return settings.EMAIL_BACKEND
+
+
+class DeliveryEngine:
+    def __init__(self, backend=None, connections=None, batch_size=None, domain_rate=None, **connection_options):
+        self.backend = backend or delivery_backend()
+        self.connection_options = connection_options
+        self.size = connections or settings.MAIL_POOL_CONNECTIONS
+        self.batch_size = batch_size or settings.MAIL_POOL_BATCH_SIZE
+        self.throttle = DomainThrottle(settings.MAIL_DOMAIN_RATE if domain_rate is None else domain_rate)
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self.size:
+                connection = get_connection(self.backend, fail_silently=False, **self.connection_options)
+                self._all.append(connection)
+                return connection
+        return self._idle.get()
+
+    def _send_one(self, connection, message):
+        connection.open()
+        smtp = getattr(connection, 'connection', None)
+        if isinstance(smtp, smtplib.SMTP):
+            watch_data(smtp)
+        try:
+            connection.send_messages([message])
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # The server dropped the pooled connection since it was last used.
+            # That is only safe to retry if DATA was never reached: after it
+            # the server may already have accepted the message.
+            if not isinstance(smtp, smtplib.SMTP) or smtp.data_started:
+                raise
+            close_quietly(connection)
+            connection.open()
+            connection.send_messages([message])
+
+    def _send_batch(self, batch, report):
+        """Send one batch over a single pooled connection, calling
+        report((message, exception or None)) after each message"""
+        domain = recipient_domain(batch[0])
+        try:
+            connection = self._checkout()
+        except Exception as e:
+            for message in batch:
+                report((message, e))
+            return
+        try:
+            # One message at a time on the open connection, so a bad address
+            # fails alone and nothing is sent twice
+            for message in batch:
+                self.throttle.acquire(domain)
+                try:
+                    self._send_one(connection, message)
+                except Exception as e:
+                    report((message, e))
+                else:
+                    report((message, None))
+        finally:
+            self._idle.put(connection)
+
+    def batches(self, messages):
+        by_domain = {}
+        for message in messages:
+            by_domain.setdefault(recipient_domain(message), []).append(message)
+        for domain_messages in by_domain.values():
+            for start in range(0, len(domain_messages), self.batch_size):
+                yield domain_messages[start:start + self.batch_size]
+
+    def deliver(self, messages):
+        """Deliver messages over the pool, yielding (message, exception or
+        None) as each one completes, so the caller can record a message as
+        sent before the rest are out"""
+        messages = list(messages)
+        if not messages:
+            return
+        results = queue.SimpleQueue()
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            batches = [executor.submit(self._send_batch, batch, results.put) for batch in self.batches(messages)]
+            for _ in messages:
+                yield results.get()
+            for batch in batches:
+                batch.result()
+
+    def send(self, messages):
+        """Deliver messages over the pool and report what got through"""
+        messages = list(messages)
+        started = time.perf_counter()
+        failed = [(message, error) for message, error in self.deliver(messages) if error is not None]
+        return DeliveryReport(len(messages) - len(failed), failed, time.perf_counter() - started)
+
+    def close(self):
+        with self._lock:
+            for connection in self._all:
+                close_quietly(connection)
+            self._all = []
+            self._idle = queue.LifoQueue()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """The process-wide engine, created on first use"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = DeliveryEngine()
+        return _engine
+
+
+def reset_engine():
+    """Forget the engine without closing it, for a freshly forked worker
+    whose inherited sockets belong to the parent"""
+    global _engine
+    with _engine_lock:
+        _engine = None
+
+
+class PooledEmailBackend(BaseEmailBackend):
+    """EMAIL_BACKEND that hands messages to the shared DeliveryEngine"""
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+        report = get_engine().send(email_messages)
+        if report.failed and not self.fail_silently:
+            raise report.failed[0][1]
+        return report.sent
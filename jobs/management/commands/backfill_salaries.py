@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from jobs.models import Job
+from jobs.salary import parse_salary
+
+SALARY_FIELDS = ['salary_min', 'salary_max', 'salary_currency', 'salary_period']
+
+class Command(BaseCommand):
+    help = 'Parse Job.salary into the indexed salary range columns for existing jobs'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        parsed = 0
+        batch = []
+        for job in Job.objects.only('id', 'salary').iterator(chunk_size=batch_size):
+            job.salary_min, job.salary_max, job.salary_currency, job.salary_period = parse_salary(job.salary)
+            parsed += job.salary_max is not None
+            batch.append(job)
+            if len(batch) >= batch_size:
+                Job.objects.bulk_update(batch, SALARY_FIELDS)
+                batch = []
+        if batch:
+            Job.objects.bulk_update(batch, SALARY_FIELDS)
+        self.stdout.write(self.style.SUCCESS(f'Parsed salaries for {parsed} jobs'))
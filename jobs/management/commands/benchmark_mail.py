@@ -0,0 +1,93 @@
+import json
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.management.base import BaseCommand
+from jobs.benchmark import Timer
+from jobs.mail_pool import DeliveryEngine, DeliveryReport
+from jobs.smtp_sink import SMTPSink
+
+SMTP_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+class Command(BaseCommand):
+    help = 'Measure emails/second of the pooled delivery engine against a local SMTP server'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=500)
+        parser.add_argument('--domains', type=int, default=5, help='Recipient domains the messages are spread over')
+        parser.add_argument('--connections', type=int, default=settings.MAIL_POOL_CONNECTIONS)
+        parser.add_argument('--batch-size', type=int, default=settings.MAIL_POOL_BATCH_SIZE)
+        parser.add_argument('--domain-rate', type=float, default=settings.MAIL_DOMAIN_RATE)
+        parser.add_argument('--latency-ms', type=float, default=2,
+                            help='Delay per SMTP reply of the built-in sink, standing in for a remote relay')
+        parser.add_argument('--host', help='Use this SMTP server instead of the built-in sink, '
+                                           'e.g. one started with "python -m aiosmtpd -n"')
+        parser.add_argument('--port', type=int, default=1025)
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+    
+    def handle(self, *args, **options):
+        sink = None
+        if options['host']:
+            host, port = options['host'], options['port']
+        else:
+            sink = SMTPSink(latency_ms=options['latency_ms']).start()
+            host, port = '127.0.0.1', sink.port
+        smtp = {'host': host, 'port': port, 'username': '', 'password': '', 'use_tls': False, 'use_ssl': False}
+        messages = [
+            EmailMultiAlternatives(
+                subject=f'Benchmark message {number}',
+                body='Plain text body\n' * 20,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[f'user{number}@example{number % options["domains"]}.com'],
+            )
+            for number in range(options['messages'])
+        ]
+        
+        try:
+            # What EmailMessage.send() did before: a new connection per message
+            failed = []
+            with Timer() as timer:
+                for message in messages:
+                    try:
+                        get_connection(SMTP_BACKEND, fail_silently=False, **smtp).send_messages([message])
+                    except Exception as e:
+                        failed.append((message, e))
+            unpooled = DeliveryReport(len(messages) - len(failed), failed, timer.elapsed_ms / 1000)
+            
+            engine = DeliveryEngine(
+                SMTP_BACKEND,
+                connections=options['connections'],
+                batch_size=options['batch_size'],
+                domain_rate=options['domain_rate'],
+                **smtp,
+            )
+            pooled = engine.send(messages)
+            engine.close()
+        finally:
+            if sink:
+                sink.shutdown()
+                sink.server_close()
+        
+        report = {
+            'messages': len(messages),
+            'domains': options['domains'],
+            'connections': options['connections'],
+            'batch_size': options['batch_size'],
+            'domain_rate': options['domain_rate'],
+            'server': 'built-in sink' if sink else f'{host}:{port}',
+            'latency_ms': options['latency_ms'] if sink else None,
+            'unpooled': unpooled.as_dict(),
+            'pooled': pooled.as_dict(),
+            'speedup': round(pooled.per_second / unpooled.per_second, 1) if unpooled.per_second else None,
+        }
+        if sink:
+            report['smtp_connections_opened'] = sink.connections
+            report['messages_received'] = sink.received
+        
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote mail benchmark report to {options['output']}"))
+        else:
+            self.stdout.write(output)
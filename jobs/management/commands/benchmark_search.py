@@ -0,0 +1,129 @@
+import json
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from jobs.benchmark import RowCounter, Timer, generate_corpus, private_cache, summarize
+from jobs.models import Job
+
+# Fixed job_list query mix: (name, query string parameters)
+QUERY_MIX = [
+    ('browse', {}),
+    ('keyword_common', {'q': 'developer'}),
+    ('keyword_skill', {'q': 'kotlin'}),
+    ('keyword_phrase', {'q': 'senior python developer'}),
+    ('keyword_typo', {'q': 'pythn develper'}),
+    ('job_type', {'job_type': 'contract'}),
+    ('location', {'location': 'Nairobi'}),
+    ('keyword_location', {'q': 'data', 'location': 'Mombasa'}),
+    ('radius', {'near': 'Nairobi', 'radius': 50}),
+    ('salary_range', {'min_salary': '1,000,000', 'max_salary': '3,000,000'}),
+    ('salary_sort', {'sort': 'salary'}),
+    ('keyword_type_radius', {'q': 'engineer', 'job_type': 'full-time', 'near': 'Kampala', 'radius': 100}),
+]
+
+class Command(BaseCommand):
+    help = 'Benchmark job_list against a synthetic corpus in a throwaway test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=100000, help='Number of jobs to generate')
+        parser.add_argument('--companies', type=int, default=2000, help='Number of companies to generate')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the corpus')
+        parser.add_argument('--runs', type=int, default=20, help='Timed runs per query')
+        parser.add_argument('--pages', type=int, default=1,
+                            help='Result pages to walk per run, following the next cursor')
+        parser.add_argument('--warm-cache', action='store_true',
+                            help='Let the result cache answer repeated queries instead of clearing it before each request')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the test database, and reuse its corpus if it already has the requested size')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'], serialize=False)
+        setup_test_environment()
+        try:
+            # Never clear a cache shared with production
+            with private_cache():
+                if Job.objects.count() != options['jobs']:
+                    self.stderr.write(f"Generating {options['jobs']} jobs...")
+                    # A kept database with a different corpus is emptied first
+                    call_command('flush', interactive=False, verbosity=0)
+                    with Timer() as timer:
+                        with transaction.atomic():
+                            generate_corpus(options['jobs'], options['companies'], options['seed'])
+                    self.stderr.write(f'Corpus ready in {timer.elapsed_ms / 1000:.1f}s')
+                report = self.run_queries(options)
+        finally:
+            teardown_test_environment()
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote benchmark report to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def run_queries(self, options):
+        client = Client()
+        url = reverse('job_list')
+        report = {
+            'vendor': connection.vendor,
+            'corpus': {'jobs': options['jobs'], 'companies': options['companies'], 'seed': options['seed']},
+            'runs': options['runs'],
+            'pages': options['pages'],
+            'warm_cache': options['warm_cache'],
+            'queries': {},
+        }
+        all_latencies = []
+
+        for name, params in QUERY_MIX:
+            latencies = []
+            sql_counts = []
+            rows_scanned = []
+            vm_steps = []
+            results = None
+            # One untimed run so connection setup and lazy loads don't skew the first sample
+            client.get(url, params)
+            for _ in range(options['runs']):
+                cursor = None
+                for _ in range(options['pages']):
+                    if not options['warm_cache']:
+                        cache.clear()
+                    page_params = dict(params, cursor=cursor) if cursor else params
+                    # One transaction per request, as PostgreSQL only reports per-transaction reads
+                    with transaction.atomic(), RowCounter() as rows:
+                        with CaptureQueriesContext(connection) as queries, Timer() as timer:
+                            response = client.get(url, page_params)
+                    latencies.append(timer.elapsed_ms)
+                    sql_counts.append(len(queries.captured_queries))
+                    rows_scanned.append(rows.rows)
+                    vm_steps.append(rows.vm_steps)
+                    if results is None:
+                        results = response.context['jobs_count']
+                        results_is_estimate = response.context['jobs_count_is_estimate']
+                    cursor = response.context['page'].next_cursor
+                    if not cursor:
+                        break
+
+            entry = summarize(latencies)
+            entry['params'] = params
+            entry['results'] = results
+            entry['results_is_estimate'] = results_is_estimate
+            entry['sql_queries'] = round(sum(sql_counts) / len(sql_counts), 2)
+            if rows_scanned[0] is not None:
+                entry['rows_scanned'] = round(sum(rows_scanned) / len(rows_scanned))
+            if vm_steps[0] is not None:
+                entry['vm_steps'] = round(sum(vm_steps) / len(vm_steps))
+            report['queries'][name] = entry
+            all_latencies.extend(latencies)
+            self.stderr.write(f"{name}: p50 {entry['p50_ms']} ms, p95 {entry['p95_ms']} ms")
+
+        report['overall'] = summarize(all_latencies)
+        return report
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from jobs.geo import geo_fields
+from jobs.models import Job, Company
+
+class Command(BaseCommand):
+    help = 'Geocode the location of every job and company from the local gazetteer'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model in (Job, Company):
+            geocoded = 0
+            batch = []
+            for obj in model.objects.only('id', 'location').iterator(chunk_size=batch_size):
+                obj.latitude, obj.longitude, obj.geo_cell = geo_fields(obj.location)
+                geocoded += obj.geo_cell is not None
+                batch.append(obj)
+                if len(batch) >= batch_size:
+                    model.objects.bulk_update(batch, ['latitude', 'longitude', 'geo_cell'])
+                    batch = []
+            if batch:
+                model.objects.bulk_update(batch, ['latitude', 'longitude', 'geo_cell'])
+            self.stdout.write(
+                self.style.SUCCESS(f'Geocoded {geocoded} {model._meta.verbose_name_plural}')
+            )
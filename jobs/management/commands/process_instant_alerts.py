@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from jobs import instant_alerts
+
+class Command(BaseCommand):
+    help = 'Email instant job alerts as new jobs are posted'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.INSTANT_ALERT_BATCH_SIZE,
+                            help='Queued jobs handled together')
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit')
+        parser.add_argument('--interval', type=float, default=settings.INSTANT_ALERT_POLL_SECONDS,
+                            help='Seconds to wait between polls when the queue is empty')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Move entries that ran out of attempts back to pending first')
+    
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            self.stdout.write(f'Requeued {instant_alerts.retry_failed()} failed jobs')
+        
+        try:
+            while True:
+                stats = instant_alerts.process(options['batch_size'], log=self.log)
+                if stats['jobs']:
+                    self.stdout.write(
+                        f"{stats['jobs']} new jobs: sent {stats['sent']} of {stats['emails']} instant alert emails"
+                        f" ({stats['failed']} failed)"
+                    )
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Instant alert consumer stopped')
+    
+    def log(self, level, message):
+        style = self.style.ERROR if level == 'error' else self.style.SUCCESS
+        self.stdout.write(style(message))
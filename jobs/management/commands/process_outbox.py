@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from jobs import outbox
+
+class Command(BaseCommand):
+    help = 'Deliver queued emails from the outbox, retrying failures with backoff'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument('--once', action='store_true', help='Deliver what is due now and exit')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to wait between polls when the outbox is empty')
+        parser.add_argument('--retry-dead', action='store_true',
+                            help='Move dead-lettered messages back to pending first')
+    
+    def handle(self, *args, **options):
+        if options['retry_dead']:
+            self.stdout.write(f'Requeued {outbox.retry_dead()} dead messages')
+        
+        try:
+            while True:
+                stats = outbox.process(options['batch_size'])
+                if stats['claimed']:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Sent {stats['sent']} of {stats['claimed']} emails "
+                        f"({stats['retried']} to retry, {stats['dead']} dead-lettered)"
+                    ))
+                    if stats['dead']:
+                        self.stdout.write(self.style.ERROR(
+                            f"{stats['dead']} emails failed {settings.OUTBOX_MAX_ATTEMPTS} times and were dead-lettered"
+                        ))
+                    continue
+                pruned = outbox.prune_sent()
+                if pruned:
+                    self.stdout.write(f'Pruned {pruned} sent emails')
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Outbox worker stopped')
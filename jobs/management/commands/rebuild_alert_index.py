@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from jobs import percolator
+from jobs.models import AlertMatch, AlertTerm
+
+class Command(BaseCommand):
+    help = 'Rebuild the alert percolator index and seed pending matches from recent jobs'
+    
+    def handle(self, *args, **options):
+        percolator.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Indexed alerts under {AlertTerm.objects.count()} terms, '
+                f'{AlertMatch.objects.filter(notified_at__isnull=True).count()} pending matches'
+            )
+        )
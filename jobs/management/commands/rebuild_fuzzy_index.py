@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from jobs import fuzzy
+from jobs.models import SearchTerm
+
+class Command(BaseCommand):
+    help = 'Rebuild the trigram index used for typo-tolerant job and company search'
+    
+    def handle(self, *args, **options):
+        fuzzy.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Indexed {SearchTerm.objects.count()} search terms')
+        )
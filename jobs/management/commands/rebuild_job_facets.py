@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from jobs import facets
+
+class Command(BaseCommand):
+    help = 'Recount the job_type and location facet store from the jobs table'
+    
+    def handle(self, *args, **options):
+        facets.rebuild()
+        self.stdout.write(self.style.SUCCESS('Rebuilt job facet counts'))
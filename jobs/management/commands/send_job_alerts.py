@@ -1,41 +1,118 @@
-from django.core.management.base import BaseCommand
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
 from django.utils import timezone
-from jobs.models import JobAlert
-from jobs.emails import send_job_alert_email
+from jobs import alert_runner, percolator
+from jobs.models import AlertRun
 
 class Command(BaseCommand):
     help = 'Send job alert emails to users'
     
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.ALERT_BATCH_SIZE,
+                            help='Alerts loaded and evaluated together')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Worker processes, each sending a share of the alerts by user id')
+        parser.add_argument('--shard', default='0/1',
+                            help='Only send shard i of n, as "i/n", to split a run across n hosts')
+        parser.add_argument('--stats-json', metavar='PATH',
+                            help='Write the run statistics to this file as JSON')
+    
     def handle(self, *args, **options):
-        alerts = JobAlert.objects.filter(is_active=True)
+        shard, shards = self.parse_shard(options['shard'])
+        workers = options['workers']
+        if workers < 1:
+            raise CommandError('--workers must be at least 1')
         
-        for alert in alerts:
-            # Check if it's time to send based on frequency
-            if self.should_send_alert(alert):
-                matching_jobs = alert.get_matching_jobs()
-                if matching_jobs.exists():
-                    try:
-                        send_job_alert_email(alert, list(matching_jobs))
-                        self.stdout.write(
-                            self.style.SUCCESS(f'Sent alert to {alert.user.username} with {matching_jobs.count()} jobs')
-                        )
-                    except Exception as e:
-                        self.stdout.write(
-                            self.style.ERROR(f'Failed to send alert to {alert.user.username}: {str(e)}')
-                        )
-    
-    def should_send_alert(self, alert):
-        if not alert.last_sent:
-            return True
+        # Each worker takes every workers-th slice of this host's shard
+        parts = [(shard + shards * worker, shards * workers) for worker in range(workers)]
+        started_at = timezone.now()
+        wall, cpu = time.perf_counter(), time.process_time()
+        
+        if workers == 1:
+            results = [alert_runner.run_alerts(*parts[0], options['batch_size'], log=self.log)]
+        else:
+            # Forked workers must not share the parent's database connection
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=alert_runner.init_worker) as pool:
+                results = list(pool.map(
+                    alert_runner.run_shard,
+                    *zip(*parts), repeat(options['batch_size']),
+                ))
+            for result in results:
+                self.stdout.write(
+                    f"Shard {result['shard']}: {result['sent']} emails sent for {result['due']} due alerts "
+                    f"({result['failed']} failed)"
+                )
         
-        now = timezone.now()
-        time_since_last = now - alert.last_sent
+        totals = alert_runner.combine(results)
+        pruned = percolator.prune()
+        if pruned:
+            self.stdout.write(f'Pruned {pruned} expired alert matches')
         
-        if alert.frequency == 'instant':
-            return True
-        elif alert.frequency == 'daily':
-            return time_since_last.days >= 1
-        elif alert.frequency == 'weekly':
-            return time_since_last.days >= 7
+        # Worker processes report their own CPU time in their phases
+        cpu_seconds = time.process_time() - cpu
+        if workers > 1:
+            cpu_seconds += sum(phase['cpu_seconds'] for phase in totals['phases'].values())
+        run = AlertRun.objects.create(
+            started_at=started_at,
+            finished_at=timezone.now(),
+            shard=options['shard'],
+            workers=workers,
+            due=totals['due'],
+            candidates=totals['candidates'],
+            rendered=totals['rendered'],
+            sent=totals['sent'],
+            failed=totals['failed'],
+            queries=totals['queries'],
+            wall_seconds=time.perf_counter() - wall,
+            cpu_seconds=cpu_seconds,
+            emails_per_second=totals['emails_per_second'],
+            stats={
+                'cards': totals['cards'],
+                'jobs': totals['jobs'],
+                'pruned': pruned,
+                'phases': totals['phases'],
+                'shards': results,
+            },
+        )
+        if options['stats_json']:
+            with open(options['stats_json'], 'w') as handle:
+                json.dump(self.run_report(run), handle, indent=2)
+                handle.write('\n')
         
-        return False
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {totals['sent']} alert emails with {totals['jobs']} jobs "
+            f"({totals['due']} alerts due, {totals['failed']} failed, "
+            f"{totals['emails_per_second']} emails/s, {run.wall_seconds:.1f}s)"
+        ))
+    
+    def run_report(self, run):
+        report = {
+            'run': run.id,
+            'started_at': run.started_at.isoformat(),
+            'finished_at': run.finished_at.isoformat(),
+        }
+        for field in ('shard', 'workers', 'due', 'candidates', 'rendered', 'sent', 'failed',
+                      'queries', 'wall_seconds', 'cpu_seconds', 'emails_per_second'):
+            report[field] = getattr(run, field)
+        report.update(run.stats)
+        return report
+    
+    def parse_shard(self, value):
+        try:
+            shard, shards = (int(part) for part in value.split('/'))
+        except ValueError:
+            raise CommandError(f'--shard must look like "i/n", got "{value}"')
+        if not 0 <= shard < shards:
+            raise CommandError(f'--shard {value}: i must be between 0 and n - 1')
+        return shard, shards
+    
+    def log(self, level, message):
+        style = self.style.ERROR if level == 'error' else self.style.SUCCESS
+        self.stdout.write(style(message))
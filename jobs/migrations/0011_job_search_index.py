@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute(
+            'CREATE FULLTEXT INDEX jobs_job_search_ft '
+            'ON jobs_job (title, company_name, location, description)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE jobs_job_fts USING fts5("
+            "title, company_name, location, description, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            'INSERT INTO jobs_job_fts (rowid, title, company_name, location, description) '
+            'SELECT id, title, company_name, location, description FROM jobs_job'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute('DROP INDEX jobs_job_search_ft ON jobs_job')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS jobs_job_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0010_userprofile_company_userprofile_github_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
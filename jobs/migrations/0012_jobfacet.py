@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:34
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_facets(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    JobFacet = apps.get_model('jobs', 'JobFacet')
+    facets = []
+    for facet in ('job_type', 'location'):
+        for row in Job.objects.values(facet).annotate(n=Count('id')).order_by():
+            facets.append(JobFacet(facet=facet, value=row[facet], count=row['n']))
+    JobFacet.objects.bulk_create(facets)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0011_job_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(choices=[('job_type', 'Job Type'), ('location', 'Location')], max_length=20)),
+                ('value', models.CharField(max_length=200)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('facet', 'value')},
+            },
+        ),
+        migrations.RunPython(populate_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0012_jobfacet'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('title', 'Job Title'), ('company_name', 'Job Company'), ('location', 'Job Location'), ('company', 'Company Name')], max_length=20)),
+                ('term', models.CharField(max_length=100)),
+                ('gram_count', models.PositiveSmallIntegerField()),
+                ('doc_count', models.PositiveIntegerField(default=0)),
+                ('companies', models.ManyToManyField(blank=True, related_name='search_terms', to='jobs.company')),
+            ],
+            options={
+                'unique_together': {('field', 'term')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gram', models.CharField(max_length=3)),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='jobs.searchterm')),
+            ],
+            options={
+                'unique_together': {('gram', 'term')},
+            },
+        ),
+    ]
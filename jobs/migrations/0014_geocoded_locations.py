@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0013_searchterm_searchtrigram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='geo_cell',
+            field=models.IntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='geo_cell',
+            field=models.IntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobalert',
+            name='radius_km',
+            field=models.PositiveIntegerField(blank=True, help_text='Match jobs within this distance of the location', null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0014_geocoded_locations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='salary_currency',
+            field=models.CharField(blank=True, editable=False, max_length=3, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='salary_max',
+            field=models.PositiveBigIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='salary_min',
+            field=models.PositiveBigIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='salary_period',
+            field=models.CharField(blank=True, editable=False, max_length=10, null=True),
+        ),
+    ]
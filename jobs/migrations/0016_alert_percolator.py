@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0015_parsed_salary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matched_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('notified_at', models.DateTimeField(blank=True, null=True)),
+                ('alert', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='jobs.jobalert')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alert_matches', to='jobs.job')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['alert', 'notified_at'], name='jobs_alertm_alert_i_06213d_idx')],
+                'unique_together': {('alert', 'job')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AlertTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('keyword', 'Keyword'), ('location', 'Location')], max_length=20)),
+                ('term', models.CharField(max_length=100)),
+                ('alert', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='jobs.jobalert')),
+            ],
+            options={
+                'unique_together': {('field', 'term', 'alert')},
+            },
+        ),
+    ]
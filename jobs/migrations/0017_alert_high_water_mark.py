@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0016_alert_percolator'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobalert',
+            name='last_job_id',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
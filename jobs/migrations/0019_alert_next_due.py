@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:57
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_next_due(apps, schema_editor):
+    JobAlert = apps.get_model('jobs', 'JobAlert')
+    JobAlert.objects.filter(last_sent__isnull=True).update(next_due=F('created_at'))
+    sent = JobAlert.objects.filter(last_sent__isnull=False)
+    sent.filter(frequency='daily').update(next_due=F('last_sent') + timedelta(days=1))
+    sent.filter(frequency='weekly').update(next_due=F('last_sent') + timedelta(days=7))
+    sent.filter(frequency='instant').update(next_due=F('last_sent'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0018_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobalert',
+            name='next_due',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='jobalert',
+            index=models.Index(fields=['is_active', 'next_due'], name='jobs_jobale_is_acti_33fc1d_idx'),
+        ),
+        migrations.RunPython(fill_next_due, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0019_alert_next_due'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobQueueEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('queued_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('available_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='queue_entries', to='jobs.job')),
+            ],
+        ),
+    ]
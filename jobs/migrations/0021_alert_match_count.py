@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:00
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def count_pending_matches(apps, schema_editor):
+    JobAlert = apps.get_model('jobs', 'JobAlert')
+    AlertMatch = apps.get_model('jobs', 'AlertMatch')
+    Application = apps.get_model('jobs', 'Application')
+    applied = Application.objects.filter(
+        applicant_id=OuterRef(OuterRef('user_id')), job_id=OuterRef('job_id'),
+    )
+    pending = (
+        AlertMatch.objects
+        .filter(
+            alert_id=OuterRef('pk'),
+            notified_at__isnull=True,
+            job__date_posted__gte=timezone.now() - timedelta(days=7),
+        )
+        .exclude(Exists(applied))
+        .order_by()
+        .values('alert_id')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    JobAlert.objects.update(pending_match_count=Coalesce(Subquery(pending), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0020_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobalert',
+            name='pending_match_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_pending_matches, migrations.RunPython.noop),
+    ]
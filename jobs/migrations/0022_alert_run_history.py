@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0021_alert_match_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('shard', models.CharField(default='0/1', max_length=20)),
+                ('workers', models.PositiveSmallIntegerField(default=1)),
+                ('alerts', models.PositiveIntegerField(default=0, help_text='Alerts scanned')),
+                ('due', models.PositiveIntegerField(default=0)),
+                ('candidates', models.PositiveIntegerField(default=0, help_text='Pending jobs evaluated')),
+                ('rendered', models.PositiveIntegerField(default=0, help_text='Emails rendered')),
+                ('sent', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('queries', models.PositiveIntegerField(default=0)),
+                ('wall_seconds', models.FloatField(default=0)),
+                ('cpu_seconds', models.FloatField(default=0)),
+                ('emails_per_second', models.FloatField(default=0)),
+                ('stats', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+from jobs.salary import written_currency
+
+
+def apply_default_currency(apps, schema_editor):
+    # Salaries that name no currency were parsed with the old USD default
+    Job = apps.get_model('jobs', 'Job')
+    unnamed = [
+        job.id for job in Job.objects.filter(salary_max__isnull=False).only('id', 'salary').iterator()
+        if not written_currency(job.salary)
+    ]
+    for start in range(0, len(unnamed), 1000):
+        Job.objects.filter(id__in=unnamed[start:start + 1000]).update(
+            salary_currency=settings.SALARY_DEFAULT_CURRENCY,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0023_alert_preferred_hour'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='salary_max',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='salary_min',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['salary_currency', 'salary_max'], name='jobs_job_salary_max_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['salary_currency', 'salary_min'], name='jobs_job_salary_min_idx'),
+        ),
+        migrations.RunPython(apply_default_currency, migrations.RunPython.noop),
+    ]
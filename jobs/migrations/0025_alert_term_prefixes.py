@@ -0,0 +1,30 @@
+from django.db import migrations
+
+TERM_PREFIX_LENGTH = 6
+
+
+def shorten_terms(apps, schema_editor):
+    # Alert terms used to be whole words; the index now keeps their start
+    AlertTerm = apps.get_model('jobs', 'AlertTerm')
+    long_terms = AlertTerm.objects.exclude(term='*').filter(term__regex=r'^.{%d,}$' % (TERM_PREFIX_LENGTH + 1))
+    shortened = {
+        (term.alert_id, term.field, term.term[:TERM_PREFIX_LENGTH])
+        for term in long_terms.only('alert_id', 'field', 'term').iterator()
+    }
+    long_terms.delete()
+    AlertTerm.objects.bulk_create(
+        [AlertTerm(alert_id=alert_id, field=field, term=term) for alert_id, field, term in shortened],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0024_salary_currency_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(shorten_terms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0025_alert_term_prefixes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobqueueentry',
+            name='last_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='jobqueueentry',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+    ]
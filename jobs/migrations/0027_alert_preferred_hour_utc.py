@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0026_job_queue_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobalert',
+            name='preferred_hour',
+            field=models.PositiveSmallIntegerField(blank=True, choices=[(0, '00:00 UTC'), (1, '01:00 UTC'), (2, '02:00 UTC'), (3, '03:00 UTC'), (4, '04:00 UTC'), (5, '05:00 UTC'), (6, '06:00 UTC'), (7, '07:00 UTC'), (8, '08:00 UTC'), (9, '09:00 UTC'), (10, '10:00 UTC'), (11, '11:00 UTC'), (12, '12:00 UTC'), (13, '13:00 UTC'), (14, '14:00 UTC'), (15, '15:00 UTC'), (16, '16:00 UTC'), (17, '17:00 UTC'), (18, '18:00 UTC'), (19, '19:00 UTC'), (20, '20:00 UTC'), (21, '21:00 UTC'), (22, '22:00 UTC'), (23, '23:00 UTC')], help_text='Hour of the day, in UTC, to receive daily and weekly alerts', null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0027_alert_preferred_hour_utc'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='alertrun',
+            name='alerts',
+        ),
+        migrations.AlterField(
+            model_name='alertrun',
+            name='due',
+            field=models.PositiveIntegerField(default=0, help_text='Due alerts evaluated'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+from jobs import alert_slots
+
+
+def recompute_next_due(apps, schema_editor):
+    # Slots used to be derived from the alert id and are now derived from the
+    # user id, so a user's alerts fall due together. An alert whose new slot
+    # has already passed is due at once and rescheduled by its next run.
+    JobAlert = apps.get_model('jobs', 'JobAlert')
+    alerts = (
+        JobAlert.objects
+        .filter(last_sent__isnull=False, frequency__in=['daily', 'weekly'])
+        .only('user_id', 'frequency', 'preferred_hour', 'last_sent')
+    )
+    batch = []
+    for alert in alerts.iterator(chunk_size=1000):
+        alert.next_due = alert_slots.next_slot(alert.last_sent, alert.user_id, alert.frequency, alert.preferred_hour)
+        batch.append(alert)
+        if len(batch) == 1000:
+            JobAlert.objects.bulk_update(batch, ['next_due'])
+            batch = []
+    JobAlert.objects.bulk_update(batch, ['next_due'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0028_alert_run_due_only'),
+    ]
+
+    operations = [
+        migrations.RunPython(recompute_next_due, migrations.RunPython.noop),
+    ]
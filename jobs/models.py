@@ -4,6 +4,24 @@ from django.utils import timezone
 from django.db.models import Q
 from django.urls import reverse
 import uuid
+from . import alert_slots, geo
+from .salary import format_salary, parse_salary
+from .search import tokenize, word_start_filter
+
+
+class TrackLoadedValuesMixin:
+    """Remember the values a row was loaded with, so signal handlers can
+    tell what an edit changed"""
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields}
 
 
 class UserProfile(models.Model):
@@ -47,7 +65,7 @@ class Connection(models.Model):
         return f"{self.follower.username} follows {self.following.username}"
 
 
-class Company(models.Model):
+class Company(TrackLoadedValuesMixin, models.Model):
     INDUSTRY_CHOICES = [
         ('technology', 'Technology'),
         ('healthcare', 'Healthcare'),
@@ -80,17 +98,25 @@ class Company(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(default=timezone.now)
     is_verified = models.BooleanField(default=False)
+    # Geocoded from location on save, see jobs.geo
+    latitude = models.FloatField(blank=True, null=True, editable=False)
+    longitude = models.FloatField(blank=True, null=True, editable=False)
+    geo_cell = models.IntegerField(blank=True, null=True, editable=False, db_index=True)
 
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        self.latitude, self.longitude, self.geo_cell = geo.geo_fields(self.location)
+        super().save(*args, **kwargs)
+    
     def active_jobs_count(self):
         return self.jobs.count()
     
     def get_absolute_url(self):
         return reverse('company_detail', kwargs={'company_id': self.id})
 
-class Job(models.Model):
+class Job(TrackLoadedValuesMixin, models.Model):
     JOB_TYPE_CHOICES = [
         ('full-time', 'Full Time'),
         ('part-time', 'Part Time'),
@@ -105,19 +131,91 @@ class Job(models.Model):
     location = models.CharField(max_length=200)
     description = models.TextField()
     salary = models.CharField(max_length=100, blank=True, null=True)
+    # Parsed from salary on save, see jobs.salary. Amounts are per year.
+    salary_min = models.PositiveBigIntegerField(blank=True, null=True, editable=False)
+    salary_max = models.PositiveBigIntegerField(blank=True, null=True, editable=False)
+    salary_currency = models.CharField(max_length=3, blank=True, null=True, editable=False)
+    salary_period = models.CharField(max_length=10, blank=True, null=True, editable=False)
     job_type = models.CharField(max_length=20, choices=JOB_TYPE_CHOICES, default='full-time')
     date_posted = models.DateTimeField(default=timezone.now)
     posted_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posted_jobs')
+    # Geocoded from location on save, see jobs.geo
+    latitude = models.FloatField(blank=True, null=True, editable=False)
+    longitude = models.FloatField(blank=True, null=True, editable=False)
+    geo_cell = models.IntegerField(blank=True, null=True, editable=False, db_index=True)
+    
+    class Meta:
+        indexes = [
+            # Salary filters and sorting only compare amounts within a currency
+            models.Index(fields=['salary_currency', 'salary_max'], name='jobs_job_salary_max_idx'),
+            models.Index(fields=['salary_currency', 'salary_min'], name='jobs_job_salary_min_idx'),
+        ]
     
     def __str__(self):
         return self.title
     
+    @property
+    def salary_display(self):
+        return format_salary(self.salary, self.salary_currency)
+    
     def save(self, *args, **kwargs):
         # Auto-populate company_name from Company if company is set
         if self.company and not self.company_name:
             self.company_name = self.company.name
+        self.latitude, self.longitude, self.geo_cell = geo.geo_fields(self.location)
+        self.salary_min, self.salary_max, self.salary_currency, self.salary_period = parse_salary(self.salary)
         super().save(*args, **kwargs)
 
+
+class JobFacet(models.Model):
+    """Running count of jobs per filter value, maintained from Job signals"""
+    FACET_CHOICES = [
+        ('job_type', 'Job Type'),
+        ('location', 'Location'),
+    ]
+    
+    facet = models.CharField(max_length=20, choices=FACET_CHOICES)
+    value = models.CharField(max_length=200)
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['facet', 'value']
+    
+    def __str__(self):
+        return f"{self.facet}={self.value} ({self.count})"
+
+
+class SearchTerm(models.Model):
+    """A word from job titles, companies or locations, for typo-tolerant matching"""
+    FIELD_CHOICES = [
+        ('title', 'Job Title'),
+        ('company_name', 'Job Company'),
+        ('location', 'Job Location'),
+        ('company', 'Company Name'),
+    ]
+    
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    term = models.CharField(max_length=100)
+    gram_count = models.PositiveSmallIntegerField()
+    doc_count = models.PositiveIntegerField(default=0)
+    # Only filled for 'company' terms, so company_list can look companies up by word
+    companies = models.ManyToManyField(Company, blank=True, related_name='search_terms')
+    
+    class Meta:
+        unique_together = ['field', 'term']
+    
+    def __str__(self):
+        return f"{self.field}:{self.term}"
+
+
+class SearchTrigram(models.Model):
+    term = models.ForeignKey(SearchTerm, on_delete=models.CASCADE, related_name='trigrams')
+    gram = models.CharField(max_length=3)
+    
+    class Meta:
+        # gram first, so fuzzy lookups are an index range scan
+        unique_together = ['gram', 'term']
+
 class Application(models.Model):
     STATUS_CHOICES = [
         ('pending', '📝 Pending'),
@@ -150,55 +248,239 @@ class Application(models.Model):
             self.email = self.applicant.email
         super().save(*args, **kwargs)
 
-class JobAlert(models.Model):
+class JobAlert(TrackLoadedValuesMixin, models.Model):
     FREQUENCY_CHOICES = [
         ('daily', 'Daily'),
         ('weekly', 'Weekly'),
         ('instant', 'Instant'),
     ]
+    # Job fields searched for the alert's keywords
+    KEYWORD_FIELDS = ('title', 'description', 'company_name')
     
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=200, help_text="Name for this alert")
     keywords = models.TextField(help_text="Comma-separated keywords (e.g. python, django, remote)")
     location = models.CharField(max_length=100, blank=True, null=True)
+    radius_km = models.PositiveIntegerField(blank=True, null=True, help_text="Match jobs within this distance of the location")
     job_type = models.CharField(max_length=50, blank=True, null=True, choices=Job.JOB_TYPE_CHOICES)
     frequency = models.CharField(max_length=20, choices=FREQUENCY_CHOICES, default='daily')
+    preferred_hour = models.PositiveSmallIntegerField(
+        blank=True, null=True, choices=[(hour, f'{hour:02d}:00 UTC') for hour in range(24)],
+        help_text="Hour of the day, in UTC, to receive daily and weekly alerts",
+    )
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(default=timezone.now)
     last_sent = models.DateTimeField(blank=True, null=True)
+    # High-water mark: every job up to this id has been evaluated for the alert
+    last_job_id = models.PositiveBigIntegerField(default=0, editable=False)
+    # When the scheduler should next consider the alert, from frequency and last_sent
+    next_due = models.DateTimeField(blank=True, null=True, editable=False)
+    # Unsent matches the user hasn't applied to, kept by jobs.percolator
+    pending_match_count = models.PositiveIntegerField(default=0, editable=False)
     
-    def get_matching_jobs(self):
-        """Get jobs that match this alert's criteria"""
+    class Meta:
+        indexes = [models.Index(fields=['is_active', 'next_due'])]
+    
+    def save(self, *args, **kwargs):
+        self.next_due = self.compute_next_due()
+        super().save(*args, **kwargs)
+    
+    def send_slot(self):
+        """Where in its day or week the alert is sent, see jobs.alert_slots"""
+        return alert_slots.send_slot(self.user_id, self.frequency, self.preferred_hour)
+    
+    def compute_next_due(self, checked=None):
+        """The alert's next slot after it was last sent, or after ``checked``
+        when a run has since looked at it and found nothing to send"""
+        since = checked or self.last_sent
+        if not since:
+            return self.created_at
+        return alert_slots.next_slot(since, self.user_id, self.frequency, self.preferred_hour)
+    
+    @classmethod
+    def record_sent(cls, alerts, when):
+        """Set last_sent and the next slot of the alerts with one UPDATE"""
+        for alert in alerts:
+            alert.last_sent = when
+            alert.next_due = alert.compute_next_due()
+        cls.objects.bulk_update(alerts, ['last_sent', 'next_due'])
+    
+    @classmethod
+    def record_checked(cls, alerts, when):
+        """Move alerts that had nothing to send on to their next slot"""
+        for alert in alerts:
+            alert.next_due = alert.compute_next_due(checked=when)
+        cls.objects.bulk_update(alerts, ['next_due'])
+    
+    def get_keywords_list(self):
+        return [keyword.strip() for keyword in (self.keywords or '').split(',') if keyword.strip()]
+    
+    def get_keyword_terms(self):
+        """The words of each keyword. A job matches a keyword when each of
+        its words starts a word of the job's title, description or company."""
+        return [terms for terms in map(tokenize, self.get_keywords_list()) if terms]
+    
+    def get_location_terms(self):
+        """Words that must each start a word of the job's location, when no
+        radius applies"""
+        return tokenize(self.location)
+    
+    def get_criteria_jobs(self):
+        """Recent jobs that match the alert's criteria, for any user. Alerts
+        with the same criteria share this query."""
         jobs = Job.objects.all()
         
-        # Filter by keywords
-        if self.keywords:
-            keywords = self.get_keywords_list()
+        # Filter by keywords - any of them, with every word of it found.
+        # jobs.percolator.matches() applies the same rule to a single job.
+        keyword_terms = self.get_keyword_terms()
+        if keyword_terms:
             query = Q()
-            for keyword in keywords:
-                query |= Q(title__icontains=keyword) | Q(description__icontains=keyword) | Q(company_name__icontains=keyword)  # Changed to company_name
+            for terms in keyword_terms:
+                keyword_query = Q()
+                for term in terms:
+                    keyword_query &= word_start_filter(self.KEYWORD_FIELDS, term)
+                query |= keyword_query
             jobs = jobs.filter(query)
         
-        # Filter by location
-        if self.location:
-            jobs = jobs.filter(location__icontains=self.location)
+        # Filter by location - by distance when a radius is set and the place is known
+        point = geo.geocode(self.location) if self.location and self.radius_km else None
+        if point:
+            jobs = geo.within_radius(jobs, point[0], point[1], self.radius_km)
+        else:
+            for term in self.get_location_terms():
+                jobs = jobs.filter(word_start_filter(['location'], term))
         
         # Filter by job type
         if self.job_type:
             jobs = jobs.filter(job_type=self.job_type)
         
+        # Only get recent jobs (last 7 days)
+        one_week_ago = timezone.now() - timezone.timedelta(days=7)
+        return jobs.filter(date_posted__gte=one_week_ago)
+    
+    def get_matching_jobs(self):
+        """Get jobs that match this alert's criteria"""
+        # Only jobs posted since the alert was last evaluated
+        jobs = self.get_criteria_jobs().filter(id__gt=self.last_job_id)
+        
         # Exclude jobs user has already applied to
         jobs = jobs.exclude(application__applicant=self.user)
         
         # Exclude jobs user posted
         jobs = jobs.exclude(posted_by=self.user)
         
-        # Only get recent jobs (last 7 days)
-        one_week_ago = timezone.now() - timezone.timedelta(days=7)
-        jobs = jobs.filter(date_posted__gte=one_week_ago)
-        
         return jobs.order_by('-date_posted')
+
+
+class AlertTerm(models.Model):
+    """Reverse index of alerts by the words a job must contain, so a new
+    job can find its candidate alerts without scanning them all"""
+    FIELD_CHOICES = [
+        ('keyword', 'Keyword'),
+        ('location', 'Location'),
+    ]
+    # Stands for "no constraint on this field"
+    ANY = '*'
+    
+    alert = models.ForeignKey(JobAlert, on_delete=models.CASCADE, related_name='terms')
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    term = models.CharField(max_length=100)
+    
+    class Meta:
+        # field and term first, so percolation is an index range scan
+        unique_together = ['field', 'term', 'alert']
     
+    def __str__(self):
+        return f"{self.field}:{self.term} -> alert {self.alert_id}"
+
+class AlertMatch(models.Model):
+    """A job that matched an alert, waiting to be sent or already sent"""
+    alert = models.ForeignKey(JobAlert, on_delete=models.CASCADE, related_name='matches')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='alert_matches')
+    matched_at = models.DateTimeField(default=timezone.now)
+    notified_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        unique_together = ['alert', 'job']
+        indexes = [models.Index(fields=['alert', 'notified_at'])]
+    
+    def __str__(self):
+        return f"alert {self.alert_id} ~ job {self.job_id}"
+
+
+class AlertRun(models.Model):
+    """Statistics of one send_job_alerts run, kept to follow alert throughput over time"""
+    started_at = models.DateTimeField(default=timezone.now, db_index=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    shard = models.CharField(max_length=20, default='0/1')
+    workers = models.PositiveSmallIntegerField(default=1)
+    due = models.PositiveIntegerField(default=0, help_text="Due alerts evaluated")
+    candidates = models.PositiveIntegerField(default=0, help_text="Pending jobs evaluated")
+    rendered = models.PositiveIntegerField(default=0, help_text="Emails rendered")
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    queries = models.PositiveIntegerField(default=0)
+    wall_seconds = models.FloatField(default=0)
+    cpu_seconds = models.FloatField(default=0)
+    emails_per_second = models.FloatField(default=0)
+    # Everything else: per-phase times and queries, per-shard stats
+    stats = models.JSONField(default=dict, blank=True)
+    
+    class Meta:
+        ordering = ['-started_at']
+    
+    def __str__(self):
+        return f"Alert run {self.started_at:%Y-%m-%d %H:%M} ({self.sent} sent in {self.wall_seconds:.1f}s)"
+
+
+class JobQueueEntry(models.Model):
+    """A newly posted job waiting for the instant alert consumer, see
+    jobs.instant_alerts"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('failed', 'Failed'),
+    ]
+    
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='queue_entries')
+    queued_at = models.DateTimeField(default=timezone.now)
+    # Pushed forward while a consumer holds the entry, and after failed sends
+    available_at = models.DateTimeField(default=timezone.now, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    
+    def __str__(self):
+        return f"job {self.job_id} queued at {self.queued_at} ({self.status})"
+
+
+class OutboxMessage(models.Model):
+    """An email waiting for process_outbox to deliver it. Rows are written in
+    the same transaction as the change they report, see jobs.outbox."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead'),
+    ]
+    
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField()
+    # File paths, read when the message is sent
+    attachments = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+    
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
 
 
 class Resume(models.Model):
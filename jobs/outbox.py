@@ -0,0 +1,129 @@
+"""
+Transactional email outbox.
+
+Request handlers don't talk to SMTP. enqueue() stores the message as an
+OutboxMessage row in the request's own transaction, so the email exists
+if and only if the change it reports was committed. process_outbox
+delivers due rows through the pooled engine (jobs.mail_pool). A failed
+delivery is retried with exponential backoff, and a message that still
+fails after OUTBOX_MAX_ATTEMPTS is dead-lettered (status "dead") for
+someone to look at.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import mail_pool
+from .models import OutboxMessage
+
+
+def enqueue(message, attachment_paths=()):
+    """Queue an EmailMessage. Files are attached by path when it is sent."""
+    html_body = ''
+    for content, mimetype in getattr(message, 'alternatives', []):
+        if mimetype == 'text/html':
+            html_body = content
+    return OutboxMessage.objects.create(
+        subject=message.subject,
+        body=message.body,
+        html_body=html_body,
+        from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(message.to),
+        attachments=[str(path) for path in attachment_paths],
+    )
+
+
+def to_message(row):
+    message = EmailMultiAlternatives(
+        subject=row.subject,
+        body=row.body,
+        from_email=row.from_email,
+        to=row.to,
+    )
+    if row.html_body:
+        message.attach_alternative(row.html_body, 'text/html')
+    for path in row.attachments:
+        message.attach_file(path)
+    return message
+
+
+def retry_delay(attempts):
+    """Backoff after the given number of failed attempts"""
+    seconds = settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, settings.OUTBOX_RETRY_MAX_SECONDS))
+
+
+def claim(batch_size):
+    """Due messages for this worker. Claimed rows are pushed OUTBOX_CLAIM_SECONDS
+    into the future, so other workers skip them unless this one dies."""
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            OutboxMessage.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        OutboxMessage.objects.filter(id__in=[row.id for row in rows]).update(
+            next_attempt_at=now + timedelta(seconds=settings.OUTBOX_CLAIM_SECONDS),
+        )
+    return rows
+
+
+def process(batch_size=None):
+    """Deliver one batch of due messages; returns counts of what happened"""
+    rows = claim(batch_size or settings.OUTBOX_BATCH_SIZE)
+    stats = {'claimed': len(rows), 'sent': 0, 'retried': 0, 'dead': 0}
+    if not rows:
+        return stats
+
+    messages = {}
+    failures = {}
+    for row in rows:
+        try:
+            messages[row.id] = to_message(row)
+        except Exception as e:
+            # e.g. an attachment that has since been deleted
+            failures[row.id] = e
+    report = mail_pool.get_engine().send(messages.values())
+    failed_messages = {id(message): error for message, error in report.failed}
+    for row_id, message in messages.items():
+        if id(message) in failed_messages:
+            failures[row_id] = failed_messages[id(message)]
+
+    now = timezone.now()
+    sent_ids = [row.id for row in rows if row.id not in failures]
+    OutboxMessage.objects.filter(id__in=sent_ids).update(
+        status='sent', sent_at=now, attempts=F('attempts') + 1, last_error='',
+    )
+    stats['sent'] = len(sent_ids)
+
+    for row in rows:
+        if row.id not in failures:
+            continue
+        attempts = row.attempts + 1
+        update = {'attempts': attempts, 'last_error': f'{type(failures[row.id]).__name__}: {failures[row.id]}'}
+        if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            update['status'] = 'dead'
+            stats['dead'] += 1
+        else:
+            update['next_attempt_at'] = now + retry_delay(attempts)
+            stats['retried'] += 1
+        OutboxMessage.objects.filter(id=row.id).update(**update)
+    return stats
+
+
+def retry_dead():
+    """Give dead-lettered messages a fresh set of attempts"""
+    return OutboxMessage.objects.filter(status='dead').update(
+        status='pending', attempts=0, next_attempt_at=timezone.now(),
+    )
+
+
+def prune_sent():
+    cutoff = timezone.now() - timedelta(days=settings.OUTBOX_KEEP_SENT_DAYS)
+    return OutboxMessage.objects.filter(status='sent', sent_at__lt=cutoff).delete()[0]
@@ -0,0 +1,124 @@
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values, direction):
+    """Pack the ordering values of a boundary row into an opaque token"""
+    payload = json.dumps({'d': direction, 'v': values}, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        direction, values = payload['d'], payload['v']
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor(token)
+    if direction not in ('next', 'prev') or not isinstance(values, list):
+        raise InvalidCursor(token)
+    return values, direction
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, prev_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """Cursor pagination over a unique ordering such as ('-date_posted', '-id').
+
+    Each page is fetched with a "seek" filter on the ordering columns
+    instead of an OFFSET, so page N costs the same as page 1. The last
+    ordering field must be unique (normally the primary key).
+    """
+
+    def __init__(self, queryset, ordering, per_page=20):
+        self.queryset = queryset
+        self.ordering = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+        self.per_page = per_page
+
+    def _to_python(self, name, value):
+        try:
+            field = self.queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Annotations such as search_rank round-trip through JSON as-is
+            return value
+        try:
+            return field.to_python(value)
+        except ValidationError:
+            raise InvalidCursor(value)
+
+    def _seek_filter(self, values, forward):
+        """Rows strictly after (forward) or before the boundary row"""
+        condition = Q()
+        for index, (name, descending) in enumerate(self.ordering):
+            lookup = 'lt' if descending == forward else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[index]})
+            for prior_index in range(index):
+                step &= Q(**{self.ordering[prior_index][0]: values[prior_index]})
+            condition |= step
+        return condition
+
+    def _order_by(self, forward):
+        return [
+            f'-{name}' if descending == forward else name
+            for name, descending in self.ordering
+        ]
+
+    def _cursor_values(self, obj):
+        return [getattr(obj, name) for name, _ in self.ordering]
+
+    def page(self, cursor=None):
+        values, direction = None, 'next'
+        if cursor:
+            try:
+                values, direction = decode_cursor(cursor)
+                if len(values) != len(self.ordering):
+                    raise InvalidCursor(cursor)
+                values = [self._to_python(name, value) for (name, _), value in zip(self.ordering, values)]
+            except InvalidCursor:
+                # A stale or tampered token just restarts from the first page
+                values, direction = None, 'next'
+
+        forward = direction == 'next'
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(values, forward))
+        rows = list(queryset.order_by(*self._order_by(forward))[:self.per_page + 1])
+
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        next_cursor = prev_cursor = None
+        if rows:
+            if (forward and has_more) or (not forward and values is not None):
+                next_cursor = encode_cursor(self._cursor_values(rows[-1]), 'next')
+            if (forward and values is not None) or (not forward and has_more):
+                prev_cursor = encode_cursor(self._cursor_values(rows[0]), 'prev')
+        return KeysetPage(rows, next_cursor, prev_cursor)
@@ -0,0 +1,372 @@
+"""
+Reverse ("percolator") matching of new jobs against job alerts.
+
+Rather than running every alert's query over the jobs table, each active
+alert is indexed in AlertTerm by a word a matching job has to contain the
+start of: the longest word of each keyword and of its location, cut to
+TERM_PREFIX_LENGTH characters. When a job is saved, the first characters
+of the job's own words look up the few alerts that could match, each
+candidate is checked exactly, and hits are stored as AlertMatch rows.
+send_job_alerts then just drains the pending matches.
+
+The exact check follows the same rule as JobAlert.get_criteria_jobs(),
+which seeds the matches of a new alert: every word of a keyword must
+start a word of the job ("dev" matches "developer"), so a job matches
+the same alerts whichever path finds it.
+
+Each alert also keeps a high-water mark, last_job_id: the highest job id
+among the matches a run has read for it. An edited job at or below the
+mark is not offered to the alert again, so a job is not emailed twice. A
+new job is matched whatever the marks say: ids can commit out of order,
+so a job below the mark may never have been seen. Runs move the mark and
+drop matches by the rows they actually read, never by a range of ids.
+
+JobAlert.pending_match_count is recounted from AlertMatch for just the
+alerts a change touches: a job posted or edited, an application made, a
+run sending or pruning matches. The alerts page then reads it instead of
+running every alert's query.
+"""
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import geo
+from .models import AlertMatch, AlertTerm, Application, JobAlert
+from .search import starts_words, tokenize
+
+KEYWORD_FIELDS = JobAlert.KEYWORD_FIELDS
+# Job fields an alert can match on; editing anything else never re-percolates
+MATCH_FIELDS = KEYWORD_FIELDS + ('location', 'latitude', 'longitude', 'job_type', 'posted_by_id')
+# Alert fields that change which jobs it matches
+CRITERIA_FIELDS = ('keywords', 'location', 'radius_km', 'job_type', 'is_active', 'user_id')
+MATCH_WINDOW = timedelta(days=7)
+# Longer alert words are indexed by their start, so a job looks up at most
+# this many prefixes of each of its words
+TERM_PREFIX_LENGTH = 6
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def criteria_key(alert):
+    """Alerts with equal keys match exactly the same jobs"""
+    keywords = tuple(sorted({' '.join(terms) for terms in alert.get_keyword_terms()}))
+    location = ' '.join(alert.get_location_terms())
+    return keywords, location, alert.radius_km if location else None, alert.job_type or ''
+
+
+def applied_job_ids(user_ids, job_ids=None):
+    """user id -> ids of the jobs they applied to, from one query"""
+    applied = {user_id: set() for user_id in user_ids}
+    applications = Application.objects.filter(applicant_id__in=applied)
+    if job_ids is not None:
+        applications = applications.filter(job_id__in=job_ids)
+    for user_id, job_id in applications.values_list('applicant_id', 'job_id'):
+        applied[user_id].add(job_id)
+    return applied
+
+
+def refresh_counts(alert_ids=None):
+    """Recount pending_match_count of the given alerts, or of all of them,
+    in one UPDATE"""
+    applied = Application.objects.filter(
+        applicant_id=OuterRef(OuterRef('user_id')), job_id=OuterRef('job_id'),
+    )
+    pending = (
+        AlertMatch.objects
+        .filter(
+            alert_id=OuterRef('pk'),
+            notified_at__isnull=True,
+            job__date_posted__gte=timezone.now() - MATCH_WINDOW,
+        )
+        .exclude(Exists(applied))
+        .order_by()
+        .values('alert_id')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    alerts = JobAlert.objects.all()
+    if alert_ids is not None:
+        alert_ids = list(alert_ids)
+        if not alert_ids:
+            return
+        alerts = alerts.filter(id__in=alert_ids)
+    alerts.update(pending_match_count=Coalesce(Subquery(pending), 0))
+
+
+def _index_term(terms):
+    """Start of the most selective of a keyword's or location's words"""
+    return max(terms, key=lambda term: (len(term), term))[:TERM_PREFIX_LENGTH]
+
+
+def _prefixes(words):
+    """Every index term a job word could be found under"""
+    return {
+        word[:length]
+        for word in words
+        for length in range(1, min(len(word), TERM_PREFIX_LENGTH) + 1)
+    }
+
+
+def _radius_point(alert):
+    if alert.location and alert.radius_km:
+        return geo.geocode(alert.location)
+    return None
+
+
+def alert_terms(alert):
+    """(field, term) pairs an alert is indexed under"""
+    # No keywords: every job is a candidate
+    keyword_terms = {_index_term(terms) for terms in alert.get_keyword_terms()} or {AlertTerm.ANY}
+
+    location_term = None
+    location_terms = alert.get_location_terms()
+    if location_terms and not _radius_point(alert):
+        location_term = _index_term(location_terms)
+    return (
+        [('keyword', term) for term in keyword_terms]
+        + [('location', location_term or AlertTerm.ANY)]
+    )
+
+
+def matches(alert, job):
+    """Whether ``job`` satisfies ``alert``'s criteria, checked in Python"""
+    if job.posted_by_id == alert.user_id:
+        return False
+    if alert.job_type and alert.job_type != job.job_type:
+        return False
+
+    keyword_terms = alert.get_keyword_terms()
+    if keyword_terms:
+        words = set().union(*(tokenize(getattr(job, field)) for field in KEYWORD_FIELDS))
+        if not any(starts_words(terms, words) for terms in keyword_terms):
+            return False
+
+    point = _radius_point(alert)
+    if point:
+        if job.latitude is None or job.longitude is None:
+            return False
+        return geo.distance_km(point[0], point[1], job.latitude, job.longitude) <= alert.radius_km
+    return starts_words(alert.get_location_terms(), tokenize(job.location))
+
+
+def candidate_alerts(job):
+    """Active alerts indexed under the job's words, before the exact check"""
+    keyword_words = set().union(*(tokenize(getattr(job, field)) for field in KEYWORD_FIELDS))
+    keyword_hits = AlertTerm.objects.filter(
+        field='keyword', term__in=_prefixes(keyword_words) | {AlertTerm.ANY},
+    ).values('alert_id')
+    location_hits = AlertTerm.objects.filter(
+        field='location', term__in=_prefixes(tokenize(job.location)) | {AlertTerm.ANY},
+    ).values('alert_id')
+    return (
+        JobAlert.objects
+        .filter(is_active=True, id__in=keyword_hits)
+        .filter(id__in=location_hits)
+        .filter(Q(job_type__isnull=True) | Q(job_type='') | Q(job_type=job.job_type))
+        .exclude(user_id=job.posted_by_id)
+    )
+
+
+def _changed(instance, fields):
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None:
+        return True
+    return any(field in loaded and loaded[field] != getattr(instance, field) for field in fields)
+
+
+def percolate(job, created):
+    """Record the alerts a new or edited job matches"""
+    if not created and not _changed(job, MATCH_FIELDS):
+        return
+    alerts = [alert for alert in candidate_alerts(job) if matches(alert, job)]
+    touched = {alert.id for alert in alerts}
+    with transaction.atomic():
+        if not created:
+            # An edit can take the job out of alerts it used to match, but
+            # doesn't offer it again to alerts that have moved past it
+            stale = AlertMatch.objects.filter(job=job, notified_at__isnull=True).exclude(alert_id__in=touched)
+            touched.update(stale.values_list('alert_id', flat=True))
+            stale.delete()
+            alerts = [alert for alert in alerts if job.id > alert.last_job_id]
+        AlertMatch.objects.bulk_create(
+            [AlertMatch(alert=alert, job=job) for alert in alerts],
+            ignore_conflicts=True,
+        )
+        refresh_counts(touched)
+
+
+def index_alert(alert, created=False):
+    """(Re)index an alert and seed its matches from jobs posted before it"""
+    if not created and not _changed(alert, CRITERIA_FIELDS):
+        return
+    with transaction.atomic():
+        alert.terms.all().delete()
+        if not alert.is_active:
+            refresh_counts([alert.id])
+            return
+        AlertTerm.objects.bulk_create([
+            AlertTerm(alert=alert, field=field, term=term) for field, term in alert_terms(alert)
+        ])
+        job_ids = list(alert.get_matching_jobs().values_list('id', flat=True))
+        alert.matches.filter(notified_at__isnull=True).exclude(job_id__in=job_ids).delete()
+        AlertMatch.objects.bulk_create(
+            [AlertMatch(alert=alert, job_id=job_id) for job_id in job_ids],
+            ignore_conflicts=True,
+        )
+        refresh_counts([alert.id])
+
+
+def rebuild(batch_size=None):
+    """Re-index every alert from scratch.
+
+    Alerts are seeded in chunks: alerts with the same criteria share one
+    jobs query, and the users' applications are read once per chunk.
+    """
+    batch_size = batch_size or settings.ALERT_BATCH_SIZE
+    with transaction.atomic():
+        AlertTerm.objects.all().delete()
+        AlertMatch.objects.filter(notified_at__isnull=True).delete()
+        alerts = JobAlert.objects.filter(is_active=True).order_by('id')
+        for chunk in chunked(alerts.iterator(chunk_size=batch_size), batch_size):
+            AlertTerm.objects.bulk_create([
+                AlertTerm(alert=alert, field=field, term=term)
+                for alert in chunk
+                for field, term in alert_terms(alert)
+            ])
+            groups = {}
+            for alert in chunk:
+                groups.setdefault(criteria_key(alert), []).append(alert)
+            seeds = {}
+            for group in groups.values():
+                jobs = list(
+                    group[0].get_criteria_jobs()
+                    .filter(id__gt=min(alert.last_job_id for alert in group))
+                    .values_list('id', 'posted_by_id')
+                )
+                for alert in group:
+                    seeds[alert] = [
+                        job_id for job_id, posted_by_id in jobs
+                        if job_id > alert.last_job_id and posted_by_id != alert.user_id
+                    ]
+            applied = applied_job_ids(
+                {alert.user_id for alert in chunk},
+                {job_id for job_ids in seeds.values() for job_id in job_ids},
+            )
+            AlertMatch.objects.bulk_create([
+                AlertMatch(alert=alert, job_id=job_id)
+                for alert, job_ids in seeds.items()
+                for job_id in job_ids
+                if job_id not in applied[alert.user_id]
+            ], ignore_conflicts=True, batch_size=1000)
+        refresh_counts()
+
+
+class PendingJobs(dict):
+    """alert id -> matched jobs not sent yet, newest first.
+    
+    Also keeps what was read to get there, for advance(): ``marks``, the
+    highest job id read for each alert, and ``passed``, the ids of the
+    matches left out because the user has applied to the job.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.marks = {}
+        self.passed = {}
+
+
+def pending_jobs(alerts):
+    """The alerts' pending jobs, as PendingJobs.
+
+    One query reads the pending matches of all the alerts and one more the
+    users' applications, so jobs they have applied to since are left out
+    in memory.
+    """
+    pending = PendingJobs()
+    alerts = list(alerts)
+    if not alerts:
+        return pending
+    matches = AlertMatch.objects.filter(
+        alert__in=alerts,
+        notified_at__isnull=True,
+        job__date_posted__gte=timezone.now() - MATCH_WINDOW,
+    ).select_related('job')
+    matches_by_alert = {}
+    for match in matches:
+        matches_by_alert.setdefault(match.alert_id, []).append(match)
+    applied = applied_job_ids(
+        {alert.user_id for alert in alerts},
+        {match.job_id for alert_matches in matches_by_alert.values() for match in alert_matches},
+    )
+    for alert in alerts:
+        alert_matches = matches_by_alert.get(alert.id, [])
+        jobs = [match.job for match in alert_matches if match.job_id not in applied[alert.user_id]]
+        jobs.sort(key=lambda job: (job.date_posted, job.id), reverse=True)
+        pending[alert.id] = jobs
+        if alert_matches:
+            pending.marks[alert.id] = max(match.job_id for match in alert_matches)
+        pending.passed[alert.id] = [
+            match.id for match in alert_matches if match.job_id in applied[alert.user_id]
+        ]
+    return pending
+
+
+def mark_notified(sent):
+    """Flag the matches sent in a run, given as alert id -> jobs"""
+    condition = Q()
+    for alert_id, jobs in sent.items():
+        condition |= Q(alert_id=alert_id, job_id__in=[job.id for job in jobs])
+    if condition:
+        AlertMatch.objects.filter(condition).update(notified_at=timezone.now())
+        refresh_counts(sent)
+
+
+def advance(alerts, pending):
+    """Move the marks of evaluated alerts up to the highest job id each one
+    read in ``pending`` and drop the matches it passed over. Only the rows
+    read are touched: a match committed since, even for a lower job id,
+    stays pending for the next run. Alerts moving to the same id share one
+    UPDATE."""
+    by_job_id = {}
+    for alert in alerts:
+        job_id = pending.marks.get(alert.id, 0)
+        if job_id > alert.last_job_id:
+            by_job_id.setdefault(job_id, []).append(alert)
+    for job_id, group in by_job_id.items():
+        JobAlert.objects.filter(id__in=[alert.id for alert in group], last_job_id__lt=job_id).update(last_job_id=job_id)
+        for alert in group:
+            alert.last_job_id = job_id
+    passed = {alert.id: pending.passed[alert.id] for alert in alerts if pending.passed.get(alert.id)}
+    if passed:
+        AlertMatch.objects.filter(
+            id__in=[match_id for match_ids in passed.values() for match_id in match_ids], notified_at__isnull=True,
+        ).delete()
+        refresh_counts(passed)
+
+
+def application_changed(application):
+    """Recount the applicant's alerts that matched the job they applied to"""
+    refresh_counts(
+        AlertMatch.objects
+        .filter(job_id=application.job_id, alert__user_id=application.applicant_id, notified_at__isnull=True)
+        .values_list('alert_id', flat=True)
+    )
+
+
+def prune():
+    """Drop matches for jobs too old to ever be sent"""
+    expired = AlertMatch.objects.filter(job__date_posted__lt=timezone.now() - MATCH_WINDOW)
+    # Jobs age out of the window without any write, so counts are corrected here
+    touched = set(expired.filter(notified_at__isnull=True).values_list('alert_id', flat=True))
+    deleted = expired.delete()[0]
+    refresh_counts(touched)
+    return deleted
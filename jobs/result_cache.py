@@ -0,0 +1,92 @@
+"""
+Cache of job_list result pages.
+
+Entries are keyed by (q, job_type, location, cursor) and the other filters,
+exactly as job_list queries them, and by the current jobs generation. Only
+q is reduced to its search terms, as that is all the search backends see.
+Every committed Job write bumps the generation, so every cached page is
+invalidated at once without tracking which pages a job appears on; the
+stale entries simply expire.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .search import tokenize
+
+GENERATION_KEY = 'jobs:generation'
+HITS_KEY = 'joblist:hits'
+MISSES_KEY = 'joblist:misses'
+
+
+def get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Start from the clock so an evicted counter never repeats an old generation
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def _digest(search_query, job_type, location, cursor, filters):
+    normalized = [
+        ' '.join(tokenize(search_query)),
+        job_type or '',
+        location or '',
+        cursor or '',
+        sorted((name, str(value)) for name, value in filters.items() if value),
+    ]
+    return hashlib.sha1(json.dumps(normalized).encode()).hexdigest()
+
+
+def make_key(search_query, job_type, location, cursor, **filters):
+    return f'joblist:{get_generation()}:{_digest(search_query, job_type, location, cursor, filters)}'
+
+
+def make_facets_key(search_query, job_type, location, **filters):
+    """Sidebar counts don't depend on the page, so all pages share them"""
+    return f'jobfacets:{get_generation()}:{_digest(search_query, job_type, location, None, filters)}'
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_page(key):
+    entry = cache.get(key)
+    _count(MISSES_KEY if entry is None else HITS_KEY)
+    return entry
+
+
+def set_page(key, entry):
+    cache.set(key, entry, settings.JOB_LIST_CACHE_TIMEOUT)
+
+
+def stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+        'generation': get_generation(),
+    }
+
+
+def reset_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
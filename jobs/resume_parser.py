@@ -1,94 +1,193 @@
+"""
+Resume text extraction and parsing.
+
+Text is streamed out of the file a page (PDF), a paragraph (DOCX) or a
+block (TXT) at a time, and reading stops once RESUME_MAX_PAGES pages or
+RESUME_MAX_CHARS characters have been collected. Files larger than
+RESUME_MAX_FILE_BYTES are refused before they are opened. Together these
+bound the memory a single upload can take in a worker, however long the
+document is.
+
+PDF support needs the pypdf package; DOCX and TXT use the standard library.
+"""
 import re
 import os
+import zipfile
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
+
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+TEXT_BLOCK_SIZE = 64 * 1024
+
+
+class ResumeParseError(ValueError):
+    pass
+
 
 class ResumeParser:
-    def __init__(self):
+    def __init__(self, max_pages=None, max_chars=None, max_bytes=None):
         # Regex patterns for basic extraction
         self.email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
         self.phone_pattern = r'(\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'
+        self.years_pattern = r'(\d{1,2}(?:\.\d)?)\+?\s*(?:years?|yrs?)\b(?:\s+of)?\s+(?:\w+\s+)?experience'
+        # Two to four capitalised words, such as "Jane Doe" or "Mary-Ann O'Neil"
+        self.name_pattern = r"[A-Z][A-Za-z.'-]*(?:\s+[A-Z][A-Za-z.'-]*){1,3}"
+        self.max_pages = max_pages or settings.RESUME_MAX_PAGES
+        self.max_chars = max_chars or settings.RESUME_MAX_CHARS
+        self.max_bytes = max_bytes or settings.RESUME_MAX_FILE_BYTES
         
     def extract_text(self, file_path, file_type):
-        """Mock text extraction - in real implementation, you'd use pdfplumber/docx"""
-        # For now, return mock text for testing
-        return """
-        John Doe
-        Software Developer
-        john.doe@email.com
-        +1-555-0123
-        New York, NY
-        
-        EXPERIENCE
-        Senior Software Developer at Tech Company (2020-Present)
-        - Developed web applications using Python and Django
-        - Led team of 5 developers
-        - Implemented REST APIs
-        
-        Junior Developer at Startup Inc (2018-2020)
-        - Built frontend with React
-        - Worked with SQL databases
-        
-        EDUCATION
-        Bachelor of Science in Computer Science
-        University of Technology (2014-2018)
-        
-        SKILLS
-        Python, Django, JavaScript, React, SQL, Git, AWS, Docker
-        """
+        """Text of the resume, up to the page and character budget"""
+        parts = []
+        remaining = self.max_chars
+        for block in self.iter_text(file_path, file_type):
+            parts.append(block[:remaining])
+            remaining -= len(parts[-1])
+            if remaining <= 0:
+                # Leaving the loop closes the generator and the file
+                break
+        return '\n'.join(parts)
+    
+    def iter_text(self, file_path, file_type):
+        """Yield the text of the file piece by piece"""
+        extractors = {
+            'pdf': self._pdf_pages,
+            'docx': self._docx_paragraphs,
+            'txt': self._text_blocks,
+        }
+        extractor = extractors.get((file_type or '').lower().lstrip('.'))
+        if extractor is None:
+            raise ResumeParseError(f'Unsupported resume format "{file_type}". Please upload PDF, DOCX, or TXT.')
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            raise ResumeParseError('The resume file could not be read.')
+        if size > self.max_bytes:
+            raise ResumeParseError(f'Resumes are limited to {filesizeformat(self.max_bytes)}.')
+        return extractor(file_path)
+    
+    def _pdf_pages(self, file_path):
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            raise ResumeParseError('PDF resumes need the pypdf package to be installed.')
+        with open(file_path, 'rb') as handle:
+            try:
+                # Objects are read from the file as pages ask for them
+                reader = PdfReader(handle)
+                for number, page in enumerate(reader.pages):
+                    if number >= self.max_pages:
+                        break
+                    yield page.extract_text() or ''
+            except Exception as e:
+                # Uploaded PDFs can be malformed in any number of ways
+                raise ResumeParseError(f'The PDF could not be read: {e}')
+    
+    def _docx_paragraphs(self, file_path):
+        try:
+            with zipfile.ZipFile(file_path) as archive, archive.open('word/document.xml') as document:
+                pages = 1
+                paragraph = []
+                # Counts down over the paragraph being collected too, so one
+                # huge paragraph can't outgrow the budget before it is yielded
+                remaining = self.max_chars
+                parents = []
+                # Parsed incrementally; each element is detached from its
+                # parent once read, so no part of the tree is kept
+                for event, element in ElementTree.iterparse(document, events=('start', 'end')):
+                    if event == 'start':
+                        parents.append(element)
+                        continue
+                    parents.pop()
+                    tag = element.tag
+                    text = ''
+                    if tag == WORD_NAMESPACE + 't':
+                        text = element.text or ''
+                    elif tag == WORD_NAMESPACE + 'tab':
+                        text = '\t'
+                    elif tag == WORD_NAMESPACE + 'br':
+                        if element.get(WORD_NAMESPACE + 'type') == 'page':
+                            pages += 1
+                        else:
+                            text = '\n'
+                    elif tag == WORD_NAMESPACE + 'lastRenderedPageBreak':
+                        pages += 1
+                    elif tag == WORD_NAMESPACE + 'p':
+                        if paragraph:
+                            yield ''.join(paragraph)
+                            paragraph = []
+                        if pages > self.max_pages:
+                            return
+                    if parents:
+                        parents[-1].remove(element)
+                    if text:
+                        paragraph.append(text[:remaining])
+                        remaining -= len(text)
+                        if remaining <= 0:
+                            yield ''.join(paragraph)
+                            return
+        except (zipfile.BadZipFile, KeyError, ElementTree.ParseError) as e:
+            raise ResumeParseError(f'The DOCX file could not be read: {e}')
+    
+    def _text_blocks(self, file_path):
+        with open(file_path, encoding='utf-8', errors='replace') as handle:
+            while block := handle.read(TEXT_BLOCK_SIZE):
+                yield block
     
     def parse_resume(self, file_path, file_type):
-        """Parse resume and return structured data"""
-        text = self.extract_text(file_path, file_type)
+        """Parse resume and return structured data. Only what is found in
+        the text is filled in; the rest is left empty."""
+        result = {
+            'raw_text': '',
+            'personal_info': {'full_name': '', 'email': '', 'phone': '', 'location': ''},
+            'education': [],
+            'experience': [],
+            'skills': [],
+            'years_experience': 0.0,
+            'summary': '',
+            'error': None,
+        }
+        try:
+            text = self.extract_text(file_path, file_type)
+        except ResumeParseError as e:
+            result['error'] = str(e)
+            return result
+        result['raw_text'] = text
         
         # Extract email
         emails = re.findall(self.email_pattern, text)
-        email = emails[0] if emails else ""
+        result['personal_info']['email'] = emails[0] if emails else ""
         
         # Extract phone
-        phones = re.findall(self.phone_pattern, text)
-        phone = phones[0] if phones else ""
+        phone = re.search(self.phone_pattern, text)
+        result['personal_info']['phone'] = phone.group(0).strip() if phone else ""
+        
+        result['personal_info']['full_name'] = self.find_name(text)
         
         # Simple skill extraction
         skills_keywords = ['python', 'django', 'javascript', 'react', 'sql', 'git', 'aws', 'docker', 
                           'html', 'css', 'java', 'c++', 'node.js', 'express', 'mongodb', 'postgresql']
-        found_skills = []
         text_lower = text.lower()
-        for skill in skills_keywords:
-            if skill in text_lower:
-                found_skills.append(skill)
+        result['skills'] = [skill for skill in skills_keywords if skill in text_lower]
         
-        # Mock data structure
-        return {
-            'raw_text': text,
-            'personal_info': {
-                'full_name': 'John Doe',
-                'email': email,
-                'phone': phone,
-                'location': 'New York, NY'
-            },
-            'education': [
-                {
-                    'institution': 'University of Technology',
-                    'degree': 'Bachelor',
-                    'dates': ['2014-2018'],
-                    'description': ['Bachelor of Science in Computer Science']
-                }
-            ],
-            'experience': [
-                {
-                    'title': 'Senior Software Developer',
-                    'company': 'Tech Company',
-                    'dates': ['2020-Present'],
-                    'description': ['Developed web applications using Python and Django', 'Led team of 5 developers']
-                },
-                {
-                    'title': 'Junior Developer',
-                    'company': 'Startup Inc',
-                    'dates': ['2018-2020'],
-                    'description': ['Built frontend with React', 'Worked with SQL databases']
-                }
-            ],
-            'skills': found_skills,
-            'years_experience': 6.0,
-            'summary': f"Experienced Software Developer with 6 years of experience skilled in {', '.join(found_skills[:3])}.",
-            'error': None
-        }
\ No newline at end of file
+        # "5 years of experience", "3+ yrs experience"
+        years = [float(number) for number in re.findall(self.years_pattern, text_lower)]
+        result['years_experience'] = max(years, default=0.0)
+        
+        summary = []
+        if result['years_experience']:
+            summary.append(f"{result['years_experience']:g} years of experience.")
+        if result['skills']:
+            summary.append(f"Skilled in {', '.join(result['skills'][:3])}.")
+        result['summary'] = ' '.join(summary)
+        return result
+    
+    def find_name(self, text):
+        """The first line of the resume when it reads like a name, else ''"""
+        for line in text.splitlines():
+            line = line.strip()
+            if line:
+                return line if re.fullmatch(self.name_pattern, line) else ''
+        return ''
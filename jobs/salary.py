@@ -0,0 +1,102 @@
+"""
+Normalization of the free-text Job.salary field.
+
+parse_salary("KES 80,000 - 120,000 per month") returns
+(960000, 1440000, 'KES', 'month'): the amounts are annualized so ranges
+from hourly, monthly and yearly postings can be compared and sorted with
+an index, while the period records how the salary was written.
+
+Amounts in different currencies are not comparable, so salary filters
+and sorting always apply within one currency.
+"""
+import re
+
+from django.conf import settings
+
+PERIOD_FACTORS = {
+    'hour': 2080,
+    'day': 260,
+    'week': 52,
+    'month': 12,
+    'year': 1,
+}
+
+PERIOD_PATTERNS = [
+    ('hour', r'\b(?:per\s+hour|hourly|an\s+hour|/\s*h(?:ou)?r|p/?h)\b'),
+    ('day', r'\b(?:per\s+day|daily|a\s+day|/\s*day|p/?d)\b'),
+    ('week', r'\b(?:per\s+week|weekly|a\s+week|/\s*w(?:ee)?k|p/?w)\b'),
+    ('month', r'\b(?:per\s+month|monthly|a\s+month|/\s*mo(?:nth)?|p\.?\s*m\.?|pcm)\b'),
+    ('year', r'\b(?:per\s+(?:year|annum)|yearly|annual(?:ly)?|a\s+year|/\s*y(?:ea)?r|p\.?\s*a\.?)\b'),
+]
+
+CURRENCY_PATTERNS = [
+    ('KES', r'\bk(?:e)?sh?s?\b\.?|\bkes\b'),
+    ('USD', r'\$|\busd\b'),
+    ('GBP', r'£|\bgbp\b'),
+    ('EUR', r'€|\beur\b'),
+    ('UGX', r'\bugx\b|\bush\b'),
+    ('TZS', r'\btzs\b'),
+    ('NGN', r'₦|\bngn\b'),
+    ('ZAR', r'\bzar\b'),
+    ('INR', r'₹|\binr\b'),
+]
+
+CURRENCIES = [code for code, _ in CURRENCY_PATTERNS]
+
+AMOUNT_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(k|m)?\b')
+MULTIPLIERS = {'k': 1000, 'm': 1000000, '': 1}
+# Largest annual amount taken as a real salary, in any currency. Well inside
+# the salary_min/salary_max bigint columns; anything above is a typo or junk.
+MAX_ANNUAL_SALARY = 10 ** 12
+
+
+def parse_salary(text):
+    """(annual_min, annual_max, currency, period) parsed from a salary
+    string, or all None when it holds no amount ("Negotiable") or one too
+    large to be a salary"""
+    if not text:
+        return None, None, None, None
+    lowered = str(text).lower()
+    # Drop thousands separators: "50,000" and "50 000" -> "50000"
+    cleaned = re.sub(r'(?<=\d)[,\s](?=\d{3}\b)', '', lowered)
+
+    amounts = [
+        float(number) * MULTIPLIERS[suffix]
+        for number, suffix in AMOUNT_RE.findall(cleaned)[:2]
+    ]
+    amounts = [amount for amount in amounts if amount > 0]
+    if not amounts:
+        return None, None, None, None
+
+    period = settings.SALARY_DEFAULT_PERIOD
+    for name, pattern in PERIOD_PATTERNS:
+        if re.search(pattern, cleaned):
+            period = name
+            break
+
+    currency = written_currency(cleaned) or settings.SALARY_DEFAULT_CURRENCY
+
+    factor = PERIOD_FACTORS[period]
+    low, high = min(amounts) * factor, max(amounts) * factor
+    if high > MAX_ANNUAL_SALARY:
+        return None, None, None, None
+    return round(low), round(high), currency, period
+
+
+def written_currency(text):
+    """The currency code a salary string names, or None"""
+    lowered = str(text or '').lower()
+    for code, pattern in CURRENCY_PATTERNS:
+        if re.search(pattern, lowered):
+            return code
+    return None
+
+
+def format_salary(text, currency):
+    """The salary as written, prefixed with its parsed currency when the
+    text doesn't name one ("80,000 monthly" -> "KES 80,000 monthly")"""
+    if not text:
+        return ''
+    if currency and not written_currency(text):
+        return f'{currency} {text}'
+    return text
@@ -0,0 +1,161 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+# Columns covered by the full-text index, in weight order
+SEARCH_COLUMNS = ('title', 'company_name', 'location', 'description')
+
+
+def tokenize(text):
+    """Split free text into lowercase search terms"""
+    return [word.lower() for word in WORD_RE.findall(text or '')]
+
+
+def word_start_filter(fields, term):
+    """Rows where a word of one of ``fields`` starts with ``term``, the
+    prefix rule the full-text backends use ("dev" finds "developer")"""
+    pattern = r'\b' + re.escape(term)
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__iregex': pattern})
+    return condition
+
+
+def starts_words(terms, words):
+    """Whether every term starts one of ``words``; word_start_filter in Python"""
+    return all(any(word.startswith(term) for word in words) for term in terms)
+
+
+class BaseSearchBackend:
+    """Interface every job search backend implements.
+
+    search() takes a Job queryset and returns it filtered to the jobs that
+    match every term of the query, annotated with a ``search_rank`` float
+    where higher means more relevant.
+    """
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+    def index_job(self, job):
+        """Called after a job is created or edited"""
+
+    def remove_job(self, job_id):
+        """Called after a job is deleted"""
+
+    def rebuild(self):
+        """Re-index every job from scratch"""
+
+
+class IcontainsSearchBackend(BaseSearchBackend):
+    """Fallback for databases without a native full-text index"""
+
+    def search(self, queryset, query):
+        for term in tokenize(query):
+            term_query = Q()
+            for column in SEARCH_COLUMNS:
+                term_query |= Q(**{f'{column}__icontains': term})
+            queryset = queryset.filter(term_query)
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class MySQLFulltextSearchBackend(BaseSearchBackend):
+    """InnoDB FULLTEXT index, maintained by MySQL itself"""
+
+    index_name = 'jobs_job_search_ft'
+
+    def _match_sql(self, queryset):
+        qn = connection.ops.quote_name
+        table = qn(queryset.model._meta.db_table)
+        columns = ', '.join(f'{table}.{qn(column)}' for column in SEARCH_COLUMNS)
+        return f'MATCH ({columns}) AGAINST (%s IN BOOLEAN MODE)'
+
+    def search(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+        # Every term is required and may be a prefix ("develop" finds "developer")
+        boolean_query = ' '.join(f'+{term}*' for term in terms)
+        match_sql = self._match_sql(queryset)
+        return queryset.extra(where=[match_sql], params=[boolean_query]).annotate(
+            search_rank=RawSQL(match_sql, [boolean_query], output_field=FloatField())
+        )
+
+
+class SQLiteFTS5SearchBackend(BaseSearchBackend):
+    """FTS5 virtual table for development and tests.
+
+    The virtual table keeps its own copy of the indexed columns, keyed by
+    rowid = job id, and is kept in sync from the Job signals.
+    """
+
+    table = 'jobs_job_fts'
+    # bm25 column weights, same order as SEARCH_COLUMNS
+    weights = (10.0, 5.0, 2.0, 1.0)
+
+    def search(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+        # Space separated phrases are ANDed together by FTS5
+        match_query = ' '.join(f'"{term}"*' for term in terms)
+        job_table = queryset.model._meta.db_table
+        weights = ', '.join(str(weight) for weight in self.weights)
+        return queryset.extra(
+            tables=[self.table],
+            where=[f'{self.table}.rowid = {job_table}.id', f'{self.table} MATCH %s'],
+            params=[match_query],
+        ).annotate(
+            search_rank=RawSQL(f'-bm25({self.table}, {weights})', [], output_field=FloatField())
+        )
+
+    def index_job(self, job):
+        values = [getattr(job, column) or '' for column in SEARCH_COLUMNS]
+        columns = ', '.join(SEARCH_COLUMNS)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [job.pk])
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, {columns}) VALUES (%s, %s, %s, %s, %s)',
+                [job.pk] + values,
+            )
+
+    def remove_job(self, job_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [job_id])
+
+    def rebuild(self):
+        columns = ', '.join(SEARCH_COLUMNS)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, {columns}) '
+                f'SELECT id, {columns} FROM jobs_job'
+            )
+
+
+VENDOR_BACKENDS = {
+    'mysql': MySQLFulltextSearchBackend,
+    'sqlite': SQLiteFTS5SearchBackend,
+}
+
+_backend = None
+
+
+def get_search_backend():
+    """Return the configured search backend, picking one by database vendor
+    when settings.JOB_SEARCH_BACKEND is not set"""
+    global _backend
+    if _backend is None:
+        backend_path = getattr(settings, 'JOB_SEARCH_BACKEND', None)
+        if backend_path:
+            backend_class = import_string(backend_path)
+        else:
+            backend_class = VENDOR_BACKENDS.get(connection.vendor, IcontainsSearchBackend)
+        _backend = backend_class()
+    return _backend
@@ -0,0 +1,49 @@
+"""
+One-pass execution of a job search: the result page plus a total.
+
+The page is read with a single keyset query. The total costs nothing when
+the whole result fits on the first page; otherwise it is a COUNT over at
+most SEARCH_EXACT_COUNT_LIMIT + 1 rows, so a broad search on a large table
+reports "10,000+" instead of counting every match.
+"""
+from django.conf import settings
+
+from .pagination import KeysetPaginator
+
+
+class SearchResult:
+    def __init__(self, page, total, total_is_estimate=False):
+        self.page = page
+        self.total = total
+        self.total_is_estimate = total_is_estimate
+
+    def __iter__(self):
+        return iter(self.page)
+
+    def __len__(self):
+        return len(self.page)
+
+    def __bool__(self):
+        return bool(self.page)
+
+
+class SearchExecutor:
+    def __init__(self, queryset, ordering, per_page=None, count_limit=None):
+        self.queryset = queryset
+        self.ordering = ordering
+        self.per_page = per_page or settings.JOBS_PER_PAGE
+        self.count_limit = count_limit if count_limit is not None else settings.SEARCH_EXACT_COUNT_LIMIT
+
+    def execute(self, cursor=None):
+        page = KeysetPaginator(self.queryset, self.ordering, self.per_page).page(cursor)
+        if not page.has_previous and not page.has_next:
+            return SearchResult(page, len(page))
+        total = self.count()
+        if total > self.count_limit:
+            return SearchResult(page, self.count_limit, total_is_estimate=True)
+        return SearchResult(page, total)
+
+    def count(self):
+        """Exact number of matches, or count_limit + 1 if there are more"""
+        # Ordering is irrelevant to the count and would only slow the subquery
+        return self.queryset.order_by()[:self.count_limit + 1].count()
@@ -1,7 +1,16 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import UserProfile
+from .models import UserProfile, Job, Company, JobAlert, Application, AlertMatch
+from .search import get_search_backend
+from . import facets
+from . import fuzzy
+from . import result_cache
+from . import percolator
+from . import instant_alerts
+from . import job_cards
+from .autocomplete import index as autocomplete_index
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -14,4 +23,90 @@ def save_user_profile(sender, instance, **kwargs):
         instance.userprofile.save()
     else:
         # Create profile if it doesn't exist (for existing users)
-        UserProfile.objects.create(user=instance)
\ No newline at end of file
+        UserProfile.objects.create(user=instance)
+
+@receiver(post_save, sender=Job)
+def index_job(sender, instance, **kwargs):
+    get_search_backend().index_job(instance)
+
+@receiver(post_delete, sender=Job)
+def unindex_job(sender, instance, **kwargs):
+    get_search_backend().remove_job(instance.pk)
+
+@receiver(post_save, sender=Job)
+def update_job_facets(sender, instance, created, **kwargs):
+    facets.job_saved(instance, created)
+
+@receiver(post_delete, sender=Job)
+def remove_job_facets(sender, instance, **kwargs):
+    facets.job_deleted(instance)
+
+@receiver(post_save, sender=Job)
+def update_autocomplete(sender, instance, created, **kwargs):
+    autocomplete_index.job_saved(instance, created)
+
+@receiver(post_delete, sender=Job)
+def remove_from_autocomplete(sender, instance, **kwargs):
+    autocomplete_index.job_deleted(instance)
+
+@receiver(post_save, sender=Job)
+def update_job_trigrams(sender, instance, created, **kwargs):
+    fuzzy.job_saved(instance, created)
+
+@receiver(post_delete, sender=Job)
+def remove_job_trigrams(sender, instance, **kwargs):
+    fuzzy.job_deleted(instance)
+
+@receiver(post_save, sender=Company)
+def update_company_trigrams(sender, instance, created, **kwargs):
+    fuzzy.company_saved(instance, created)
+
+@receiver(post_delete, sender=Company)
+def remove_company_trigrams(sender, instance, **kwargs):
+    fuzzy.company_deleted(instance)
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def bump_jobs_generation(sender, **kwargs):
+    # Not before the commit, or a concurrent request could cache the old
+    # results under the new generation
+    transaction.on_commit(result_cache.bump_generation)
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_job_card(sender, instance, **kwargs):
+    job_cards.job_changed(instance)
+
+@receiver(post_save, sender=Job)
+def percolate_job(sender, instance, created, **kwargs):
+    # A new job's matches and its instant alert queue entry are written
+    # together, so the consumer never sees one without the other
+    with transaction.atomic():
+        percolator.percolate(instance, created)
+        if created:
+            instant_alerts.enqueue(instance)
+
+@receiver(pre_delete, sender=Job)
+def remember_job_alerts(sender, instance, **kwargs):
+    # The job's matches are gone by post_delete
+    instance._matched_alert_ids = list(
+        AlertMatch.objects.filter(job=instance, notified_at__isnull=True).values_list('alert_id', flat=True)
+    )
+
+@receiver(post_delete, sender=Job)
+def recount_job_alerts(sender, instance, **kwargs):
+    percolator.refresh_counts(getattr(instance, '_matched_alert_ids', []))
+
+@receiver(post_save, sender=Application)
+def count_new_application(sender, instance, created, **kwargs):
+    # A status change doesn't affect the counts
+    if created:
+        percolator.application_changed(instance)
+
+@receiver(post_delete, sender=Application)
+def count_withdrawn_application(sender, instance, **kwargs):
+    percolator.application_changed(instance)
+
+@receiver(post_save, sender=JobAlert)
+def index_job_alert(sender, instance, created, **kwargs):
+    percolator.index_alert(instance, created)
@@ -0,0 +1,72 @@
+"""
+A local SMTP server that accepts every message and throws it away.
+
+Used by benchmark_mail to measure delivery throughput without a real
+relay. An optional per-reply delay stands in for the round trip to a
+remote server, which is what connection pooling and concurrency hide.
+"""
+import socketserver
+import threading
+import time
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.reply('220 jobboard SMTP sink')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command in (b'EHLO', b'HELO'):
+                self.reply('250 jobboard SMTP sink')
+            elif command in (b'MAIL', b'RCPT', b'RSET', b'NOOP'):
+                self.reply('250 OK')
+            elif command == b'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data.rstrip(b'\r\n') == b'.':
+                        break
+                self.server.count_message()
+                self.reply('250 OK queued')
+            elif command == b'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    handler_class = SMTPSinkHandler
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0):
+        super().__init__((host, port), self.handler_class)
+        self.latency = latency_ms / 1000
+        self.received = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def count_message(self):
+        with self._lock:
+            self.received += 1
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def port(self):
+        return self.server_address[1]
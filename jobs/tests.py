@@ -1,3 +1,1123 @@
-from django.test import TestCase
+import importlib.util
+import json
+import os
+import socket
+import tempfile
+import zipfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail import EmailMessage
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    alert_runner, alert_slots, benchmark, facets, fuzzy, geo, instant_alerts, mail_pool,
+    outbox, percolator, result_cache, signals,
+)
+from .autocomplete import PrefixIndex
+from .forms import JobAlertForm
+from .job_cards import CardRenderer
+from .models import (
+    AlertMatch, AlertRun, Application, Company, Job, JobAlert, JobFacet, JobQueueEntry, OutboxMessage,
+    ParsedResume, Resume,
+)
+from .pagination import KeysetPaginator
+from .resume_parser import WORD_NAMESPACE, ResumeParser
+from .salary import format_salary, parse_salary
+from .search import get_search_backend, tokenize
+from .search_executor import SearchExecutor
+from .smtp_sink import SMTPSink, SMTPSinkHandler
+
+
+def make_job(poster, **fields):
+    """A job with sensible defaults for whatever the test doesn't care about"""
+    values = {
+        'title': 'Python Developer',
+        'company_name': 'Acacia Labs',
+        'location': 'Nairobi',
+        'description': 'Build Django apps.',
+        'job_type': 'full-time',
+        'posted_by': poster,
+    }
+    values.update(fields)
+    return Job.objects.create(**values)
+
+
+class JobBoardTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.poster = User.objects.create_user('poster', 'poster@example.com', 'secret')
+
+
+class SearchBackendTests(JobBoardTestCase):
+    def test_tokenize(self):
+        self.assertEqual(tokenize('Senior  Python-Developer!'), ['senior', 'python', 'developer'])
+        self.assertEqual(tokenize(None), [])
+
+    def test_every_term_must_match(self):
+        match = make_job(self.poster, title='Senior Python Developer')
+        make_job(self.poster, title='Java Developer', description='Spring.')
+        found = get_search_backend().search(Job.objects.all(), 'python developer')
+        self.assertEqual(list(found), [match])
+
+    def test_terms_match_as_prefixes(self):
+        match = make_job(self.poster, title='Developer')
+        self.assertEqual(list(get_search_backend().search(Job.objects.all(), 'develop')), [match])
+
+    def test_title_ranks_above_description(self):
+        in_description = make_job(self.poster, title='Engineer', description='Some kotlin work.')
+        in_title = make_job(self.poster, title='Kotlin Engineer', description='Mobile apps.')
+        found = get_search_backend().search(Job.objects.all(), 'kotlin').order_by('-search_rank')
+        self.assertEqual(list(found), [in_title, in_description])
+
+    def test_edits_and_deletes_are_reindexed(self):
+        job = make_job(self.poster, title='Accountant')
+        job.title = 'Auditor'
+        job.save()
+        backend = get_search_backend()
+        self.assertFalse(backend.search(Job.objects.all(), 'accountant').exists())
+        self.assertTrue(backend.search(Job.objects.all(), 'auditor').exists())
+        job.delete()
+        self.assertFalse(backend.search(Job.objects.all(), 'auditor').exists())
+
+    def test_query_without_terms_is_still_ranked(self):
+        job = make_job(self.poster)
+        found = get_search_backend().search(Job.objects.all(), '!!!').order_by('-search_rank')
+        self.assertEqual(list(found), [job])
+
+    def test_job_list_with_punctuation_only_query(self):
+        job = make_job(self.poster)
+        response = self.client.get(reverse('job_list'), {'q': '!!!'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['jobs']), [job])
+
+
+class KeysetPaginationTests(JobBoardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.jobs = [make_job(self.poster, title=f'Job {number}') for number in range(5)]
+        self.paginator = KeysetPaginator(Job.objects.all(), ('-date_posted', '-id'), per_page=2)
+
+    def test_walks_forward_and_back(self):
+        newest_first = sorted(self.jobs, key=lambda job: (job.date_posted, job.id), reverse=True)
+        first = self.paginator.page()
+        self.assertEqual(list(first), newest_first[:2])
+        self.assertFalse(first.has_previous)
+        second = self.paginator.page(first.next_cursor)
+        self.assertEqual(list(second), newest_first[2:4])
+        last = self.paginator.page(second.next_cursor)
+        self.assertEqual(list(last), newest_first[4:])
+        self.assertFalse(last.has_next)
+        self.assertEqual(list(self.paginator.page(last.prev_cursor)), newest_first[2:4])
+        self.assertEqual(list(self.paginator.page(second.prev_cursor)), newest_first[:2])
+
+    def test_bad_cursor_restarts_from_first_page(self):
+        self.assertEqual(list(self.paginator.page('not-a-cursor')), list(self.paginator.page()))
+
+    def test_job_list_follows_cursor(self):
+        with self.settings(JOBS_PER_PAGE=3):
+            first = self.client.get(reverse('job_list')).context['page']
+            second = self.client.get(reverse('job_list'), {'cursor': first.next_cursor}).context['page']
+        self.assertEqual(len(first) + len(second), 5)
+        self.assertFalse(set(first) & set(second))
+
+
+class FacetTests(JobBoardTestCase):
+    def setUp(self):
+        super().setUp()
+        make_job(self.poster, job_type='full-time', location='Nairobi')
+        make_job(self.poster, job_type='full-time', location='Mombasa')
+        make_job(self.poster, job_type='contract', location='Nairobi', title='Data Analyst')
+
+    def test_counts_follow_job_writes(self):
+        job = Job.objects.get(job_type='contract')
+        job.job_type = 'part-time'
+        job.save()
+        make_job(self.poster, location='Kisumu')
+        Job.objects.filter(location='Mombasa').get().delete()
+        counts = facets.global_counts()
+        facets.rebuild()
+        self.assertEqual(counts, facets.global_counts())
+        self.assertEqual(counts['job_type'], {'full-time': 2, 'part-time': 1})
+        self.assertEqual(counts['location'], {'Nairobi': 2, 'Kisumu': 1})
+        self.assertFalse(JobFacet.objects.filter(count__lte=0).exists())
+
+    def sidebar(self, **params):
+        context = self.client.get(reverse('job_list'), params).context
+        job_types = {value: count for value, _, count in context['job_types']}
+        return job_types, dict(context['locations']), context['facet_counts_are_estimates']
+
+    def test_unfiltered_counts_come_from_the_store(self):
+        job_types, locations, estimated = self.sidebar()
+        self.assertEqual(job_types['full-time'], 2)
+        self.assertEqual(locations, {'Nairobi': 2, 'Mombasa': 1})
+        self.assertFalse(estimated)
+
+    def test_a_facet_ignores_its_own_filter(self):
+        job_types, locations, _ = self.sidebar(job_type='contract')
+        self.assertEqual(job_types['full-time'], 2)
+        self.assertEqual(job_types['contract'], 1)
+        self.assertEqual(locations, {'Nairobi': 1, 'Mombasa': 0})
+
+    def test_counts_are_scoped_to_the_search(self):
+        job_types, locations, _ = self.sidebar(q='python')
+        self.assertEqual(job_types['full-time'], 2)
+        self.assertEqual(job_types['contract'], 0)
+        self.assertEqual(locations, {'Nairobi': 1, 'Mombasa': 1})
+
+    def test_grouped_count_is_capped(self):
+        counts, capped = facets.result_counts(Job.objects.all(), 'location', limit=2)
+        self.assertTrue(capped)
+        self.assertEqual(sum(counts.values()), 3)
+        counts, capped = facets.result_counts(Job.objects.all(), 'location', limit=10)
+        self.assertFalse(capped)
+        self.assertEqual(counts, {'Nairobi': 2, 'Mombasa': 1})
+
+
+class ResultCacheTests(JobBoardTestCase):
+    def test_generation_is_bumped_on_commit(self):
+        generation = result_cache.get_generation()
+        with self.captureOnCommitCallbacks() as callbacks:
+            make_job(self.poster)
+            self.assertEqual(result_cache.get_generation(), generation)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(result_cache.get_generation(), generation)
+
+    def test_cached_page_until_a_job_is_written(self):
+        first = make_job(self.poster, title='First')
+        self.client.get(reverse('job_list'))
+        self.assertEqual(result_cache.stats()['misses'], 1)
+        self.assertEqual(len(self.client.get(reverse('job_list')).context['jobs']), 1)
+        self.assertEqual(result_cache.stats()['hits'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            second = make_job(self.poster, title='Second')
+        jobs = self.client.get(reverse('job_list')).context['jobs']
+        self.assertEqual(set(jobs), {first, second})
+
+    def test_padded_filters_share_the_page_of_the_trimmed_ones(self):
+        job = make_job(self.poster, job_type='full-time')
+        trimmed = self.client.get(reverse('job_list'), {'job_type': 'full-time'}).context['jobs']
+        padded = self.client.get(reverse('job_list'), {'job_type': ' full-time '}).context['jobs']
+        self.assertEqual(list(trimmed), [job])
+        self.assertEqual(list(padded), [job])
+        self.assertEqual(result_cache.stats()['hits'], 1)
+
+    def test_key_keeps_the_values_the_query_uses(self):
+        self.assertNotEqual(
+            result_cache.make_key('', 'full-time', '', None),
+            result_cache.make_key('', 'Full-Time', '', None),
+        )
+        self.assertEqual(
+            result_cache.make_key('python  developer!', '', '', None),
+            result_cache.make_key('Python developer', '', '', None),
+        )
+
+
+class AutocompleteTests(JobBoardTestCase):
+    def setUp(self):
+        super().setUp()
+        make_job(self.poster, title='Python Developer')
+        make_job(self.poster, title='Python Developer', company_name='Pythonic Ltd')
+        make_job(self.poster, title='Data Analyst')
+        self.index = PrefixIndex()
+        self.index.load()
+
+    def texts(self, prefix, limit=10):
+        return [suggestion['text'] for suggestion in self.index.suggest(prefix, limit)]
+
+    def test_matches_any_word_start_ranked_by_jobs(self):
+        self.assertEqual(self.texts('pyth'), ['Python Developer', 'Pythonic Ltd'])
+        self.assertEqual(self.texts('dev'), ['Python Developer'])
+        self.assertEqual(self.texts('p'), [])
+
+    def test_follows_job_writes(self):
+        with mock.patch('jobs.signals.autocomplete_index', self.index):
+            job = make_job(self.poster, title='Pharmacist')
+            self.assertEqual(self.texts('pharm'), ['Pharmacist'])
+            job = Job.objects.get(pk=job.pk)
+            job.title = 'Chemist'
+            job.save()
+            self.assertEqual(self.texts('pharm'), [])
+            self.assertEqual(self.texts('chem'), ['Chemist'])
+            job.delete()
+            self.assertEqual(self.texts('chem'), [])
+
+    def test_cold_index_loads_in_the_background(self):
+        cold = PrefixIndex()
+        with mock.patch('jobs.autocomplete.threading.Thread') as thread:
+            self.assertEqual(cold.suggest('python'), [])
+            self.assertEqual(cold.suggest('python'), [])
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once()
+        self.assertIsNone(cold.loaded_at)
+
+    def test_endpoint_limit_is_at_least_one(self):
+        with mock.patch('jobs.views.autocomplete_index', self.index):
+            response = self.client.get(reverse('job_autocomplete'), {'q': 'pyth', 'limit': '-3'})
+        self.assertEqual(len(response.json()['suggestions']), 1)
+
+
+class FuzzySearchTests(JobBoardTestCase):
+    def setUp(self):
+        super().setUp()
+        make_job(self.poster, title='Python Developer')
+        Company.objects.create(name='Savannah Technologies', description='x', location='Nairobi', created_by=self.poster)
+
+    def test_similar_terms(self):
+        terms = [term for term, _, _ in fuzzy.similar_terms('pythn', fuzzy.JOB_FIELDS)]
+        self.assertEqual(terms[0], 'python')
+
+    def test_did_you_mean(self):
+        self.assertEqual(fuzzy.did_you_mean('pythn develper', fuzzy.JOB_FIELDS), 'python developer')
+        self.assertEqual(fuzzy.did_you_mean('python developer', fuzzy.JOB_FIELDS), '')
+
+    def test_job_list_retries_a_misspelt_query(self):
+        context = self.client.get(reverse('job_list'), {'q': 'pythn'}).context
+        self.assertEqual(context['corrected_query'], 'python')
+        self.assertEqual(len(context['jobs']), 1)
+
+    def test_terms_follow_job_writes(self):
+        job = Job.objects.get()
+        job.title = 'Golang Developer'
+        job.save()
+        self.assertEqual(fuzzy.did_you_mean('pythn', fuzzy.JOB_FIELDS), '')
+        self.assertEqual(fuzzy.did_you_mean('golnag', fuzzy.JOB_FIELDS), 'golang')
+
+    def test_company_search_corrects_typos(self):
+        companies, corrected = fuzzy.search_companies(Company.objects.all(), 'savana')
+        self.assertEqual(corrected, 'savannah')
+        self.assertEqual([company.name for company in companies], ['Savannah Technologies'])
+        companies, corrected = fuzzy.search_companies(Company.objects.all(), 'sav tech')
+        self.assertEqual(corrected, '')
+        self.assertEqual(companies.count(), 1)
+
+
+class GeoSearchTests(JobBoardTestCase):
+    def test_geocode_prefers_the_most_specific_place(self):
+        self.assertEqual(geo.geocode('Westlands, Nairobi'), geo.gazetteer()['westlands'])
+        self.assertEqual(geo.geocode('Nbi'), geo.gazetteer()['nairobi'])
+        self.assertIsNone(geo.geocode('Remote'))
+
+    def test_jobs_are_geocoded_on_save(self):
+        job = make_job(self.poster, location='Mombasa')
+        self.assertIsNotNone(job.geo_cell)
+        self.assertIsNone(make_job(self.poster, location='Remote').geo_cell)
+
+    def test_within_radius(self):
+        thika = make_job(self.poster, location='Thika')
+        make_job(self.poster, location='Mombasa')
+        make_job(self.poster, location='Remote')
+        latitude, longitude = geo.geocode('Nairobi')
+        found = list(geo.within_radius(Job.objects.all(), latitude, longitude, 50))
+        self.assertEqual(found, [thika])
+        self.assertAlmostEqual(found[0].distance_km, geo.distance_km(latitude, longitude, *geo.geocode('Thika')), 3)
+
+    def test_job_list_radius_search(self):
+        karen = make_job(self.poster, location='Karen')
+        make_job(self.poster, location='Kisumu')
+        context = self.client.get(reverse('job_list'), {'near': 'Nairobi', 'radius': 25}).context
+        self.assertEqual(list(context['jobs']), [karen])
+        context = self.client.get(reverse('job_list'), {'near': 'Atlantis', 'radius': 25}).context
+        self.assertTrue(context['unknown_place'])
+
+    def test_alert_matches_by_radius(self):
+        nakuru = make_job(self.poster, location='Nakuru')
+        make_job(self.poster, location='Mombasa')
+        alert = JobAlert.objects.create(user=self.poster, name='Near Nairobi', location='Nairobi', radius_km=200)
+        self.assertEqual(list(alert.get_criteria_jobs()), [nakuru])
+
+
+class SalaryTests(JobBoardTestCase):
+    def test_parse_salary(self):
+        self.assertEqual(parse_salary('KES 80,000 - 120,000 per month'), (960000, 1440000, 'KES', 'month'))
+        self.assertEqual(parse_salary('$90k - $110k'), (90000, 110000, 'USD', 'year'))
+        self.assertEqual(parse_salary('USD 40/hr'), (83200, 83200, 'USD', 'hour'))
+        self.assertEqual(parse_salary('Negotiable'), (None, None, None, None))
+
+    def test_absurd_amounts_are_left_unparsed(self):
+        for text in ('99999999999999999999999', '5000000000000000 per hour', '9' * 400):
+            self.assertEqual(parse_salary(text), (None, None, None, None))
+        job = make_job(self.poster, salary='5000000000000000 per hour')
+        self.assertEqual((job.salary_min, job.salary_max), (None, None))
+        self.assertEqual(Job.objects.get(id=job.id).salary, '5000000000000000 per hour')
+
+    def test_unnamed_currency_uses_the_default(self):
+        with self.settings(SALARY_DEFAULT_CURRENCY='KES'):
+            self.assertEqual(parse_salary('50,000 monthly')[2], 'KES')
+
+    def test_format_salary(self):
+        self.assertEqual(format_salary('50,000 monthly', 'KES'), 'KES 50,000 monthly')
+        self.assertEqual(format_salary('$90k', 'USD'), '$90k')
+        self.assertEqual(format_salary('', 'KES'), '')
+
+    def ids(self, **params):
+        return [job.id for job in self.client.get(reverse('job_list'), params).context['jobs']]
+
+    def test_range_filter_and_sort_stay_within_one_currency(self):
+        kes = make_job(self.poster, salary='KES 120,000 per month')
+        usd = make_job(self.poster, salary='$100k')
+        cheap_usd = make_job(self.poster, salary='$40k')
+        make_job(self.poster, salary='Negotiable')
+        self.assertEqual(self.ids(min_salary='90k', currency='USD'), [usd.id])
+        self.assertEqual(self.ids(min_salary='90k', currency='KES'), [kes.id])
+        self.assertEqual(self.ids(sort='salary', currency='USD'), [usd.id, cheap_usd.id])
+        self.assertEqual(self.ids(sort='salary'), [kes.id])
+        self.assertEqual(self.ids(sort='salary', currency='XYZ'), [kes.id])
+
+
+class SearchExecutorTests(JobBoardTestCase):
+    def setUp(self):
+        super().setUp()
+        for number in range(5):
+            make_job(self.poster, title=f'Job {number}')
+        self.ordering = ('-date_posted', '-id')
+
+    def test_single_page_needs_no_count_query(self):
+        with self.assertNumQueries(1):
+            result = SearchExecutor(Job.objects.all(), self.ordering, per_page=10).execute()
+        self.assertEqual((len(result), result.total, result.total_is_estimate), (5, 5, False))
+
+    def test_exact_total_below_the_limit(self):
+        result = SearchExecutor(Job.objects.all(), self.ordering, per_page=2, count_limit=10).execute()
+        self.assertEqual((len(result), result.total, result.total_is_estimate), (2, 5, False))
+
+    def test_total_above_the_limit_is_an_estimate(self):
+        result = SearchExecutor(Job.objects.all(), self.ordering, per_page=2, count_limit=3).execute()
+        self.assertEqual((result.total, result.total_is_estimate), (3, True))
+
+    def test_job_list_shows_capped_total(self):
+        with self.settings(JOBS_PER_PAGE=2, SEARCH_EXACT_COUNT_LIMIT=3):
+            context = self.client.get(reverse('job_list')).context
+        self.assertEqual(context['jobs_count'], 3)
+        self.assertTrue(context['jobs_count_is_estimate'])
+
+
+class BenchmarkTests(JobBoardTestCase):
+    def test_corpus_is_deterministic(self):
+        benchmark.generate_corpus(30, 5, seed=7)
+        first = list(Job.objects.order_by('id').values_list('title', 'location', 'salary'))
+        Job.objects.all().delete()
+        Company.objects.all().delete()
+        User.objects.filter(username='benchmark').delete()
+        benchmark.generate_corpus(30, 5, seed=7)
+        self.assertEqual(list(Job.objects.order_by('id').values_list('title', 'location', 'salary')), first)
+
+    def test_percentile(self):
+        self.assertEqual(benchmark.percentile([5, 1, 3, 2, 4], 50), 3)
+        self.assertEqual(benchmark.percentile(list(range(1, 101)), 95), 95)
+        self.assertIsNone(benchmark.percentile([], 50))
+
+    def test_private_cache_leaves_the_configured_cache_alone(self):
+        cache.set('production-key', 1)
+        with benchmark.private_cache():
+            cache.set('benchmark-key', 1)
+            cache.clear()
+        self.assertEqual(cache.get('production-key'), 1)
+        self.assertIsNone(cache.get('benchmark-key'))
+
+
+class PercolatorTests(JobBoardTestCase):
+    ALERTS = [
+        {'keywords': 'dev'},
+        {'keywords': 'python developer'},
+        {'keywords': 'analyst, golang'},
+        {'keywords': 'developers'},
+        {'keywords': 'python', 'location': 'Nai'},
+        {'keywords': 'engineer', 'location': 'Nairobi', 'radius_km': 100},
+        {'keywords': '', 'job_type': 'contract'},
+        {'keywords': '!!!, shop'},
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.seeker = User.objects.create_user('seeker', 'seeker@example.com', 'secret')
+
+    def create_alerts(self):
+        return [
+            JobAlert.objects.create(user=self.seeker, name=f'Alert {number}', **criteria)
+            for number, criteria in enumerate(self.ALERTS)
+        ]
+
+    def create_jobs(self):
+        make_job(self.poster, title='Python Developer', location='Nairobi')
+        make_job(self.poster, title='Senior Engineer', description='Python developers wanted.', location='Thika')
+        make_job(self.poster, title='Golang Engineer', company_name='DevShop', location='Mombasa')
+        make_job(self.poster, title='Data Analyst', location='Nairobi West', job_type='contract')
+        make_job(self.poster, title='Nurse', description='Ward duties.', location='Kisumu')
+
+    def matched(self, alert):
+        return set(AlertMatch.objects.filter(alert=alert).values_list('job__title', flat=True))
+
+    def test_posted_jobs_match_the_same_as_the_alert_query(self):
+        alerts = self.create_alerts()
+        self.create_jobs()
+        for alert in alerts:
+            expected = set(alert.get_matching_jobs().values_list('title', flat=True))
+            self.assertEqual(self.matched(alert), expected, alert.keywords)
+
+    def test_seeded_matches_equal_percolated_ones(self):
+        alerts = self.create_alerts()
+        self.create_jobs()
+        percolated = [self.matched(alert) for alert in alerts]
+        JobAlert.objects.all().delete()
+        seeded = [self.matched(alert) for alert in self.create_alerts()]
+        self.assertEqual(seeded, percolated)
+
+    def test_keyword_words_match_word_starts(self):
+        alerts = self.create_alerts()
+        self.create_jobs()
+        self.assertEqual(self.matched(alerts[0]), {'Python Developer', 'Senior Engineer', 'Golang Engineer'})
+        self.assertEqual(self.matched(alerts[1]), {'Python Developer', 'Senior Engineer'})
+        self.assertEqual(self.matched(alerts[3]), {'Senior Engineer'})
+        self.assertEqual(self.matched(alerts[4]), {'Python Developer'})
+        self.assertEqual(self.matched(alerts[5]), {'Senior Engineer'})
+
+    def test_edit_moves_the_job_between_alerts(self):
+        alerts = self.create_alerts()
+        job = make_job(self.poster, title='Nurse', description='Ward duties.', location='Kisumu')
+        self.assertEqual(self.matched(alerts[0]), set())
+        job = Job.objects.get(pk=job.pk)
+        job.title = 'Web Developer'
+        job.save()
+        self.assertEqual(self.matched(alerts[0]), {'Web Developer'})
+        job = Job.objects.get(pk=job.pk)
+        job.title = 'Nurse'
+        job.save()
+        self.assertEqual(self.matched(alerts[0]), set())
+
+    def test_rebuild_reproduces_the_index(self):
+        alerts = self.create_alerts()
+        self.create_jobs()
+        before = [self.matched(alert) for alert in alerts]
+        percolator.rebuild()
+        self.assertEqual([self.matched(alert) for alert in alerts], before)
+        self.assertEqual(
+            [alert.pending_match_count for alert in JobAlert.objects.order_by('id')],
+            [len(jobs) for jobs in before],
+        )
+
+    def test_own_jobs_never_match(self):
+        alert = JobAlert.objects.create(user=self.poster, name='Mine', keywords='python')
+        make_job(self.poster)
+        self.assertEqual(self.matched(alert), set())
+
+
+def send_alerts(**options):
+    call_command('send_job_alerts', stdout=StringIO(), **options)
+
+
+class HighWaterMarkTests(JobBoardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.seeker = User.objects.create_user('seeker', 'seeker@example.com', 'secret')
+        self.alert = JobAlert.objects.create(user=self.seeker, name='Python', keywords='python')
+
+    def test_a_job_is_emailed_once(self):
+        job = make_job(self.poster)
+        send_alerts()
+        self.assertEqual(len(mail.outbox), 1)
+        self.alert.refresh_from_db()
+        self.assertEqual(self.alert.last_job_id, job.id)
+        # Due again, but with nothing new
+        JobAlert.objects.update(next_due=timezone.now())
+        job.description = 'Python and Django.'
+        job.save()
+        send_alerts()
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_applied_jobs_are_passed_over(self):
+        job = make_job(self.poster)
+        Application.objects.create(job=job, applicant=self.seeker, cover_letter='Hi')
+        send_alerts()
+        self.assertEqual(mail.outbox, [])
+        self.alert.refresh_from_db()
+        self.assertEqual(self.alert.last_job_id, job.id)
+        self.assertFalse(AlertMatch.objects.filter(notified_at__isnull=True).exists())
+
+    def test_match_committed_below_the_mark_during_a_run_is_kept(self):
+        late = make_job(self.poster, title='Nurse', description='Ward duties.')
+        make_job(self.poster)
+        read = percolator.pending_jobs
+
+        def commit_late_match(alerts):
+            pending = read(alerts)
+            # A job with a lower id whose transaction commits after the run read the matches
+            AlertMatch.objects.create(alert=self.alert, job=late)
+            return pending
+
+        with mock.patch('jobs.percolator.pending_jobs', commit_late_match):
+            send_alerts()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertTrue(AlertMatch.objects.filter(job=late, notified_at__isnull=True).exists())
+        JobAlert.objects.update(next_due=timezone.now())
+        send_alerts()
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn('Nurse', mail.outbox[1].body)
+
+    def test_new_jobs_below_the_mark_still_match(self):
+        JobAlert.objects.filter(pk=self.alert.pk).update(last_job_id=10 ** 6)
+        job = make_job(self.poster)
+        self.assertTrue(AlertMatch.objects.filter(alert=self.alert, job=job).exists())
+
+    def test_jobs_posted_before_the_mark_never_match(self):
+        job = make_job(self.poster, title='Nurse', description='Ward duties.')
+        JobAlert.objects.filter(pk=self.alert.pk).update(last_job_id=job.id)
+        job = Job.objects.get(pk=job.pk)
+        job.title = 'Python Developer'
+        job.save()
+        self.assertFalse(AlertMatch.objects.exists())
+
+
+class BatchedAlertTests(JobBoardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.users = [User.objects.create_user(f'user{number}', f'user{number}@example.com', 'x') for number in range(3)]
+        for user in self.users:
+            JobAlert.objects.create(user=user, name='Python', keywords='python')
+            JobAlert.objects.create(user=user, name='Django', keywords='django')
+        make_job(self.poster, description='Python and Django.')
+
+    def recipients(self):
+        return sorted(message.to[0] for message in mail.outbox)
+
+    def test_one_chunk_is_loaded_with_a_fixed_number_of_queries(self):
+        stats = alert_runner.run_alerts(batch_size=10, log=lambda level, message: None)
+        self.assertEqual(stats['sent'], 3)
+        self.assertEqual(stats['phases']['load']['queries'], 2)
+        self.assertEqual(stats['phases']['match']['queries'], 2)
+
+    def test_each_user_is_recorded_as_soon_as_their_email_is_out(self):
+        record = alert_runner.record_evaluated
+        calls = []
+
+        def crash_on_second_user(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError('worker killed')
+            return record(*args)
+
+        with mock.patch('jobs.alert_runner.record_evaluated', crash_on_second_user):
+            with self.assertRaises(RuntimeError):
+                send_alerts(batch_size=10)
+        first_user = self.recipients()[0]
+        send_alerts(batch_size=10)
+        recipients = self.recipients()
+        self.assertEqual(recipients.count(first_user), 1)
+        self.assertEqual(set(recipients), {user.email for user in self.users})
+
+    def test_failed_sends_are_retried(self):
+        with mock.patch('jobs.mail_pool.DeliveryEngine._send_one', side_effect=ConnectionRefusedError):
+            send_alerts()
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(AlertMatch.objects.filter(notified_at__isnull=True).count(), 6)
+        send_alerts()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(AlertMatch.objects.filter(notified_at__isnull=True).exists())
+
+    def test_runs_log_through_logging_by_default(self):
+        with mock.patch('jobs.mail_pool.DeliveryEngine._send_one', side_effect=[None, ConnectionRefusedError, None]):
+            with self.assertLogs('jobs.alert_runner', 'INFO') as logs:
+                alert_runner.run_alerts()
+        self.assertEqual(
+            sorted(record.levelname for record in logs.records),
+            ['ERROR', 'INFO', 'INFO'],
+        )
+
+    def test_shards_split_users_by_id(self):
+        quiet = {'log': lambda level, message: None}
+        stats = [alert_runner.run_alerts(shard, 2, **quiet) for shard in (0, 1)]
+        self.assertEqual(sum(result['sent'] for result in stats), 3)
+        for shard, result in enumerate(stats):
+            expected = sum(1 for user in self.users if user.id % 2 == shard)
+            self.assertEqual(result['sent'], expected)
+        self.assertEqual(sorted(self.recipients()), sorted(user.email for user in self.users))
+
+
+class ClosingHandler(SMTPSinkHandler):
+    """Hangs up once a message is in: before acknowledging it when the sink
+    has drop_before_ack set, otherwise just after"""
+
+    def reply(self, line):
+        if line.startswith('250 OK queued'):
+            if not self.server.drop_before_ack:
+                super().reply(line)
+            self.request.shutdown(socket.SHUT_RDWR)
+        else:
+            super().reply(line)
+
+
+class ClosingSink(SMTPSink):
+    handler_class = ClosingHandler
+
+    def __init__(self, drop_before_ack=False):
+        super().__init__()
+        self.drop_before_ack = drop_before_ack
+
+
+class MailPoolTests(TestCase):
+    def engine(self, sink, **options):
+        engine = mail_pool.DeliveryEngine(
+            'django.core.mail.backends.smtp.EmailBackend', domain_rate=0,
+            host='127.0.0.1', port=sink.port, username='', password='', use_tls=False, use_ssl=False,
+            **options,
+        )
+        self.addCleanup(engine.close)
+        return engine
+
+    def sink(self, sink):
+        sink.start()
+        self.addCleanup(sink.server_close)
+        self.addCleanup(sink.shutdown)
+        return sink
+
+    def messages(self, count):
+        return [EmailMessage('Alert', 'Body', 'jobs@example.com', [f'user{number}@example.com']) for number in range(count)]
+
+    def test_batches_share_pooled_connections(self):
+        sink = self.sink(SMTPSink())
+        report = self.engine(sink, connections=2, batch_size=5).send(self.messages(20))
+        self.assertEqual((report.sent, report.failed), (20, []))
+        self.assertEqual(sink.received, 20)
+        self.assertLessEqual(sink.connections, 2)
+
+    def test_dropped_connection_is_reopened_before_data(self):
+        sink = self.sink(ClosingSink())
+        report = self.engine(sink, connections=1).send(self.messages(3))
+        self.assertEqual((report.sent, report.failed), (3, []))
+        self.assertEqual(sink.received, 3)
+        self.assertEqual(sink.connections, 3)
+
+    def test_drop_after_data_is_not_retried(self):
+        sink = self.sink(ClosingSink(drop_before_ack=True))
+        report = self.engine(sink, connections=1).send(self.messages(1))
+        self.assertEqual(report.sent, 0)
+        self.assertEqual(len(report.failed), 1)
+        self.assertEqual(sink.received, 1)
+
+
+class OutboxTests(JobBoardTestCase):
+    def enqueue(self, to='employer@example.com'):
+        return outbox.enqueue(EmailMessage('New application', 'Body', None, [to]))
+
+    def test_message_is_only_queued_if_its_transaction_commits(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.enqueue()
+                raise RuntimeError('rolled back')
+        self.assertFalse(OutboxMessage.objects.exists())
+        self.assertEqual(mail.outbox, [])
+
+    def test_process_delivers_due_messages(self):
+        self.enqueue()
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(outbox.process(), {'claimed': 1, 'sent': 1, 'retried': 0, 'dead': 0})
+        self.assertEqual(mail.outbox[0].to, ['employer@example.com'])
+        self.assertEqual(OutboxMessage.objects.get().status, 'sent')
+        self.assertEqual(outbox.process()['claimed'], 0)
+
+    @override_settings(OUTBOX_RETRY_BASE_SECONDS=30, OUTBOX_MAX_ATTEMPTS=2)
+    def test_failures_back_off_then_dead_letter(self):
+        row = self.enqueue()
+        with mock.patch('jobs.mail_pool.DeliveryEngine._send_one', side_effect=ConnectionRefusedError):
+            self.assertEqual(outbox.process()['retried'], 1)
+            row.refresh_from_db()
+            self.assertEqual(row.attempts, 1)
+            self.assertIn('ConnectionRefusedError', row.last_error)
+            self.assertGreater(row.next_attempt_at, timezone.now() + timedelta(seconds=25))
+            self.assertEqual(outbox.process()['claimed'], 0)
+
+            OutboxMessage.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(outbox.process()['dead'], 1)
+        self.assertEqual(OutboxMessage.objects.get().status, 'dead')
+
+        self.assertEqual(outbox.retry_dead(), 1)
+        self.assertEqual(outbox.process()['sent'], 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_retry_delay_is_capped(self):
+        with self.settings(OUTBOX_RETRY_BASE_SECONDS=30, OUTBOX_RETRY_MAX_SECONDS=3600):
+            self.assertEqual(outbox.retry_delay(1), timedelta(seconds=30))
+            self.assertEqual(outbox.retry_delay(3), timedelta(seconds=120))
+            self.assertEqual(outbox.retry_delay(20), timedelta(seconds=3600))
+
+    def test_old_sent_messages_are_pruned(self):
+        old, recent = self.enqueue(), self.enqueue()
+        outbox.process()
+        OutboxMessage.objects.filter(id=old.id).update(sent_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(outbox.prune_sent(), 1)
+        self.assertEqual(list(OutboxMessage.objects.values_list('id', flat=True)), [recent.id])
+
+
+class AlertScheduleTests(JobBoardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('seeker', 'seeker@example.com', 'x')
+        self.python = JobAlert.objects.create(user=self.user, name='Python', keywords='python')
+        self.rust = JobAlert.objects.create(user=self.user, name='Rust', keywords='rust')
+        make_job(self.poster, description='Python and Django.')
+
+    def due(self):
+        return set(JobAlert.objects.filter(next_due__lte=timezone.now()).values_list('name', flat=True))
+
+    def test_every_evaluated_alert_moves_to_its_next_slot(self):
+        self.assertEqual(self.due(), {'Python', 'Rust'})
+        send_alerts()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(self.due(), set())
+        rust = JobAlert.objects.get(name='Rust')
+        self.assertIsNone(rust.last_sent)
+        self.assertGreater(rust.next_due, timezone.now() + timedelta(hours=12))
+
+    def test_quiet_alerts_are_not_evaluated_again_until_their_slot(self):
+        self.python.delete()
+        send_alerts()
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(self.due(), set())
+        self.assertEqual(alert_runner.run_alerts(log=lambda level, message: None)['due'], 0)
+
+    def test_failed_alerts_stay_due(self):
+        with mock.patch('jobs.mail_pool.DeliveryEngine._send_one', side_effect=ConnectionRefusedError):
+            send_alerts()
+        self.assertEqual(self.due(), {'Python', 'Rust'})
+
+    def test_checked_alert_keeps_its_weekly_slot(self):
+        self.rust.frequency = 'weekly'
+        self.rust.last_sent = timezone.now() - timedelta(days=10)
+        self.rust.save()
+        checked = timezone.now()
+        next_due = self.rust.compute_next_due(checked=checked)
+        self.assertGreaterEqual(next_due, checked + timedelta(days=3, hours=12))
+        self.assertLess(next_due, checked + timedelta(days=10, hours=12))
+        self.assertEqual(self.rust.compute_next_due(checked=checked + timedelta(days=7)), next_due + timedelta(days=7))
+
+
+class InstantAlertTests(JobBoardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('seeker', 'seeker@example.com', 'x')
+        self.alert = JobAlert.objects.create(user=self.user, name='Python', keywords='python', frequency='instant')
+
+    def test_new_job_is_matched_and_queued_together(self):
+        job = make_job(self.poster, description='Python and Django.')
+        self.assertTrue(AlertMatch.objects.filter(alert=self.alert, job=job).exists())
+        self.assertEqual(list(JobQueueEntry.objects.values_list('job_id', flat=True)), [job.id])
+
+        AlertMatch.objects.all().delete()
+        JobQueueEntry.objects.all().delete()
+        with mock.patch('jobs.instant_alerts.enqueue', side_effect=RuntimeError('queue unavailable')):
+            with self.assertRaises(RuntimeError):
+                signals.percolate_job(Job, instance=job, created=True)
+        self.assertFalse(AlertMatch.objects.exists())
+
+    def test_queued_jobs_are_emailed_and_removed(self):
+        make_job(self.poster, description='Python and Django.')
+        stats = instant_alerts.process()
+        self.assertEqual((stats['jobs'], stats['sent']), (1, 1))
+        self.assertEqual(mail.outbox[0].to, ['seeker@example.com'])
+        self.assertFalse(JobQueueEntry.objects.exists())
+        self.assertFalse(AlertMatch.objects.filter(notified_at__isnull=True).exists())
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_entries_out_of_attempts_are_kept_as_failed(self):
+        make_job(self.poster, description='Python and Django.')
+        with mock.patch('jobs.mail_pool.DeliveryEngine._send_one', side_effect=ConnectionRefusedError):
+            for _ in range(2):
+                self.assertEqual(instant_alerts.process()['failed'], 1)
+                JobQueueEntry.objects.update(available_at=timezone.now())
+        entry = JobQueueEntry.objects.get()
+        self.assertEqual((entry.status, entry.attempts), ('failed', 2))
+        self.assertIn('ConnectionRefusedError', entry.last_error)
+        self.assertEqual(instant_alerts.process()['jobs'], 0)
+
+        self.assertEqual(instant_alerts.retry_failed(), 1)
+        self.assertEqual(instant_alerts.process()['sent'], 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class PendingMatchCountTests(JobBoardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('seeker', 'seeker@example.com', 'x')
+        self.alert = JobAlert.objects.create(user=self.user, name='Python', keywords='python')
+        self.job = make_job(self.poster, description='Python and Django.')
+
+    def count(self):
+        return JobAlert.objects.get(id=self.alert.id).pending_match_count
+
+    def test_applying_and_withdrawing_recount_the_applicants_alerts(self):
+        self.assertEqual(self.count(), 1)
+        application = Application.objects.create(job=self.job, applicant=self.user, cover_letter='Hi', resume='resumes/cv.pdf')
+        self.assertEqual(self.count(), 0)
+        application.status = 'reviewed'
+        with self.assertNumQueries(1):
+            application.save()
+        self.assertEqual(self.count(), 0)
+        application.delete()
+        self.assertEqual(self.count(), 1)
+
+    def test_other_applicants_leave_the_count_alone(self):
+        other = User.objects.create_user('other', 'other@example.com', 'x')
+        Application.objects.create(job=self.job, applicant=other, cover_letter='Hi', resume='resumes/cv.pdf')
+        self.assertEqual(self.count(), 1)
+
+
+class JobCardTests(JobBoardTestCase):
+    def test_cards_show_the_parsed_currency(self):
+        with self.settings(SALARY_DEFAULT_CURRENCY='KES'):
+            job = make_job(self.poster, salary='80,000 monthly')
+        html, text = CardRenderer().cards([job])[0]
+        self.assertIn('KES 80,000 monthly', html)
+        self.assertIn('Salary: KES 80,000 monthly', text)
+        self.assertNotIn('$', html + text)
+
+    def test_cards_are_rendered_once_until_the_job_changes(self):
+        job = make_job(self.poster, title='Python Developer')
+        first = CardRenderer()
+        first.cards([job, job])
+        self.assertEqual(first.rendered, 1)
+        renderer = CardRenderer()
+        renderer.cards([job])
+        self.assertEqual(renderer.rendered, 0)
+
+        job.title = 'Senior Python Developer'
+        job.save()
+        renderer = CardRenderer()
+        html, text = renderer.cards([job])[0]
+        self.assertEqual(renderer.rendered, 1)
+        self.assertIn('Senior Python Developer', text)
+
+
+class AlertRunStatsTests(JobBoardTestCase):
+    def setUp(self):
+        super().setUp()
+        for number in range(2):
+            user = User.objects.create_user(f'user{number}', f'user{number}@example.com', 'x')
+            JobAlert.objects.create(user=user, name='Python', keywords='python')
+        make_job(self.poster, description='Python and Django.')
+
+    def test_each_run_is_recorded(self):
+        send_alerts()
+        run = AlertRun.objects.get()
+        self.assertEqual((run.due, run.rendered, run.sent, run.failed), (2, 2, 2, 0))
+        self.assertEqual(run.stats['jobs'], 2)
+        self.assertEqual(set(run.stats['phases']), set(alert_runner.PHASES))
+        self.assertEqual(run.shard, '0/1')
+        self.assertGreater(run.queries, 0)
+
+    def test_stats_json_matches_the_recorded_run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'stats.json')
+            send_alerts(stats_json=path)
+            with open(path) as handle:
+                report = json.load(handle)
+        run = AlertRun.objects.get()
+        self.assertEqual(report['run'], run.id)
+        self.assertEqual((report['due'], report['sent'], report['failed']), (run.due, run.sent, run.failed))
+        self.assertEqual(report['wall_seconds'], run.wall_seconds)
+        self.assertEqual(report['phases'], run.stats['phases'])
+
+    def test_bad_shard_is_rejected(self):
+        for shard in ('2/2', 'first'):
+            with self.assertRaises(CommandError):
+                send_alerts(shard=shard)
+        self.assertFalse(AlertRun.objects.exists())
+
+
+class PreferredHourTests(JobBoardTestCase):
+    @override_settings(TIME_ZONE='Africa/Nairobi')
+    def test_preferred_hour_is_in_utc(self):
+        user = User.objects.create_user('seeker', 'seeker@example.com', 'x')
+        alert = JobAlert.objects.create(user=user, name='Python', keywords='python', preferred_hour=9)
+        alert.last_sent = timezone.now()
+        for frequency in ('daily', 'weekly'):
+            alert.frequency = frequency
+            self.assertEqual(alert.compute_next_due().utctimetuple().tm_hour, 9)
+
+    def test_form_labels_the_hour_as_utc(self):
+        form = JobAlertForm()
+        self.assertIn('09:00 UTC', str(form['preferred_hour']))
+        self.assertIn('UTC', form.fields['preferred_hour'].help_text)
+
+
+class SendSlotTests(JobBoardTestCase):
+    def test_a_users_alerts_share_a_slot(self):
+        user = User.objects.create_user('seeker', 'seeker@example.com', 'x')
+        sent = timezone.now()
+        alerts = [
+            JobAlert.objects.create(user=user, name=keywords, keywords=keywords, last_sent=sent)
+            for keywords in ('python', 'rust', 'go')
+        ]
+        self.assertEqual(len({alert.next_due for alert in alerts}), 1)
+        other = JobAlert.objects.create(user=self.poster, name='Python', keywords='python', last_sent=sent)
+        self.assertNotEqual(other.send_slot(), alerts[0].send_slot())
+
+    def test_slots_stay_inside_their_window(self):
+        for user_id in range(1, 200):
+            self.assertLess(alert_slots.send_slot(user_id, 'daily'), timedelta(days=1))
+            self.assertLess(alert_slots.send_slot(user_id, 'weekly'), timedelta(days=7))
+            self.assertEqual(alert_slots.send_slot(user_id, 'daily', 20).seconds // 3600, 20)
+        self.assertIsNone(alert_slots.send_slot(1, 'instant'))
+
+    def test_run_stats_count_due_alerts_once(self):
+        user = User.objects.create_user('seeker', 'seeker@example.com', 'x')
+        JobAlert.objects.create(user=user, name='Python', keywords='python')
+        stats = alert_runner.run_alerts(log=lambda level, message: None)
+        self.assertEqual(stats['due'], 1)
+        self.assertNotIn('alerts', stats)
+
+
+class AlertPreviewTests(JobBoardTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('seeker', 'seeker@example.com', 'x')
+        self.alert = JobAlert.objects.create(user=self.user, name='Python', keywords='python')
+        self.jobs = [make_job(self.poster, title=f'Python Developer {number}') for number in range(3)]
+        self.client.force_login(self.user)
+        self.url = reverse('view_alert_matches', args=[self.alert.id])
+
+    def test_preview_does_not_touch_the_schedule(self):
+        before = JobAlert.objects.values('last_sent', 'next_due', 'last_job_id').get(id=self.alert.id)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(JobAlert.objects.values('last_sent', 'next_due', 'last_job_id').get(id=self.alert.id), before)
+
+    def test_preview_is_paginated(self):
+        with self.settings(JOBS_PER_PAGE=2):
+            first = self.client.get(self.url).context
+            self.assertEqual([job.id for job in first['jobs']], [self.jobs[2].id, self.jobs[1].id])
+            self.assertEqual(first['jobs_count'], 3)
+            second = self.client.get(self.url, {'cursor': first['page'].next_cursor}).context
+        self.assertEqual([job.id for job in second['jobs']], [self.jobs[0].id])
+
+    def test_pages_are_cached_until_the_alert_changes(self):
+        self.client.get(self.url)
+        make_job(self.poster, title='Python Lead')
+        self.assertEqual(self.client.get(self.url).context['jobs_count'], 3)
+        self.alert.keywords = 'python, lead'
+        self.alert.save()
+        self.assertEqual(self.client.get(self.url).context['jobs_count'], 4)
+
+    def test_other_users_alerts_are_not_shown(self):
+        self.client.force_login(self.poster)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+def make_docx(path, paragraphs):
+    body = ''.join(f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>' for text in paragraphs)
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('word/document.xml', f'<w:document xmlns:w="{WORD_NAMESPACE[1:-1]}"><w:body>{body}</w:body></w:document>')
+
+
+class ResumeParserTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_docx_text_is_read_by_paragraph(self):
+        path = os.path.join(self.directory, 'cv.docx')
+        make_docx(path, ['Jane Doe', 'jane@example.com', 'Python and Django'])
+        data = ResumeParser().parse_resume(path, 'docx')
+        self.assertIsNone(data['error'])
+        self.assertEqual(data['raw_text'], 'Jane Doe\njane@example.com\nPython and Django')
+        self.assertEqual(data['personal_info']['email'], 'jane@example.com')
+        self.assertEqual(data['skills'], ['python', 'django'])
+
+    def test_only_what_the_text_holds_is_filled_in(self):
+        path = os.path.join(self.directory, 'cv.txt')
+        with open(path, 'w') as handle:
+            handle.write('Jane Doe\n+1 415-555-0134\n7 years of experience with Python and SQL\n')
+        data = ResumeParser().parse_resume(path, 'txt')
+        self.assertEqual(data['personal_info'], {
+            'full_name': 'Jane Doe', 'email': '', 'phone': '+1 415-555-0134', 'location': '',
+        })
+        self.assertEqual((data['education'], data['experience']), ([], []))
+        self.assertEqual(data['years_experience'], 7.0)
+        self.assertEqual(data['summary'], '7 years of experience. Skilled in python, sql.')
+
+        with open(path, 'w') as handle:
+            handle.write('CURRICULUM VITAE 2024\nJane Doe\n')
+        data = ResumeParser().parse_resume(path, 'txt')
+        self.assertEqual(data['personal_info']['full_name'], '')
+        self.assertEqual((data['years_experience'], data['summary']), (0.0, ''))
+
+    def test_long_docx_paragraph_stops_at_the_budget(self):
+        path = os.path.join(self.directory, 'cv.docx')
+        make_docx(path, ['word ' * 5000])
+        blocks = list(ResumeParser(max_chars=100).iter_text(path, 'docx'))
+        self.assertEqual([len(block) for block in blocks], [100])
+
+    def test_docx_page_limit(self):
+        path = os.path.join(self.directory, 'cv.docx')
+        make_docx(path, ['One', '<w:br w:type="page"/>Two', 'Three'])
+        self.assertEqual(ResumeParser(max_pages=1).extract_text(path, 'docx'), 'One')
+
+    @skipUnless(importlib.util.find_spec('pypdf'), 'needs pypdf')
+    def test_pdf_page_limit(self):
+        from pypdf import PdfWriter
+        path = os.path.join(self.directory, 'cv.pdf')
+        writer = PdfWriter()
+        for _ in range(5):
+            writer.add_blank_page(width=200, height=200)
+        writer.write(path)
+        self.assertEqual(len(list(ResumeParser(max_pages=2).iter_text(path, 'pdf'))), 2)
+
+    def test_unreadable_files_are_reported(self):
+        path = os.path.join(self.directory, 'cv.docx')
+        with open(path, 'w') as handle:
+            handle.write('not a zip')
+        self.assertIn('could not be read', ResumeParser().parse_resume(path, 'docx')['error'])
+        self.assertIn('limited to', ResumeParser(max_bytes=1).parse_resume(path, 'docx')['error'])
+
+
+class ResumeUploadTests(JobBoardTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        media = override_settings(MEDIA_ROOT=directory.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.media_root = directory.name
+        self.client.force_login(self.poster)
+
+    def upload(self, name, content, content_type):
+        return self.client.post(reverse('upload_resume'), {'resume': SimpleUploadedFile(name, content, content_type)})
+
+    def stored_files(self):
+        return [name for _, _, names in os.walk(self.media_root) for name in names]
+
+    def test_readable_resume_is_kept(self):
+        response = self.upload('cv.txt', b'Jane Doe\njane@example.com\nPython', 'text/plain')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['success'])
+        self.assertTrue(Resume.objects.get().processed)
+        parsed = ParsedResume.objects.get()
+        self.assertEqual((parsed.full_name, parsed.email), ('Jane Doe', 'jane@example.com'))
+        self.assertEqual((parsed.location, parsed.education, parsed.experience), ('', [], []))
+
+    def test_oversized_resume_is_refused_before_saving(self):
+        with self.settings(RESUME_MAX_FILE_BYTES=10):
+            response = self.upload('cv.txt', b'x' * 100, 'text/plain')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Resume.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+    def test_unreadable_resume_is_not_kept(self):
+        response = self.upload('cv.docx', b'not a zip', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('could not be read', response.json()['error'])
+        self.assertFalse(Resume.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+    def test_wrong_file_type_is_a_bad_request(self):
+        self.assertEqual(self.upload('cv.exe', b'MZ', 'application/octet-stream').status_code, 400)
@@ -8,6 +8,8 @@ urlpatterns = [
     path('jobs/<int:job_id>/', views.job_detail, name='job_detail'),
     path('jobs/post/', views.post_job, name='post_job'),
     path('jobs/<int:job_id>/apply/', views.apply_job, name='apply_job'),
+    path('jobs/autocomplete/', views.job_autocomplete, name='job_autocomplete'),
+    path('jobs/search-cache-stats/', views.search_cache_stats, name='search_cache_stats'),
     
     
     path('dashboard/', views.dashboard, name='dashboard'),
@@ -1,20 +1,33 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from .models import Job, Application, UserProfile, JobAlert, Company
 from .forms import JobForm, ApplicationForm, UserProfileForm, JobAlertForm,CompanyForm
-from django.db.models import Q
-from django.utils import timezone
+from django.db import transaction
 from .emails import send_new_application_email, send_application_status_email
 from .models import Resume, ParsedResume
 from django.http import JsonResponse
+from django.core.cache import cache
+from django.template.defaultfilters import filesizeformat
 import os
 from django.conf import settings
 import uuid
 import json
+import hashlib
 import re
 from django.views.decorators.csrf import csrf_exempt
 from .resume_parser import ResumeParser 
+from .search import get_search_backend
+from .pagination import KeysetPaginator, KeysetPage
+from .search_executor import SearchExecutor
+from . import result_cache
+from .autocomplete import index as autocomplete_index
+from . import facets
+from . import fuzzy
+from . import geo
+from . import percolator
+from .salary import CURRENCIES, parse_salary
 from .models import UserProfile, Connection
 from django.contrib.auth.models import User
 
@@ -309,7 +322,7 @@ def follow_user(request, username):
 
 @login_required
 def my_applications(request):
-    applications = Application.objects.filter(applicant=request.user).order_by('-date_applied')
+    applications = Application.objects.filter(applicant=request.user).select_related('job')
     
     # Calculate status counts
     status_counts = {
@@ -320,8 +333,14 @@ def my_applications(request):
         'accepted': applications.filter(status='accepted').count(),
     }
     
+    page = KeysetPaginator(
+        applications, ('-date_applied', '-id'), settings.APPLICATIONS_PER_PAGE
+    ).page(request.GET.get('cursor'))
+    
     context = {
-        'applications': applications,
+        'applications': page,
+        'applications_count': applications.count(),
+        'page': page,
         'status_counts': status_counts,
     }
     return render(request, 'jobs/my_applications.html', context)
@@ -340,8 +359,11 @@ def manage_jobs(request):
 @login_required
 def job_applications(request, job_id):
     job = get_object_or_404(Job, id=job_id, posted_by=request.user)
-    applications = Application.objects.filter(job=job).order_by('-date_applied')
-    return render(request, 'jobs/job_applications.html', {'job': job, 'applications': applications})
+    applications = Application.objects.filter(job=job)
+    page = KeysetPaginator(
+        applications, ('-date_applied', '-id'), settings.APPLICATIONS_PER_PAGE
+    ).page(request.GET.get('cursor'))
+    return render(request, 'jobs/job_applications.html', {'job': job, 'applications': page, 'page': page})
 
 # Your existing functions...
 def home(request):
@@ -351,21 +373,148 @@ def home(request):
 
 
 def job_list(request):
-    jobs = Job.objects.all().order_by('-date_posted')
-    
     # Get search parameters
     search_query = request.GET.get('q', '')
-    job_type = request.GET.get('job_type', '')
-    location = request.GET.get('location', '')
+    job_type = request.GET.get('job_type', '').strip()
+    location = request.GET.get('location', '').strip()
+    near = request.GET.get('near', '').strip()
+    radius = parse_radius(request.GET.get('radius'))
+    min_salary = parse_salary_bound(request.GET.get('min_salary'))
+    max_salary = parse_salary_bound(request.GET.get('max_salary'))
+    sort = request.GET.get('sort', '')
+    if sort not in SORT_CHOICES:
+        sort = ''
+    currency = request.GET.get('currency', '').strip().upper()
+    if currency not in CURRENCIES:
+        currency = settings.SALARY_DEFAULT_CURRENCY
+    cursor = request.GET.get('cursor')
+    
+    # Hot searches are served from the result cache until the next Job write
+    filters = {
+        'near': near,
+        'radius': radius,
+        'min_salary': min_salary,
+        'max_salary': max_salary,
+        'sort': sort,
+        'currency': currency,
+    }
+    cache_key = result_cache.make_key(search_query, job_type, location, cursor, **filters)
+    entry = result_cache.get_page(cache_key)
+    if entry is None:
+        entry = search_jobs(search_query, job_type, location, cursor, **filters)
+        result_cache.set_page(cache_key, entry)
+    
+    jobs_by_id = Job.objects.in_bulk(entry['ids'])
+    page = KeysetPage(
+        [jobs_by_id[job_id] for job_id in entry['ids'] if job_id in jobs_by_id],
+        entry['next_cursor'],
+        entry['prev_cursor'],
+    )
+    
+    context = {
+        'jobs': page,
+        'jobs_count': entry['jobs_count'],
+        'jobs_count_is_estimate': entry['jobs_count_is_estimate'],
+        'page': page,
+        'search_query': search_query,
+        'selected_job_type': job_type,
+        'selected_location': location,
+        'near': near,
+        'radius': radius,
+        'radius_choices': [10, 25, 50, 100, 250],
+        'min_salary': min_salary,
+        'max_salary': max_salary,
+        'sort': sort,
+        'sort_choices': SORT_CHOICES,
+        'currency': currency,
+        'currency_choices': CURRENCIES,
+        'unknown_place': entry['unknown_place'],
+        'job_types': entry['job_types'],
+        'locations': entry['locations'],
+        'facet_counts_are_estimates': entry['facet_counts_are_estimates'],
+        'corrected_query': entry['corrected_query'],
+    }
+    return render(request, 'jobs/job_list.html', context)
+
+def parse_radius(value):
+    """Radius in km from the query string, capped at GEO_MAX_RADIUS_KM"""
+    try:
+        radius = int(value)
+    except (TypeError, ValueError):
+        return None
+    return min(radius, settings.GEO_MAX_RADIUS_KM) if radius > 0 else None
+
+def parse_salary_bound(value):
+    """Yearly salary bound from the query string; "80,000" and "80k" both work"""
+    return parse_salary(value)[0]
+
+SORT_CHOICES = {
+    '': 'Most relevant',
+    'salary': 'Highest paying first',
+}
+
+def search_jobs(search_query, job_type, location, cursor, near='', radius=None,
+                min_salary=None, max_salary=None, sort='', currency=''):
+    """Run a job_list search and return the cacheable parts of the result page"""
+    point = geo.geocode(near) if near and radius else None
+    salary_filters = {'min_salary': min_salary, 'max_salary': max_salary, 'sort': sort, 'currency': currency}
+    jobs, ordering = filter_jobs(search_query, job_type, location, point, radius, **salary_filters)
+    result = SearchExecutor(jobs, ordering).execute(cursor)
+    
+    # Nothing found - retry once with misspelt words corrected
+    corrected_query = ''
+    if search_query and not result:
+        corrected_query = fuzzy.did_you_mean(search_query, fuzzy.JOB_FIELDS)
+        if corrected_query:
+            jobs, ordering = filter_jobs(corrected_query, job_type, location, point, radius, **salary_filters)
+            result = SearchExecutor(jobs, ordering).execute(cursor)
+    
+    # Filter options with per-value job counts, shared by every page of the search
+    def facet_queryset(facet):
+        scoped = {'job_type': job_type, 'location': location}
+        scoped[facet] = ''
+        query = corrected_query or search_query
+        if not (query or any(scoped.values()) or point or min_salary or max_salary or sort):
+            return None
+        return filter_jobs(query, scoped['job_type'], scoped['location'], point, radius, **salary_filters)[0]
+    
+    facets_key = result_cache.make_facets_key(
+        search_query, job_type, location, near=near, radius=radius, **salary_filters,
+    )
+    job_type_options, location_options, facet_counts_are_estimates = cache.get_or_set(
+        facets_key,
+        lambda: facets.sidebar(
+            facet_queryset,
+            selected_location=location,
+            location_limit=settings.FACET_LOCATION_LIMIT,
+            count_limit=settings.SEARCH_EXACT_COUNT_LIMIT,
+        ),
+        settings.JOB_LIST_CACHE_TIMEOUT,
+    )
     
-    # Apply filters
+    return {
+        'ids': [job.id for job in result],
+        'next_cursor': result.page.next_cursor,
+        'prev_cursor': result.page.prev_cursor,
+        'jobs_count': result.total,
+        'jobs_count_is_estimate': result.total_is_estimate,
+        'job_types': job_type_options,
+        'locations': location_options,
+        'facet_counts_are_estimates': facet_counts_are_estimates,
+        'corrected_query': corrected_query,
+        'unknown_place': bool(near and radius and not point),
+    }
+
+def filter_jobs(search_query, job_type, location, point=None, radius=None,
+                min_salary=None, max_salary=None, sort='', currency=''):
+    """job_list filters, returning the queryset and its keyset ordering"""
+    jobs = Job.objects.all()
+    
+    # Apply filters - full-text search, most relevant first
+    ordering = ('-date_posted', '-id')
     if search_query:
-        jobs = jobs.filter(
-            Q(title__icontains=search_query) | 
-            Q(description__icontains=search_query) |
-            Q(company_name__icontains=search_query) |  # Use company_name, not company
-            Q(location__icontains=search_query)
-        )
+        jobs = get_search_backend().search(jobs, search_query)
+        ordering = ('-search_rank', '-date_posted', '-id')
     
     if job_type:
         jobs = jobs.filter(job_type=job_type)
@@ -373,18 +522,44 @@ def job_list(request):
     if location:
         jobs = jobs.filter(location__icontains=location)
     
-    # Get unique locations for filter dropdown
-    unique_locations = Job.objects.values_list('location', flat=True).distinct()
-    
-    context = {
-        'jobs': jobs,
-        'search_query': search_query,
-        'selected_job_type': job_type,
-        'selected_location': location,
-        'job_types': Job.JOB_TYPE_CHOICES,
-        'locations': unique_locations,
-    }
-    return render(request, 'jobs/job_list.html', context)
+    # Radius search, answered from the geo grid index
+    if point and radius:
+        jobs = geo.within_radius(jobs, point[0], point[1], radius)
+    
+    # Salary range overlap on the parsed, yearly salary columns. Amounts are
+    # only comparable within one currency.
+    if min_salary or max_salary or sort == 'salary':
+        jobs = jobs.filter(salary_currency=currency or settings.SALARY_DEFAULT_CURRENCY)
+    if min_salary:
+        jobs = jobs.filter(salary_max__gte=min_salary)
+    if max_salary:
+        jobs = jobs.filter(salary_min__lte=max_salary)
+    
+    # Jobs without a parsable salary can't be ranked by pay
+    if sort == 'salary':
+        jobs = jobs.filter(salary_max__isnull=False)
+        ordering = ('-salary_max', '-id')
+    
+    return jobs, ordering
+
+def job_autocomplete(request):
+    """Typeahead suggestions for the job search box"""
+    query = request.GET.get('q', '')
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 8)), settings.AUTOCOMPLETE_MAX_RESULTS))
+    except ValueError:
+        limit = 8
+    return JsonResponse({
+        'query': query,
+        'suggestions': autocomplete_index.suggest(query, limit),
+    })
+
+@staff_member_required
+def search_cache_stats(request):
+    """Hit/miss counters of the job_list result cache, for tuning"""
+    if request.GET.get('reset'):
+        result_cache.reset_stats()
+    return JsonResponse(result_cache.stats())
 
 @login_required
 def post_job(request):
@@ -459,15 +634,12 @@ def apply_job(request, job_id):
             application = form.save(commit=False)
             application.applicant = request.user
             application.job = job
-            application.save()
-            
-            # Send email notification to employer
-            try:
+            # The employer's notification is queued in the same transaction,
+            # so it is sent exactly when the application exists
+            with transaction.atomic():
+                application.save()
                 send_new_application_email(application)
-                messages.success(request, 'Application submitted successfully! Notification sent to employer.')
-            except Exception as e:
-                messages.success(request, 'Application submitted successfully! (Email notification failed)')
-                # Log the error but don't show it to user
+            messages.success(request, 'Application submitted successfully! The employer will be notified by email.')
             
             return redirect('job_detail', job_id=job.id)
     else:
@@ -477,7 +649,7 @@ def apply_job(request, job_id):
 @login_required
 def manage_job_applications(request, job_id):
     job = get_object_or_404(Job, id=job_id, posted_by=request.user)
-    applications = Application.objects.filter(job=job).order_by('-date_applied')
+    applications = Application.objects.filter(job=job)
     
     # Status counts for dashboard
     status_counts = {
@@ -494,9 +666,14 @@ def manage_job_applications(request, job_id):
     if status_filter:
         applications = applications.filter(status=status_filter)
     
+    page = KeysetPaginator(
+        applications, ('-date_applied', '-id'), settings.APPLICATIONS_PER_PAGE
+    ).page(request.GET.get('cursor'))
+    
     context = {
         'job': job,
-        'applications': applications,
+        'applications': page,
+        'page': page,
         'status_counts': status_counts,
         'status_filter': status_filter,
         'status_choices': Application.STATUS_CHOICES,
@@ -522,14 +699,9 @@ def update_application_status(request, application_id):
             application.status = new_status
             if notes:
                 application.notes = notes
-            application.save()
-            
-            # Send email notification to applicant
-            try:
+            with transaction.atomic():
+                application.save()
                 send_application_status_email(application, old_status)
-            except Exception as e:
-                # Log error but don't show to user
-                pass
             
             messages.success(request, f'Application status updated to {dict(Application.STATUS_CHOICES)[new_status]}')
         else:
@@ -555,12 +727,9 @@ def view_application_detail(request, application_id):
 @login_required
 def job_alerts(request):
     """View and manage job alerts"""
+    # pending_match_count is kept up to date by jobs.percolator
     alerts = JobAlert.objects.filter(user=request.user).order_by('-created_at')
     
-    # Count new matches for each alert
-    for alert in alerts:
-        alert.new_matches_count = alert.get_matching_jobs().count()
-    
     return render(request, 'jobs/job_alerts.html', {
         'alerts': alerts,
     })
@@ -620,20 +789,45 @@ def delete_job_alert(request, alert_id):
     messages.success(request, f'Job alert "{alert_name}" deleted successfully!')
     return redirect('job_alerts')
 
+def alert_preview_key(alert, cursor):
+    # The criteria and the high-water mark decide what the alert matches, so
+    # editing the alert or sending it moves the preview to a new key
+    version = hashlib.sha1(json.dumps([percolator.criteria_key(alert), alert.last_job_id]).encode()).hexdigest()
+    return f'alertpreview:{alert.id}:{version}:{cursor or ""}'
+
 @login_required
 def view_alert_matches(request, alert_id):
-    """View jobs that match a specific alert"""
+    """View jobs that match a specific alert. Read-only: sending is left to
+    send_job_alerts, so looking at the matches never changes the schedule."""
     alert = get_object_or_404(JobAlert, id=alert_id, user=request.user)
-    matching_jobs = alert.get_matching_jobs()
+    cursor = request.GET.get('cursor')
+    
+    cache_key = alert_preview_key(alert, cursor)
+    entry = cache.get(cache_key)
+    if entry is None:
+        result = SearchExecutor(alert.get_matching_jobs(), ('-date_posted', '-id')).execute(cursor)
+        entry = {
+            'ids': [job.id for job in result],
+            'next_cursor': result.page.next_cursor,
+            'prev_cursor': result.page.prev_cursor,
+            'jobs_count': result.total,
+            'jobs_count_is_estimate': result.total_is_estimate,
+        }
+        cache.set(cache_key, entry, settings.ALERT_PREVIEW_CACHE_TIMEOUT)
     
-    # Mark as sent (for demo purposes - in real app, this would be in a cron job)
-    alert.last_sent = timezone.now()
-    alert.save()
+    jobs_by_id = Job.objects.select_related('company').in_bulk(entry['ids'])
+    page = KeysetPage(
+        [jobs_by_id[job_id] for job_id in entry['ids'] if job_id in jobs_by_id],
+        entry['next_cursor'],
+        entry['prev_cursor'],
+    )
     
     return render(request, 'jobs/alert_matches.html', {
         'alert': alert,
-        'jobs': matching_jobs,
-        'jobs_count': matching_jobs.count(),
+        'jobs': page,
+        'page': page,
+        'jobs_count': entry['jobs_count'],
+        'jobs_count_is_estimate': entry['jobs_count_is_estimate'],
     })
 
 @login_required
@@ -695,15 +889,26 @@ def edit_company(request, company_id):
 
 def company_list(request):
     """List all companies"""
-    companies = Company.objects.all().order_by('name')
+    companies = Company.objects.all()
     
     # Filter by industry if provided
     industry = request.GET.get('industry', '')
     if industry:
         companies = companies.filter(industry=industry)
     
+    # Typo-tolerant name search
+    search_query = request.GET.get('q', '')
+    corrected_query = ''
+    if search_query:
+        companies, corrected_query = fuzzy.search_companies(companies, search_query)
+    
+    page = KeysetPaginator(companies, ('name', 'id'), settings.COMPANIES_PER_PAGE).page(request.GET.get('cursor'))
+    
     context = {
-        'companies': companies,
+        'companies': page,
+        'page': page,
+        'search_query': search_query,
+        'corrected_query': corrected_query,
         'industry_filter': industry,
         'industry_choices': Company.INDUSTRY_CHOICES,
     }
@@ -752,7 +957,10 @@ def upload_resume(request):
         # Validate file type
         allowed_types = ['application/pdf', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'text/plain']
         if resume_file.content_type not in allowed_types:
-            return JsonResponse({'error': 'Invalid file type. Please upload PDF, DOCX, or TXT.'})
+            return JsonResponse({'error': 'Invalid file type. Please upload PDF, DOCX, or TXT.'}, status=400)
+        # Refused before anything is written to disk
+        if resume_file.size > settings.RESUME_MAX_FILE_BYTES:
+            return JsonResponse({'error': f'Resumes are limited to {filesizeformat(settings.RESUME_MAX_FILE_BYTES)}.'}, status=400)
         
         # Save resume
         resume = Resume(
@@ -767,6 +975,11 @@ def upload_resume(request):
         parser = ResumeParser()
         file_path = os.path.join(settings.MEDIA_ROOT, resume.file.name)
         parsed_data = parser.parse_resume(file_path, resume.file_type)
+        if parsed_data['error']:
+            # Nothing is kept of a resume that couldn't be read
+            resume.file.delete(save=False)
+            resume.delete()
+            return JsonResponse({'error': parsed_data['error']}, status=400)
         
         if parsed_data:
             # Save parsed data
@@ -1032,7 +1245,7 @@ def analyze_resume(request):
             # Parse resume
             parsed_data = parser.parse_resume(tmp_path, resume_file.name.split('.')[-1].lower())
             
-            if parsed_data:
+            if not parsed_data['error']:
                 # Calculate match score with job
                 match_score = calculate_job_match(parsed_data, job)
                 
@@ -1047,7 +1260,7 @@ def analyze_resume(request):
                     'experience': parsed_data['experience']
                 })
             else:
-                return JsonResponse({'error': 'Could not parse resume'}, status=400)
+                return JsonResponse({'error': parsed_data['error']}, status=400)
                 
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
@@ -1,4 +1,3 @@
-import schedule
 import time
 import os
 import django
@@ -21,26 +20,20 @@ def send_alerts():
 def main():
     """Main function to run the scheduler"""
     print("Starting JobBoard Alert Scheduler...")
-    print("This will check for new job alerts every hour.")
+    print("Alerts are sent as they fall due, by their frequency.")
     print("Press Ctrl+C to stop the scheduler.")
     print("-" * 50)
     
     # Setup Django
     setup_django()
+    from jobs.alert_runner import seconds_until_due
     
-    # Schedule the job to run every hour
-    schedule.every(1).hour.do(send_alerts)
-    
-    # Also run every 10 minutes for testing (optional)
-    schedule.every(10).minutes.do(send_alerts)
-    
-    # Run immediately on startup
-    send_alerts()
-    
-    # Keep the script running
+    # Send whatever is due, then sleep until the next alert falls due
     while True:
-        schedule.run_pending()
-        time.sleep(60)  # Check every minute
+        send_alerts()
+        delay = seconds_until_due()
+        print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Next check in {delay:.0f}s")
+        time.sleep(delay)
 
 if __name__ == "__main__":
     try:
@@ -48,4 +41,4 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("\nScheduler stopped by user. Goodbye!")
     except Exception as e:
-        print(f"Scheduler crashed with error: {e}")
\ No newline at end of file
+        print(f"Scheduler crashed with error: {e}")